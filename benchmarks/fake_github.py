@@ -0,0 +1,268 @@
+"""
+Local stand-in for the GitHub endpoints the indexer uses, serving one
+in-memory repo (see synthetic_repo.py) with configurable latency.
+
+    /repos/{owner}/{repo}/commits/{ref}              -> {"sha"}
+    /repos/{owner}/{repo}/git/trees/{ref}[?recursive=1]
+    /repos/{owner}/{repo}/contents/{path}?ref=
+    /repos/{owner}/{repo}/compare/{base}...{head}
+    /repos/{owner}/{repo}/tarball/{ref}
+    /raw/{owner}/{repo}/{branch}/{path}              (Range supported)
+
+Point the app at it with GITHUB_API_BASE=<base>/repos/ and
+GITHUB_API_RAW=<base>/raw/. Every request is counted per endpoint, with
+the bytes sent, so benchmarks can report HTTP traffic.
+
+Like GitHub, API responses carry an ETag (If-None-Match gets a 304 that
+costs no quota) and X-RateLimit-* headers; rate_limit requests per
+rate_window_s are allowed before 403s. error_rate injects 502s.
+
+    python -m benchmarks.fake_github --files 500 --latency-ms 50 --port 8765
+"""
+import argparse
+import asyncio
+import gzip
+import hashlib
+import io
+import random
+import tarfile
+import time
+from collections import defaultdict
+from typing import Dict, Optional
+
+from aiohttp import web
+
+from benchmarks.synthetic_repo import blob_sha, commit_sha, generate_repo
+
+
+def _tree_sha(path: str) -> str:
+    return hashlib.sha1(f"tree {path}".encode()).hexdigest()
+
+
+class FakeGitHub:
+    def __init__(
+        self,
+        repo: Dict[str, bytes],
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        truncate_at: Optional[int] = None,
+        rate_limit: Optional[int] = None,
+        rate_window_s: float = 60.0,
+        error_rate: float = 0.0,
+        seed: int = 0,
+    ):
+        """
+        repo: {path: content}. latency_ms (+ up to jitter_ms) is added to
+        every request. truncate_at marks recursive tree listings with more
+        entries than that as truncated, like GitHub does for big repos.
+        """
+        self.repo = repo
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.truncate_at = truncate_at
+        self.rate_limit = rate_limit
+        self.rate_window_s = rate_window_s
+        self.error_rate = error_rate
+        self.window_reset = 0.0
+        self.window_used = 0
+        self.sha = commit_sha(repo)
+        self.rng = random.Random(seed)
+        self.requests: Dict[str, int] = defaultdict(int)
+        self.bytes_sent: Dict[str, int] = defaultdict(int)
+
+        # directory path ("" for the root) -> {name: (type, full path)}
+        self.dirs: Dict[str, Dict[str, tuple]] = defaultdict(dict)
+        for path in repo:
+            parts = path.split("/")
+            for depth in range(len(parts) - 1):
+                parent, name = "/".join(parts[:depth]), parts[depth]
+                self.dirs[parent][name] = ("tree", "/".join(parts[:depth + 1]))
+            self.dirs["/".join(parts[:-1])][parts[-1]] = ("blob", path)
+        self.tree_shas = {_tree_sha(d): d for d in self.dirs}
+        self._tarball: Optional[bytes] = None
+
+    def stats(self) -> dict:
+        return {
+            "requests": dict(self.requests),
+            "bytes": dict(self.bytes_sent),
+            "total_requests": sum(self.requests.values()),
+            "total_bytes": sum(self.bytes_sent.values()),
+        }
+
+    def reset_stats(self):
+        self.requests.clear()
+        self.bytes_sent.clear()
+
+    def _rate_limited(self, response: web.Response):
+        """Applies the API quota; returns a 403 once it is used up."""
+        now = time.time()
+        if now >= self.window_reset:
+            self.window_reset, self.window_used = now + self.rate_window_s, 0
+        exhausted = self.window_used >= self.rate_limit
+        if not exhausted and response.status != 304:
+            self.window_used += 1
+        if exhausted:
+            response = web.json_response({"message": "API rate limit exceeded"}, status=403)
+        response.headers.update({
+            "X-RateLimit-Limit": str(self.rate_limit),
+            "X-RateLimit-Remaining": str(self.rate_limit - self.window_used),
+            "X-RateLimit-Reset": str(int(self.window_reset)),
+            "X-RateLimit-Resource": "core",
+        })
+        return response
+
+    async def _respond(self, request: web.Request, endpoint: str, response: web.Response) -> web.Response:
+        if self.latency or self.jitter:
+            await asyncio.sleep(self.latency + self.rng.random() * self.jitter)
+        if self.error_rate and self.rng.random() < self.error_rate:
+            response = web.Response(status=502, text="Bad Gateway")
+        elif endpoint != "raw" and response.status == 200 and response.content_type == "application/json":
+            etag = '"' + hashlib.sha1(response.body).hexdigest() + '"'
+            if request.headers.get("If-None-Match") == etag:
+                response = web.Response(status=304)
+            response.headers["ETag"] = etag
+        if self.rate_limit is not None and endpoint != "raw" and response.status != 502:
+            response = self._rate_limited(response)
+        self.requests[endpoint] += 1
+        self.bytes_sent[endpoint] += len(response.body or b"")
+        return response
+
+    def _entry(self, name: str, kind: str, path: str, recursive_path: Optional[str] = None) -> dict:
+        if kind == "blob":
+            content = self.repo[path]
+            return {"path": recursive_path or name, "mode": "100644", "type": "blob",
+                    "sha": blob_sha(content), "size": len(content)}
+        return {"path": recursive_path or name, "mode": "040000", "type": "tree", "sha": _tree_sha(path)}
+
+    async def commits(self, request: web.Request) -> web.Response:
+        return await self._respond(request, "commits", web.json_response({"sha": self.sha}))
+
+    async def trees(self, request: web.Request) -> web.Response:
+        ref = request.match_info["ref"]
+        root = self.tree_shas.get(ref, "")
+        if request.query.get("recursive"):
+            prefix = root + "/" if root else ""
+            entries = []
+            for directory in sorted(self.dirs):
+                for name, (kind, path) in sorted(self.dirs[directory].items()):
+                    if path.startswith(prefix):
+                        entries.append(self._entry(name, kind, path, path[len(prefix):]))
+            truncated = self.truncate_at is not None and len(entries) > self.truncate_at
+            if truncated:
+                entries = entries[:self.truncate_at]
+        else:
+            entries = [self._entry(name, kind, path) for name, (kind, path) in sorted(self.dirs[root].items())]
+            truncated = False
+        body = {"sha": ref, "tree": entries, "truncated": truncated}
+        return await self._respond(request, "trees", web.json_response(body))
+
+    async def contents(self, request: web.Request) -> web.Response:
+        directory = request.match_info["path"].strip("/")
+        if directory not in self.dirs:
+            return await self._respond(request, "contents", web.json_response({"message": "Not Found"}, status=404))
+        items = []
+        for name, (kind, path) in sorted(self.dirs[directory].items()):
+            entry = self._entry(name, kind, path)
+            items.append({
+                "name": name, "path": path, "type": "file" if kind == "blob" else "dir",
+                "sha": entry["sha"], "size": entry.get("size", 0),
+            })
+        return await self._respond(request, "contents", web.json_response(items))
+
+    async def compare(self, request: web.Request) -> web.Response:
+        # The served repo never changes between commits
+        return await self._respond(request, "compare", web.json_response({"status": "identical", "files": []}))
+
+    def tarball_bytes(self) -> bytes:
+        """gzip'd tar in GitHub's layout: pax comment = commit, one root dir."""
+        if self._tarball is None:
+            buffer = io.BytesIO()
+            root = f"owner-repo-{self.sha[:7]}"
+            with tarfile.open(fileobj=buffer, mode="w", format=tarfile.PAX_FORMAT,
+                              pax_headers={"comment": self.sha}) as tar:
+                for path in sorted(self.repo):
+                    info = tarfile.TarInfo(f"{root}/{path}")
+                    info.size = len(self.repo[path])
+                    tar.addfile(info, io.BytesIO(self.repo[path]))
+            self._tarball = gzip.compress(buffer.getvalue(), compresslevel=1, mtime=0)
+        return self._tarball
+
+    async def tarball(self, request: web.Request) -> web.Response:
+        body = await asyncio.to_thread(self.tarball_bytes)
+        return await self._respond(request, "tarball", web.Response(body=body, content_type="application/x-gzip"))
+
+    async def raw(self, request: web.Request) -> web.Response:
+        content = self.repo.get(request.match_info["path"])
+        if content is None:
+            return await self._respond(request, "raw", web.Response(status=404, text="404: Not Found"))
+        byte_range = request.headers.get("Range", "")
+        if byte_range.startswith("bytes="):
+            start, _, end = byte_range[len("bytes="):].partition("-")
+            start, end = int(start or 0), min(int(end) if end else len(content) - 1, len(content) - 1)
+            if start < len(content):
+                return await self._respond(request, "raw", web.Response(
+                    status=206, body=content[start:end + 1],
+                    headers={"Content-Range": f"bytes {start}-{end}/{len(content)}"},
+                ))
+        return await self._respond(request, "raw", web.Response(body=content))
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        prefix = "/repos/{owner}/{repo}"
+        app.router.add_get(prefix + "/commits/{ref}", self.commits)
+        app.router.add_get(prefix + "/git/trees/{ref}", self.trees)
+        app.router.add_get(prefix + "/contents/{path:.*}", self.contents)
+        app.router.add_get(prefix + "/compare/{spec}", self.compare)
+        app.router.add_get(prefix + "/tarball/{ref}", self.tarball)
+        app.router.add_get("/raw/{owner}/{repo}/{branch}/{path:.*}", self.raw)
+        app.router.add_get("/_stats", self.stats_handler)
+        return app
+
+    async def stats_handler(self, request: web.Request) -> web.Response:
+        # Not counted: benchmark drivers read and reset the counters here
+        stats = self.stats()
+        if request.query.get("reset"):
+            self.reset_stats()
+        return web.json_response(stats)
+
+
+async def start_server(server: FakeGitHub, host: str = "127.0.0.1", port: int = 0):
+    """
+    Starts serving on host:port (0 picks a free port).
+    Returns (runner, base_url); call `await runner.cleanup()` to stop.
+    """
+    runner = web.AppRunner(server.app(), access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    bound = runner.addresses[0][1]
+    return runner, f"http://{host}:{bound}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a synthetic repo over fake GitHub endpoints.")
+    parser.add_argument("--files", type=int, default=500)
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--truncate-at", type=int, default=None)
+    parser.add_argument("--rate-limit", type=int, default=None, help="API requests per window")
+    parser.add_argument("--rate-window-s", type=float, default=60.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered 502")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    server = FakeGitHub(
+        generate_repo(args.files, args.depth, seed=args.seed),
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, truncate_at=args.truncate_at,
+        rate_limit=args.rate_limit, rate_window_s=args.rate_window_s, error_rate=args.error_rate,
+    )
+    base = f"http://{args.host}:{args.port}"
+    print(f"Serving {len(server.repo)} files @ {server.sha}")
+    print(f"GITHUB_API_BASE={base}/repos/ GITHUB_API_RAW={base}/raw/")
+    web.run_app(server.app(), host=args.host, port=args.port, access_log=None)
+
+if __name__ == "__main__":
+    main()
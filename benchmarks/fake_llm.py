@@ -0,0 +1,114 @@
+"""
+Deterministic stand-in chat model for benchmarks.
+
+The answer is derived from a hash of the prompt, so the same prompt always
+gives the same text, and the reply is paced like a real model: a fixed
+time to first token plus a delay per output token. Works with ainvoke and
+with graph streaming (stream_mode="messages"), and reports usage_metadata.
+"""
+import asyncio
+import hashlib
+import random
+import time
+from typing import Any, AsyncIterator, Iterator, List, Optional
+
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+_WORDS = (
+    "the module loads config and builds the index graph then parses each file "
+    "caches results streams tokens answers questions about classes functions imports"
+).split()
+
+
+def _prompt_text(messages: List[BaseMessage]) -> str:
+    return "\n".join(str(m.content) for m in messages)
+
+
+class FakeChatModel(BaseChatModel):
+    first_token_ms: float = 300.0
+    per_token_ms: float = 10.0
+    output_tokens: int = 120
+    model: str = "fake-chat"
+    temperature: float = 0.0
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    def _tokens(self, messages: List[BaseMessage]) -> List[str]:
+        seed = hashlib.sha1(_prompt_text(messages).encode()).hexdigest()
+        rng = random.Random(seed)
+        return [rng.choice(_WORDS) + " " for _ in range(self.output_tokens)]
+
+    def _usage(self, messages: List[BaseMessage], tokens: List[str]) -> dict:
+        input_tokens = len(_prompt_text(messages)) // 4
+        return {"input_tokens": input_tokens, "output_tokens": len(tokens), "total_tokens": input_tokens + len(tokens)}
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        self.calls += 1
+        tokens = self._tokens(messages)
+        time.sleep((self.first_token_ms + self.per_token_ms * len(tokens)) / 1000)
+        message = AIMessage(content="".join(tokens).strip(), usage_metadata=self._usage(messages, tokens))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        self.calls += 1
+        tokens = self._tokens(messages)
+        await asyncio.sleep((self.first_token_ms + self.per_token_ms * len(tokens)) / 1000)
+        message = AIMessage(content="".join(tokens).strip(), usage_metadata=self._usage(messages, tokens))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        self.calls += 1
+        tokens = self._tokens(messages)
+        time.sleep(self.first_token_ms / 1000)
+        for i, token in enumerate(tokens):
+            if i:
+                time.sleep(self.per_token_ms / 1000)
+            usage = self._usage(messages, tokens) if i == len(tokens) - 1 else None
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token, usage_metadata=usage))
+            if run_manager:
+                run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        self.calls += 1
+        tokens = self._tokens(messages)
+        await asyncio.sleep(self.first_token_ms / 1000)
+        for i, token in enumerate(tokens):
+            if i:
+                await asyncio.sleep(self.per_token_ms / 1000)
+            # Usage is reported once, on the last chunk, like the real providers
+            usage = self._usage(messages, tokens) if i == len(tokens) - 1 else None
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token, usage_metadata=usage))
+            if run_manager:
+                await run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
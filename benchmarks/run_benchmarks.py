@@ -0,0 +1,281 @@
+"""
+Reproducible end-to-end benchmarks, fully offline.
+
+Serves a synthetic repo (synthetic_repo.py) from a local fake GitHub
+(fake_github.py) with fixed latency, and runs each scenario in a fresh
+process (scenario.py) against it with a deterministic fake LLM
+(fake_llm.py). Results are written as JSON, keyed by the current commit,
+so runs on two commits can be compared:
+
+    python -m benchmarks.run_benchmarks --out before.json
+    git checkout <other commit>
+    python -m benchmarks.run_benchmarks --out after.json --compare before.json
+
+Scenarios:
+    index_cold        HTTP ingestion, every cache off
+    index_archive     tarball ingestion, every cache off
+    index_warm        blob / parse / LLM caches warmed by a previous run
+    snapshot_restore  index snapshot written by a previous run
+    qa                cold index, then a fixed set of questions
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.fake_github import FakeGitHub, start_server
+from benchmarks.synthetic_repo import generate_repo
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPO_URL = "https://github.com/bench/synthetic"
+
+_CACHES_OFF = {"CACHE_ENABLED": "0", "LLM_CACHE_ENABLED": "0", "SNAPSHOT_ENABLED": "0"}
+
+# name -> (environment, warm-up runs before the measured ones, asks questions)
+SCENARIOS = {
+    "index_cold": ({**_CACHES_OFF, "INGEST_MODE": "http"}, 0, False),
+    "index_archive": ({**_CACHES_OFF, "INGEST_MODE": "archive"}, 0, False),
+    "index_warm": ({"CACHE_ENABLED": "1", "LLM_CACHE_ENABLED": "1", "SNAPSHOT_ENABLED": "0", "INGEST_MODE": "http"}, 1, False),
+    "snapshot_restore": ({"CACHE_ENABLED": "1", "LLM_CACHE_ENABLED": "0", "SNAPSHOT_ENABLED": "1", "INGEST_MODE": "http"}, 1, False),
+    "qa": ({**_CACHES_OFF, "INGEST_MODE": "http"}, 0, True),
+}
+
+
+def benchmark_questions(repo) -> list:
+    """
+    Fixed questions touching every QA path: overview, a file, a directory
+    (answered from directory digests) and a function (resolved through the
+    symbol index) of the generated repo. "intent" is the intent each one
+    must be classified as; run_benchmarks checks it.
+    """
+    py_files = sorted(p for p in repo if p.endswith(".py") and "/" in p)
+    path = py_files[0]
+    directory = path.rsplit("/", 1)[0]
+    # A function the file imports from another module and calls
+    function = next(
+        line.split(" import ")[1].split(",")[0].strip()
+        for line in repo[path].decode().splitlines()
+        if line.startswith("from ") and line.endswith("_main")
+    )
+    return [
+        {"id": "overview", "question": "What does this repository do?", "intent": "high_level_summary"},
+        {"id": "file", "question": f"Explain the file {path}", "intent": "high_level_summary"},
+        {"id": "directory", "question": f"What is inside the {directory}/ directory?", "intent": "directory_question"},
+        {"id": "symbol", "question": f"Where is the function {function}() used?", "intent": "function_usage"},
+    ]
+
+
+def check_intents(run: dict, questions: list):
+    """Fails the benchmark when a question was not routed to the path it measures."""
+    expected = {q["id"]: q["intent"] for q in questions}
+    wrong = [(a["id"], a["intent"]) for a in run.get("qa") or [] if a["intent"] != expected[a["id"]]]
+    if wrong:
+        raise RuntimeError("questions classified with unexpected intents: " + ", ".join(
+            f"{qid} -> {intent} (expected {expected[qid]})" for qid, intent in wrong
+        ))
+
+
+def git_commit() -> dict:
+    def git(*args):
+        try:
+            return subprocess.run(["git", *args], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return ""
+    return {"sha": git("rev-parse", "HEAD"), "dirty": bool(git("status", "--porcelain", "--untracked-files=no"))}
+
+
+async def _run_once(args, env: dict, questions_path) -> dict:
+    fd, result_path = tempfile.mkstemp(suffix=".json")
+    os.close(fd)
+    command = [
+        sys.executable, "-m", "benchmarks.scenario",
+        "--url", REPO_URL, "--result", result_path,
+        "--llm-first-token-ms", str(args.llm_first_token_ms),
+        "--llm-per-token-ms", str(args.llm_per_token_ms),
+        "--llm-tokens", str(args.llm_tokens),
+    ]
+    if questions_path:
+        command += ["--questions", questions_path]
+
+    start = time.perf_counter()
+    process = await asyncio.create_subprocess_exec(
+        *command, cwd=ROOT, env=env,
+        stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT,
+    )
+    output, _ = await process.communicate()
+    process_s = round(time.perf_counter() - start, 4)
+    try:
+        if process.returncode != 0:
+            raise RuntimeError(f"scenario exited with {process.returncode}:\n{output.decode()[-2000:]}")
+        with open(result_path, encoding="utf-8") as f:
+            result = json.load(f)
+    finally:
+        os.remove(result_path)
+    result["process_s"] = process_s
+    return result
+
+
+def _median(values):
+    values = [v for v in values if v is not None]
+    return round(statistics.median(values), 4) if values else None
+
+
+def summarize_runs(runs: list) -> dict:
+    """Medians over the measured runs of one scenario."""
+    nodes = sorted({node for run in runs for node in run["index"]["nodes"]})
+    summary = {
+        "process_s": _median([r["process_s"] for r in runs]),
+        "index_wall_s": _median([r["index"]["wall_s"] for r in runs]),
+        "index_cpu_s": _median([r["index"]["cpu_s"] for r in runs]),
+        "index_nodes_s": {
+            node: _median([r["index"]["nodes"].get(node, {}).get("wall_s") for r in runs]) for node in nodes
+        },
+        "http_requests": _median([r["http"]["total_requests"] for r in runs]),
+        "http_bytes": _median([r["http"]["total_bytes"] for r in runs]),
+        "llm_calls": _median([r["llm_calls"] for r in runs]),
+    }
+    if runs[0].get("qa"):
+        ids = [answer["id"] for answer in runs[0]["qa"]]
+        summary["qa"] = {
+            qid: {
+                "intent": next(a["intent"] for a in runs[0]["qa"] if a["id"] == qid),
+                "wall_s": _median([a["wall_s"] for r in runs for a in r["qa"] if a["id"] == qid]),
+                "ttft_s": _median([a["ttft_s"] for r in runs for a in r["qa"] if a["id"] == qid]),
+            }
+            for qid in ids
+        }
+    return summary
+
+
+async def run_benchmarks(args) -> dict:
+    repo = generate_repo(args.files, args.depth, seed=args.seed)
+    server = FakeGitHub(
+        repo, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, seed=args.seed,
+        rate_limit=args.rate_limit, rate_window_s=args.rate_window_s, error_rate=args.error_rate,
+    )
+    runner, base_url = await start_server(server)
+
+    names = args.scenarios.split(",") if args.scenarios else list(SCENARIOS)
+    results = {}
+    try:
+        with tempfile.TemporaryDirectory(prefix="bench-") as workdir:
+            questions = benchmark_questions(repo)
+            questions_path = os.path.join(workdir, "questions.jsonl")
+            with open(questions_path, "w", encoding="utf-8") as f:
+                f.writelines(json.dumps(q) + "\n" for q in questions)
+
+            for name in names:
+                scenario_env, warmups, asks = SCENARIOS[name]
+                env = {
+                    **os.environ,
+                    "PYTHONPATH": ROOT,
+                    "GOOGLE_API_KEY": os.environ.get("GOOGLE_API_KEY", "benchmark"),
+                    "GITHUB_TOKEN": "",
+                    "GITHUB_API_BASE": f"{base_url}/repos/",
+                    "GITHUB_API_RAW": f"{base_url}/raw/",
+                    "CACHE_DIR": os.path.join(workdir, name),
+                    "STREAM_ANSWERS": "1",
+                    **scenario_env,
+                }
+                env.pop("ARCHIVE_PATH", None)
+
+                runs = []
+                for i in range(warmups + args.repeat):
+                    server.reset_stats()
+                    run = await _run_once(args, env, questions_path if asks else None)
+                    run["http"] = server.stats()
+                    check_intents(run, questions)
+                    if i >= warmups:
+                        runs.append(run)
+                results[name] = {"summary": summarize_runs(runs), "runs": runs}
+                summary = results[name]["summary"]
+                print(f"{name:18} index {summary['index_wall_s']:.3f}s  process {summary['process_s']:.3f}s  "
+                      f"http {summary['http_requests']:.0f} req  llm {summary['llm_calls']:.0f} calls")
+    finally:
+        await runner.cleanup()
+
+    return {
+        "commit": git_commit(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": {
+            key: getattr(args, key) for key in (
+                "files", "depth", "seed", "latency_ms", "jitter_ms", "rate_limit", "rate_window_s", "error_rate",
+                "llm_first_token_ms", "llm_per_token_ms", "llm_tokens", "repeat",
+            )
+        },
+        "scenarios": results,
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> bool:
+    """
+    Prints the change of every scenario's medians against a baseline run.
+    Returns True when some timing got slower by more than threshold (0.1 = 10%).
+    """
+    if current["params"] != baseline["params"]:
+        print("Warning: benchmark parameters differ from the baseline.")
+    print(f"\nAgainst {baseline['commit'].get('sha', '?')[:12]}:")
+    regressed = False
+    for name, result in current["scenarios"].items():
+        before = baseline["scenarios"].get(name)
+        if before is None:
+            continue
+        now, then = result["summary"], before["summary"]
+        pairs = [("index", now["index_wall_s"], then["index_wall_s"]),
+                 ("process", now["process_s"], then["process_s"])]
+        pairs += [(f"  {node}", seconds, then["index_nodes_s"].get(node))
+                  for node, seconds in now["index_nodes_s"].items()]
+        pairs += [(f"  qa {qid}", q["wall_s"], then.get("qa", {}).get(qid, {}).get("wall_s"))
+                  for qid, q in now.get("qa", {}).items()]
+        print(f"{name}:")
+        for label, seconds, old in pairs:
+            if not old or seconds is None:
+                continue
+            change = (seconds - old) / old
+            flag = "  <-- slower" if change > threshold and seconds - old > 0.005 else ""
+            regressed = regressed or bool(flag)
+            print(f"  {label:24} {old:8.3f}s -> {seconds:8.3f}s  {change:+7.1%}{flag}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the offline benchmark scenarios.")
+    parser.add_argument("--files", type=int, default=300, help="files in the synthetic repo")
+    parser.add_argument("--depth", type=int, default=3, help="directory depth of the synthetic repo")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="fake GitHub latency per request")
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=int, default=None, help="fake GitHub API requests per window")
+    parser.add_argument("--rate-window-s", type=float, default=60.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of fake GitHub requests answered 502")
+    parser.add_argument("--llm-first-token-ms", type=float, default=300.0)
+    parser.add_argument("--llm-per-token-ms", type=float, default=10.0)
+    parser.add_argument("--llm-tokens", type=int, default=120, help="output tokens per fake LLM reply")
+    parser.add_argument("--repeat", type=int, default=3, help="measured runs per scenario")
+    parser.add_argument("--scenarios", help=f"comma-separated subset of {','.join(SCENARIOS)}")
+    parser.add_argument("--out", default="benchmark-results.json")
+    parser.add_argument("--compare", help="earlier results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.1, help="slowdown reported as a regression")
+    args = parser.parse_args()
+
+    results = asyncio.run(run_benchmarks(args))
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {args.out}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.threshold):
+            raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+One benchmark run, executed in a fresh process by run_benchmarks.py so that
+settings, caches and imports start from the environment it sets.
+
+Indexes the repo with load_repo (optionally asks questions with qa) using
+the deterministic FakeChatModel, and writes timings as JSON to --result:
+wall and CPU time of the index run and of every question, per-node wall
+time, and LLM call counts.
+"""
+import argparse
+import asyncio
+import json
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.tracers.context import register_configure_hook
+
+from benchmarks.fake_llm import FakeChatModel
+
+
+class NodeTimer(BaseCallbackHandler):
+    """
+    Records the start offset and wall time of every graph node run.
+    Node runs are the chain runs LangGraph tags with "graph:step:N".
+    """
+
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.running = {}
+        self.spans = []
+
+    def on_chain_start(self, serialized, inputs, *, run_id, tags=None, metadata=None, **kwargs):
+        node = (metadata or {}).get("langgraph_node")
+        if node and kwargs.get("name") == node and any(t.startswith("graph:step:") for t in tags or ()):
+            self.running[run_id] = (node, time.perf_counter())
+
+    def _finish(self, run_id, error: bool = False):
+        started = self.running.pop(run_id, None)
+        if started is not None:
+            node, start = started
+            self.spans.append({
+                "node": node,
+                "start_s": round(start - self.origin, 4),
+                "wall_s": round(time.perf_counter() - start, 4),
+                **({"error": True} if error else {}),
+            })
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._finish(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._finish(run_id, error=True)
+
+    def take(self) -> dict:
+        """Per-node totals since the last take(), plus the raw spans."""
+        nodes = {}
+        for span in self.spans:
+            total = nodes.setdefault(span["node"], {"calls": 0, "wall_s": 0.0})
+            total["calls"] += 1
+            total["wall_s"] = round(total["wall_s"] + span["wall_s"], 4)
+        spans, self.spans = self.spans, []
+        return {"nodes": nodes, "spans": spans}
+
+
+_timer: ContextVar[Optional[NodeTimer]] = ContextVar("benchmark_node_timer", default=None)
+# Injects the timer into every callback manager configured in its context,
+# so load_repo / qa run unchanged
+register_configure_hook(_timer, inheritable=True)
+
+
+async def _measure(coro):
+    wall, cpu = time.perf_counter(), time.process_time()
+    result = await coro
+    return result, round(time.perf_counter() - wall, 4), round(time.process_time() - cpu, 4)
+
+
+async def run(args) -> dict:
+    # Imported here so the environment set by run_benchmarks.py is in place
+    from run_cli import load_repo, qa
+    from run_bulk_qa import read_questions
+    from src.config import settings
+    from src.utils.http_client import close_session
+    from src.utils.parse_pool import shutdown_pool
+
+    fake = FakeChatModel(
+        first_token_ms=args.llm_first_token_ms,
+        per_token_ms=args.llm_per_token_ms,
+        output_tokens=args.llm_tokens,
+    )
+    # Wrapped the way llm_provider.get_llm() wraps the real model
+    llm = fake
+    if settings.LLM_SCHEDULER_ENABLED:
+        from src.utils.llm_scheduler import ScheduledLLM
+        llm = ScheduledLLM(
+            llm,
+            max_concurrency=settings.LLM_MAX_CONCURRENCY,
+            requests_per_minute=settings.LLM_REQUESTS_PER_MINUTE,
+            tokens_per_minute=settings.LLM_TOKENS_PER_MINUTE,
+            output_tokens=settings.LLM_OUTPUT_TOKENS_ESTIMATE,
+        )
+    if settings.LLM_CACHE_ENABLED:
+        from src.utils.llm_cache import CachedLLM
+        llm = CachedLLM(llm, ttl_seconds=settings.LLM_CACHE_TTL_HOURS * 3600, skip_nodes=settings.LLM_CACHE_SKIP_NODES)
+
+    timer = NodeTimer()
+    _timer.set(timer)
+    result = {}
+    try:
+        state, wall, cpu = await _measure(load_repo(args.url, llm=llm))
+        result["index"] = {"wall_s": wall, "cpu_s": cpu, **timer.take(),
+                           "files": len(state.get("parsed_files") or [])}
+
+        answers = []
+        for item in read_questions(args.questions) if args.questions else []:
+            first = []
+            start = time.perf_counter()
+
+            def on_token(text):
+                if not first:
+                    first.append(time.perf_counter() - start)
+
+            answered, wall, cpu = await _measure(qa(state, item["question"], on_token=on_token))
+            answers.append({
+                "id": item["id"],
+                "intent": answered.get("intent"),
+                "wall_s": wall,
+                "cpu_s": cpu,
+                "ttft_s": round(first[0], 4) if first else None,
+                **timer.take(),
+            })
+        if answers:
+            result["qa"] = answers
+    finally:
+        await close_session()
+        shutdown_pool()
+
+    result["llm_calls"] = fake.calls
+    if hasattr(llm, "stats"):
+        result["llm_cache"] = llm.stats()
+    if hasattr(llm, "schedule_stats"):
+        result["llm_scheduler"] = llm.schedule_stats()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run one benchmark scenario (see run_benchmarks.py).")
+    parser.add_argument("--url", required=True)
+    parser.add_argument("--result", required=True, help="JSON file the timings are written to")
+    parser.add_argument("--questions", help="JSONL file of questions to ask after indexing")
+    parser.add_argument("--llm-first-token-ms", type=float, default=300.0)
+    parser.add_argument("--llm-per-token-ms", type=float, default=10.0)
+    parser.add_argument("--llm-tokens", type=int, default=120)
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args))
+    with open(args.result, "w", encoding="utf-8") as f:
+        json.dump(result, f)
+
+if __name__ == "__main__":
+    main()
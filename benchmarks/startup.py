@@ -0,0 +1,137 @@
+"""
+Startup benchmark, fully offline.
+
+Measures how long a fresh process takes before it is useful:
+
+    help              python run_cli.py --help
+    snapshot_prompt   python run_cli.py <url> with an index snapshot on disk,
+                      until the first question prompt is printed
+    eager_import      importing and building everything up front (both
+                      graphs, every node and parser, the chat model), which
+                      is what run_cli.py used to do before printing anything
+
+The snapshot is written by one benchmarks.scenario run against the fake
+GitHub server first. Results (medians of --repeat runs) are written as JSON:
+
+    python -m benchmarks.startup --out startup.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from benchmarks.fake_github import FakeGitHub, start_server
+from benchmarks.run_benchmarks import REPO_URL, ROOT, git_commit
+from benchmarks.synthetic_repo import generate_repo
+
+PROMPT = b"You("
+
+EAGER_IMPORT = (
+    "import langgraph_app\n"
+    "from src.utils.llm_provider import get_llm\n"
+    "langgraph_app.get_index_app()\n"
+    "langgraph_app.get_qa_app()\n"
+    "get_llm()\n"
+)
+
+
+async def _timed(command, env, stdin: bytes = b"", until: bytes = None) -> float:
+    """
+    Wall time of command; with until, the time until that text appears on
+    its output (the process is then sent stdin and left to exit).
+    """
+    start = time.perf_counter()
+    process = await asyncio.create_subprocess_exec(
+        *command, cwd=ROOT, env=env,
+        stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT,
+    )
+    output = b""
+    elapsed = None
+    if until is not None:
+        while until not in output:
+            chunk = await process.stdout.read(4096)
+            if not chunk:
+                break
+            output += chunk
+        elapsed = time.perf_counter() - start
+    rest, _ = await process.communicate(stdin)
+    output += rest
+    if process.returncode != 0 or (until is not None and until not in output):
+        raise RuntimeError(f"{' '.join(command[1:])} exited with {process.returncode}:\n{output.decode()[-2000:]}")
+    return round(elapsed if elapsed is not None else time.perf_counter() - start, 4)
+
+
+async def run_startup(args) -> dict:
+    repo = generate_repo(args.files, args.depth, seed=args.seed)
+    server = FakeGitHub(repo, latency_ms=args.latency_ms, seed=args.seed)
+    runner, base_url = await start_server(server)
+
+    try:
+        with tempfile.TemporaryDirectory(prefix="bench-startup-") as workdir:
+            env = {
+                **os.environ,
+                "PYTHONPATH": ROOT,
+                "PYTHONUNBUFFERED": "1",
+                "GOOGLE_API_KEY": os.environ.get("GOOGLE_API_KEY", "benchmark"),
+                "GITHUB_TOKEN": "",
+                "GITHUB_API_BASE": f"{base_url}/repos/",
+                "GITHUB_API_RAW": f"{base_url}/raw/",
+                "CACHE_DIR": workdir,
+                "CACHE_ENABLED": "1",
+                "LLM_CACHE_ENABLED": "0",
+                "SNAPSHOT_ENABLED": "1",
+                "INSTRUMENT": "0",
+            }
+
+            # One indexing run leaves the snapshot the CLI restores
+            await _timed([sys.executable, "-m", "benchmarks.scenario", "--url", REPO_URL,
+                          "--result", os.path.join(workdir, "warm.json")], env)
+
+            commands = {
+                "help": ([sys.executable, "run_cli.py", "--help"], {}),
+                "snapshot_prompt": ([sys.executable, "run_cli.py", REPO_URL], {"stdin": b"exit\n", "until": PROMPT}),
+                "eager_import": ([sys.executable, "-c", EAGER_IMPORT], {}),
+            }
+            runs = {name: [] for name in commands}
+            for _ in range(args.repeat):
+                for name, (command, options) in commands.items():
+                    runs[name].append(await _timed(command, env, **options))
+    finally:
+        await runner.cleanup()
+
+    summary = {name: round(statistics.median(values), 4) for name, values in runs.items()}
+    eager = summary["eager_import"]
+    return {
+        "commit": git_commit(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "params": {key: getattr(args, key) for key in ("files", "depth", "seed", "latency_ms", "repeat")},
+        "summary": summary,
+        "of_eager_import": {name: round(summary[name] / eager, 3) for name in ("help", "snapshot_prompt")},
+        "runs": runs,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure CLI startup time.")
+    parser.add_argument("--files", type=int, default=300, help="files in the synthetic repo")
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="fake GitHub latency per request")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--out", default="startup-results.json")
+    args = parser.parse_args()
+
+    results = asyncio.run(run_startup(args))
+    for name, seconds in results["summary"].items():
+        share = results["of_eager_import"].get(name)
+        print(f"{name:16} {seconds:.3f}s" + (f"  ({share:.0%} of eager_import)" if share is not None else ""))
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {args.out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+Deterministic synthetic repositories for benchmarks.
+
+generate_repo() returns {path: bytes} for a repo with a given file count,
+directory depth, size mix and language mix. The same parameters and seed
+always give byte-identical content. Python files define classes and
+functions that import and call each other, so the symbol index, BM25
+selection and parsers all have realistic work to do.
+"""
+import hashlib
+import json
+import random
+from typing import Dict, Optional
+
+# Share of files per extension
+DEFAULT_LANGUAGE_MIX = {".py": 0.6, ".md": 0.1, ".json": 0.1, ".yaml": 0.08, ".txt": 0.07, ".ipynb": 0.05}
+
+# (share, approximate size in bytes) per size class
+DEFAULT_SIZE_MIX = {"small": (0.7, 2_000), "medium": (0.25, 20_000), "large": (0.05, 200_000)}
+
+_WORDS = (
+    "model data loader config train eval metric cache index query parse token graph node "
+    "state session request response client server batch stream buffer schema record event"
+).split()
+
+
+def _pick(rng: random.Random, weights: Dict[str, float]) -> str:
+    keys = list(weights)
+    return rng.choices(keys, weights=[weights[k] for k in keys])[0]
+
+
+def _name(rng: random.Random, parts: int = 2) -> str:
+    return "_".join(rng.choice(_WORDS) for _ in range(parts))
+
+
+def _python(rng: random.Random, size: int, module: str, others) -> str:
+    lines = ['"""', f"{module}: synthetic module.", '"""', "import os", "import json"]
+    imported = rng.sample(others, min(3, len(others)))
+    for other in imported:
+        lines.append(f"from {other} import {other.rsplit('.', 1)[-1]}_main")
+    lines.append("")
+    n = 0
+    while sum(map(len, lines)) + len(lines) < size:
+        n += 1
+        cls = f"{_name(rng).title().replace('_', '')}{n}"
+        lines += [f"class {cls}:", f'    """{cls} handles {_name(rng, 3)}."""', ""]
+        for m in range(3):
+            fn = f"{_name(rng)}_{n}_{m}"
+            call = f"{rng.choice(imported).rsplit('.', 1)[-1]}_main()" if imported else "None"
+            lines += [
+                f"    def {fn}(self, value):",
+                f'        """Computes {_name(rng, 4)}."""',
+                f"        result = {call}",
+                "        return json.dumps({'value': value, 'result': str(result)})",
+                "",
+            ]
+    lines += [f"def {module.rsplit('.', 1)[-1]}_main():", f"    return os.environ.get('{module.upper().replace('.', '_')}')", ""]
+    return "\n".join(lines)
+
+
+def _markdown(rng: random.Random, size: int) -> str:
+    lines = [f"# {_name(rng, 3).replace('_', ' ').title()}", ""]
+    written = 0
+    while written < size:
+        section = [f"## {_name(rng, 2).replace('_', ' ')}", " ".join(rng.choice(_WORDS) for _ in range(60)), ""]
+        lines += section
+        written += sum(len(line) + 1 for line in section)
+    return "\n".join(lines)
+
+
+def _json(rng: random.Random, size: int) -> str:
+    data, written = {}, 0
+    while written < size:
+        key = f"{_name(rng)}_{len(data)}"
+        data[key] = {"version": f"{rng.randint(0, 9)}.{rng.randint(0, 99)}", "deps": rng.sample(_WORDS, 4)}
+        written += len(key) + len(json.dumps(data[key])) + 4
+    return json.dumps(data, indent=2)
+
+
+def _yaml(rng: random.Random, size: int) -> str:
+    lines, written = [], 0
+    while written < size:
+        entry = [f"{_name(rng)}_{len(lines)}:", f"  enabled: {rng.choice(['true', 'false'])}", f"  value: {rng.randint(0, 1000)}"]
+        lines += entry
+        written += sum(len(line) + 1 for line in entry)
+    return "\n".join(lines) + "\n"
+
+
+def _notebook(rng: random.Random, size: int) -> str:
+    cells, written = [], 0
+    while written < size:
+        pair = [
+            {"cell_type": "markdown", "metadata": {}, "source": [f"## {_name(rng, 3)}\n"]},
+            {
+                "cell_type": "code", "metadata": {}, "execution_count": None, "outputs": [],
+                "source": [f"{_name(rng)} = {rng.randint(0, 99)}\n", f"print({_name(rng)})\n"],
+            },
+        ]
+        cells += pair
+        written += len(json.dumps(pair)) + 40  # + indentation
+    return json.dumps({"cells": cells, "metadata": {}, "nbformat": 4, "nbformat_minor": 5}, indent=1)
+
+
+def generate_repo(
+    files: int = 200,
+    depth: int = 3,
+    size_mix: Optional[Dict[str, tuple]] = None,
+    language_mix: Optional[Dict[str, float]] = None,
+    seed: int = 0,
+) -> Dict[str, bytes]:
+    """
+    {path: content} for a synthetic repo. depth is the deepest directory
+    level; files are spread over a fixed set of directories.
+    """
+    rng = random.Random(seed)
+    size_mix = size_mix or DEFAULT_SIZE_MIX
+    language_mix = language_mix or DEFAULT_LANGUAGE_MIX
+
+    directories = [""]
+    for level in range(1, depth + 1):
+        parents = [d for d in directories if d.count("/") == level - 1]
+        for parent in parents[:4]:
+            for _ in range(rng.randint(2, 3)):
+                directories.append(f"{parent}{_name(rng, 1)}{len(directories)}/")
+
+    size_weights = {label: share for label, (share, _) in size_mix.items()}
+    layout = []
+    for i in range(files):
+        ext = _pick(rng, language_mix)
+        size = int(size_mix[_pick(rng, size_weights)][1] * rng.uniform(0.5, 1.5))
+        layout.append((rng.choice(directories), f"{_name(rng)}_{i}", ext, size))
+
+    modules = [
+        (d + name).replace("/", ".") for d, name, ext, _ in layout if ext == ".py"
+    ]
+    repo = {
+        "README.md": _markdown(rng, 3_000).encode(),
+        "setup.py": "from setuptools import setup\n\nsetup(name='synthetic')\n".encode(),
+        "requirements.txt": "numpy\nrequests\n".encode(),
+    }
+    for d, name, ext, size in layout:
+        path = f"{d}{name}{ext}"
+        if ext == ".py":
+            module = (d + name).replace("/", ".")
+            text = _python(rng, size, module, [m for m in modules if m != module])
+        elif ext in (".md", ".txt"):
+            text = _markdown(rng, size)
+        elif ext == ".json":
+            text = _json(rng, size)
+        elif ext == ".yaml":
+            text = _yaml(rng, size)
+        else:
+            text = _notebook(rng, size)
+        repo[path] = text.encode()
+    return repo
+
+
+def blob_sha(content: bytes) -> str:
+    """Git blob SHA-1 of a file's content."""
+    return hashlib.sha1(b"blob %d\0" % len(content) + content).hexdigest()
+
+
+def commit_sha(repo: Dict[str, bytes]) -> str:
+    """Stable stand-in commit id for a generated repo."""
+    digest = hashlib.sha1()
+    for path in sorted(repo):
+        digest.update(path.encode() + b"\0" + blob_sha(repo[path]).encode())
+    return digest.hexdigest()
@@ -1,45 +1,121 @@
-from src.nodes.fetch_repo_metadata_node import fetch_repo_metadata_node
-from src.nodes.global_context_node import global_context_node
-from src.nodes.analyze_repo_node import analyze_tree_node
-from src.nodes.fetch_and_parse_node import fetch_and_parse_node
-from src.nodes.summarize_repo_node import summarize_repo_node
-from src.nodes.query_analyser_node import query_analyser_node
-
-from langgraph.graph import StateGraph, END
-from state_schema import Agent_State
-
-indexing_workflow = StateGraph(Agent_State)
-qa_workflow = StateGraph(Agent_State)
-
-indexing_workflow.add_node("fetch_metadata", fetch_repo_metadata_node)
-indexing_workflow.add_node("global_context", global_context_node)
-indexing_workflow.add_node("analyze_tree", analyze_tree_node)
-indexing_workflow.add_node("fetch_and_parse", fetch_and_parse_node)
-indexing_workflow.add_node("summarize", summarize_repo_node)
-indexing_workflow.add_node("query_analyser", query_analyser_node)
-
-indexing_workflow.add_edge("fetch_metadata", "query_analyser")
-indexing_workflow.add_edge("query_analyser", "global_context")
-indexing_workflow.add_edge("global_context", "analyze_tree")
-indexing_workflow.add_edge("analyze_tree", "fetch_and_parse")
-indexing_workflow.add_edge("fetch_and_parse", "summarize")
-indexing_workflow.add_edge("summarize", END)
-
-indexing_workflow.set_entry_point("fetch_metadata")
-
-index_app = indexing_workflow.compile()
-
-qa_workflow.add_node("query_analyzer", query_analyser_node)
-qa_workflow.add_node("analyze_tree", analyze_tree_node)
-qa_workflow.add_node("fetch_and_parse", fetch_and_parse_node)
-qa_workflow.add_node("summarize", summarize_repo_node)
-
-qa_workflow.set_entry_point("query_analyzer")
-qa_workflow.add_edge("query_analyzer", "analyze_tree")
-qa_workflow.add_edge("analyze_tree", "fetch_and_parse")
-qa_workflow.add_edge("fetch_and_parse", "summarize")
-qa_workflow.add_edge("summarize", END)
-
-qa_app = qa_workflow.compile()
-
-__all__ = ["index_app", "qa_app"]
+"""
+The index and QA graphs.
+
+Both are built and compiled on first use (get_index_app / get_qa_app):
+the node modules, LangGraph and the parsers they pull in are imported
+then, not when this module is imported. `from langgraph_app import
+index_app` still works and compiles the graph at that point.
+"""
+import threading
+
+from src.utils.instrumentation import instrument_node
+
+_apps = {}
+_lock = threading.Lock()
+
+
+def _build_selection_graph():
+    from langgraph.graph import StateGraph, END
+    from state_schema import Agent_State, Selection_Input, Selection_Output
+    from src.nodes.analyze_repo_node import analyze_tree_node
+    from src.nodes.fetch_and_parse_node import fetch_and_parse_node
+    from src.nodes.query_analyser_node import query_analyser_node
+    from src.nodes.symbol_index_node import symbol_index_node
+
+    selection_workflow = StateGraph(Agent_State, input_schema=Selection_Input, output_schema=Selection_Output)
+
+    selection_workflow.add_node("symbol_index", instrument_node("index", "symbol_index", symbol_index_node))
+    selection_workflow.add_node("query_analyser", instrument_node("index", "query_analyser", query_analyser_node))
+    selection_workflow.add_node("analyze_tree", instrument_node("index", "analyze_tree", analyze_tree_node))
+    selection_workflow.add_node("fetch_and_parse", instrument_node("index", "fetch_and_parse", fetch_and_parse_node))
+
+    selection_workflow.set_entry_point("symbol_index")
+    selection_workflow.add_edge("symbol_index", "query_analyser")
+    selection_workflow.add_edge("query_analyser", "analyze_tree")
+    selection_workflow.add_edge("analyze_tree", "fetch_and_parse")
+    selection_workflow.add_edge("fetch_and_parse", END)
+
+    return selection_workflow.compile()
+
+
+def _build_index_app():
+    from langgraph.graph import StateGraph, END
+    from state_schema import Agent_State
+    from src.nodes.fetch_repo_metadata_node import fetch_repo_metadata_node
+    from src.nodes.global_context_node import global_context_node
+    from src.nodes.summarize_repo_node import summarize_repo_node
+
+    indexing_workflow = StateGraph(Agent_State)
+
+    indexing_workflow.add_node("fetch_metadata", instrument_node("index", "fetch_metadata", fetch_repo_metadata_node))
+    indexing_workflow.add_node("global_context", instrument_node("index", "global_context", global_context_node))
+    indexing_workflow.add_node("select", _build_selection_graph())
+    indexing_workflow.add_node("summarize", instrument_node("index", "summarize", summarize_repo_node))
+
+    # LangGraph runs nodes in lock-step supersteps, so parallel edges only
+    # overlap one node at a time. The selection chain is therefore one
+    # subgraph node: it runs in the same step as global_context, which only
+    # needs the tree, and summarize waits for both. Their outputs are
+    # disjoint (see Selection_Output).
+    indexing_workflow.add_edge("fetch_metadata", "global_context")
+    indexing_workflow.add_edge("fetch_metadata", "select")
+    indexing_workflow.add_edge(["global_context", "select"], "summarize")
+    indexing_workflow.add_edge("summarize", END)
+
+    indexing_workflow.set_entry_point("fetch_metadata")
+
+    return indexing_workflow.compile()
+
+
+def _build_qa_app():
+    from langgraph.graph import StateGraph, END
+    from state_schema import Agent_State
+    from src.nodes.analyze_repo_node import analyze_tree_node
+    from src.nodes.fetch_and_parse_node import fetch_and_parse_node
+    from src.nodes.summarize_repo_node import summarize_repo_node
+    from src.nodes.query_analyser_node import query_analyser_node
+
+    qa_workflow = StateGraph(Agent_State)
+
+    qa_workflow.add_node("query_analyzer", instrument_node("qa", "query_analyzer", query_analyser_node))
+    qa_workflow.add_node("analyze_tree", instrument_node("qa", "analyze_tree", analyze_tree_node))
+    qa_workflow.add_node("fetch_and_parse", instrument_node("qa", "fetch_and_parse", fetch_and_parse_node))
+    qa_workflow.add_node("summarize", instrument_node("qa", "summarize", summarize_repo_node))
+
+    qa_workflow.set_entry_point("query_analyzer")
+    qa_workflow.add_edge("query_analyzer", "analyze_tree")
+    qa_workflow.add_edge("analyze_tree", "fetch_and_parse")
+    qa_workflow.add_edge("fetch_and_parse", "summarize")
+    qa_workflow.add_edge("summarize", END)
+
+    return qa_workflow.compile()
+
+
+def _get_app(name: str, build):
+    app = _apps.get(name)
+    if app is None:
+        # A warm-up thread may be compiling the same graph
+        with _lock:
+            app = _apps.get(name)
+            if app is None:
+                app = _apps[name] = build()
+    return app
+
+
+def get_index_app():
+    return _get_app("index", _build_index_app)
+
+
+def get_qa_app():
+    return _get_app("qa", _build_qa_app)
+
+
+def __getattr__(name):
+    if name == "index_app":
+        return get_index_app()
+    if name == "qa_app":
+        return get_qa_app()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+__all__ = ["index_app", "qa_app", "get_index_app", "get_qa_app"]
@@ -0,0 +1,119 @@
+# run_batch.py
+#export PYTHONPATH=$PYTHONPATH:$(pwd)
+"""
+Batch indexing: runs the indexing workflow for many repositories in one
+event loop, e.g. for a nightly job.
+
+    python run_batch.py repos.txt --out results.jsonl --repos 8 --http 32 --llm 4 --timeout 900
+
+repos.txt holds one GitHub URL per line (blank lines and # comments are
+skipped, "-" reads stdin). Every repo gets its own timeout and failures
+never stop the batch. Snapshots are written as usual (SNAPSHOT_ENABLED)
+and one JSONL result line is appended per repo as soon as it finishes.
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+
+from run_cli import load_repo
+from src.config.settings import SNAPSHOT_ENABLED
+from src.utils.file_catalog import get_catalog
+from src.utils.http_client import close_session, set_concurrency
+from src.utils.llm_limits import LimitedLLM
+from src.utils.llm_provider import get_llm
+from src.utils.parse_pool import shutdown_pool
+from src.utils.snapshot import snapshot_path
+
+
+def read_urls(source: str):
+    lines = sys.stdin if source == "-" else open(source, encoding="utf-8")
+    with lines:
+        urls = [line.strip() for line in lines]
+    # Keep order, drop duplicates
+    return list(dict.fromkeys(u for u in urls if u and not u.startswith("#")))
+
+
+async def index_one(url: str, llm, timeout: float) -> dict:
+    """
+    Indexes one repo and returns its JSONL result record. Never raises.
+    """
+    start = time.perf_counter()
+    result = {"url": url, "status": "ok"}
+    try:
+        state = await asyncio.wait_for(load_repo(url, llm=llm), timeout)
+        catalog = get_catalog(state)
+        result.update({
+            "commit_sha": state.get("commit_sha"),
+            "files": len(catalog) if catalog is not None else 0,
+            "parsed_files": len(state.get("parsed_files") or []),
+            "snapshot": snapshot_path(url, state["commit_sha"]) if SNAPSHOT_ENABLED and state.get("commit_sha") else None,
+        })
+        if not state.get("repo_tree"):
+            result["status"] = "error"
+            result["error"] = (state.get("status") or ["empty repository tree"])[-1]
+    except asyncio.TimeoutError:
+        result.update({"status": "timeout", "error": f"timed out after {timeout:g}s"})
+    except Exception as e:
+        result.update({"status": "error", "error": f"{type(e).__name__}: {e}"})
+    result["seconds"] = round(time.perf_counter() - start, 2)
+    return result
+
+
+def report(results, elapsed: float):
+    ok = [r for r in results if r["status"] == "ok"]
+    print(f"\nIndexed {len(ok)}/{len(results)} repositories in {elapsed:.1f}s "
+          f"({len(ok) / max(elapsed, 1e-9) * 3600:.1f} repos/hour).")
+    for status in ("error", "timeout"):
+        count = sum(r["status"] == status for r in results)
+        if count:
+            print(f"  {status}: {count}")
+    print("\nPer-repo timings (slowest first):")
+    for r in sorted(results, key=lambda r: -r["seconds"]):
+        detail = f"{r.get('files', 0)} files, {r.get('parsed_files', 0)} parsed" if r["status"] == "ok" else r["error"]
+        print(f"  {r['seconds']:8.2f}s  {r['status']:<7}  {r['url']}  ({detail})")
+
+
+async def run_batch(urls, out_path: str, repos: int, llm_concurrency: int, timeout: float):
+    llm = LimitedLLM(get_llm(), llm_concurrency)
+    slots = asyncio.Semaphore(repos)
+    results = []
+    start = time.perf_counter()
+
+    with open(out_path, "a", encoding="utf-8") as out:
+        async def worker(url):
+            async with slots:
+                result = await index_one(url, llm, timeout)
+            results.append(result)
+            out.write(json.dumps(result) + "\n")
+            out.flush()
+            print(f"[{len(results)}/{len(urls)}] {result['status']} {url} in {result['seconds']:.1f}s")
+
+        await asyncio.gather(*(worker(url) for url in urls))
+
+    report(results, time.perf_counter() - start)
+    return results
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Index many GitHub repositories in one process.")
+    parser.add_argument("source", help="file with one repo URL per line, or - for stdin")
+    parser.add_argument("--out", default="batch_results.jsonl", help="JSONL file results are appended to")
+    parser.add_argument("--repos", type=int, default=4, help="repositories indexed at the same time")
+    parser.add_argument("--http", type=int, default=None, help="global cap on in-flight HTTP requests")
+    parser.add_argument("--llm", type=int, default=4, help="global cap on concurrent LLM calls")
+    parser.add_argument("--timeout", type=float, default=900, help="per-repository timeout in seconds")
+    args = parser.parse_args()
+
+    if args.http:
+        set_concurrency(args.http)
+    urls = read_urls(args.source)
+    try:
+        await run_batch(urls, args.out, args.repos, args.llm, args.timeout)
+    finally:
+        await close_session()
+        shutdown_pool()
+
+if __name__ == "__main__":
+    asyncio.run(main())
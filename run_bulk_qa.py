@@ -0,0 +1,114 @@
+# run_bulk_qa.py
+#export PYTHONPATH=$PYTHONPATH:$(pwd)
+"""
+Bulk question answering against one indexed repository, e.g. to
+regression-test answers or pre-compute FAQ answers.
+
+    python run_bulk_qa.py <github_repo_url> questions.jsonl --out answers.jsonl --parallel 4
+
+Each input line is a JSON object with a "question" (and optionally an
+"id"). Every question runs qa_app against the same indexed state, and
+what a question parses is indexed in its own search overlay, so answers
+do not depend on the order of the file. File fetches and parses
+are shared across the batch: each file is fetched at most once.
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from run_cli import load_repo, qa
+from src.utils.batch_memo import batch_memo
+from src.utils.http_client import close_session
+from src.utils.parse_pool import shutdown_pool
+
+
+def read_questions(path: str):
+    questions = []
+    with open(path, encoding="utf-8") as f:
+        for n, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            item = json.loads(line)
+            if isinstance(item, str):
+                item = {"question": item}
+            item.setdefault("id", n)
+            questions.append(item)
+    return questions
+
+
+def _usage(state) -> dict:
+    messages = state.get("messages") or []
+    usage = getattr(messages[-1], "usage_metadata", None) if messages else None
+    return {key: (usage or {}).get(key, 0) for key in ("input_tokens", "output_tokens", "total_tokens")}
+
+
+async def answer_one(repo_state, item: dict) -> dict:
+    """
+    Answers one question and returns its JSONL result record. Never raises.
+    """
+    start = time.perf_counter()
+    result = {"id": item["id"], "question": item["question"]}
+    try:
+        state = await qa(repo_state, item["question"])
+        result.update({
+            "answer": state.get("summary") or "",
+            "intent": state.get("intent"),
+            "files_used": state.get("context_files") or [],
+            "files_dropped": state.get("context_dropped") or [],
+            "selected_files": [f["path"] for f in state.get("selected_files") or []],
+            "tokens": _usage(state),
+        })
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["seconds"] = round(time.perf_counter() - start, 2)
+    return result
+
+
+async def run_bulk_qa(repo_state, questions, out_path: str, parallel: int):
+    slots = asyncio.Semaphore(parallel)
+    results = []
+    start = time.perf_counter()
+
+    with batch_memo() as memo, open(out_path, "w", encoding="utf-8") as out:
+        async def worker(item):
+            async with slots:
+                result = await answer_one(repo_state, item)
+            results.append(result)
+            out.write(json.dumps(result) + "\n")
+            out.flush()
+
+        await asyncio.gather(*(worker(item) for item in questions))
+
+    elapsed = time.perf_counter() - start
+    failed = sum("error" in r for r in results)
+    tokens = sum(r.get("tokens", {}).get("total_tokens", 0) for r in results)
+    latencies = sorted(r["seconds"] for r in results)
+    print(f"\nAnswered {len(results) - failed}/{len(results)} questions in {elapsed:.1f}s "
+          f"(parallel={parallel}, {tokens} tokens).")
+    if latencies:
+        print(f"Latency p50 {latencies[len(latencies) // 2]:.2f}s, max {latencies[-1]:.2f}s.")
+    stats = memo.stats()
+    print(f"Shared across questions: {stats['started']} blobs fetched once, "
+          f"{stats['shared']} repeat fetches avoided, {stats['values']} parsed files.")
+    return results
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Answer a JSONL file of questions about one repository.")
+    parser.add_argument("repo_url")
+    parser.add_argument("questions", help="JSONL file, one {\"id\": ..., \"question\": ...} per line")
+    parser.add_argument("--out", default="answers.jsonl", help="JSONL file for the answers")
+    parser.add_argument("--parallel", type=int, default=4, help="questions answered at the same time")
+    args = parser.parse_args()
+
+    try:
+        repo_state = await load_repo(args.repo_url)
+        await run_bulk_qa(repo_state, read_questions(args.questions), args.out, args.parallel)
+    finally:
+        await close_session()
+        shutdown_pool()
+
+if __name__ == "__main__":
+    asyncio.run(main())
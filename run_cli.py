@@ -1,70 +1,192 @@
 # run_cli.py
 #export PYTHONPATH=$PYTHONPATH:$(pwd)
+"""
+Interactive CLI: index a repository, then answer questions about it.
+
+Nothing heavy is imported up front: the graphs (and with them LangGraph,
+LangChain and the parsers) are compiled on first use and the chat model
+is built by get_llm() when a node first needs it. After a snapshot
+restore both are warmed up in a background thread while the user types
+the first question.
+"""
+import argparse
 import asyncio
-import sys
-from langchain_core.messages import HumanMessage
+import threading
+import time
+from typing import TYPE_CHECKING
+
+from langgraph_app import get_index_app, get_qa_app
+from src.config.settings import SNAPSHOT_ENABLED, STREAM_ANSWERS
+from src.github_repo_parser import GitRepoParser
+from src.utils.http_client import close_session
+from src.utils.llm_provider import get_llm
+from src.utils.llm_scheduler import INTERACTIVE, set_priority
+from src.utils.parse_pool import shutdown_pool
+from src.utils.snapshot import load_snapshot, save_snapshot, latest_snapshot
+from src.utils.conversation_memory import new_conversation
 
-from langgraph_app import index_app, qa_app
-from src.config.settings import LLM
-from state_schema import Agent_State
+if TYPE_CHECKING:
+    from state_schema import Agent_State
 
-async def load_repo(repo_url: str) -> Agent_State:
+async def load_repo(repo_url: str, llm=None) -> "Agent_State":
+    """
+    Indexes repo_url (or restores its snapshot) and returns the state
+    questions are answered from. llm defaults to get_llm(), which is only
+    built once a graph runs.
+    """
 
     # Initial state for the graph
-    state: Agent_State = {
+    state: "Agent_State" = {
         "messages": [],
         "url": repo_url,
+        "commit_sha": None,
         "repo_tree": {},
         "global_context": None,
+        "directory_digests": {},
+        "digests_degraded": False,
+        "directory_context": "",
         "selected_files": [],
-        "unselected_files": [],
         "parsed_files": [],
+        "symbol_index": {},
+        "symbol_hits": "",
+        "search_index": None,
+        "file_catalog": None,
         "intent": "",
         "keywords": [],
         "targets": {},
         "summary": [],
-        "llm": LLM,
+        "context_files": [],
+        "context_dropped": [],
+        "conversation": new_conversation(),
+        "status": [],
+        "llm": llm,
     }
 
+    if SNAPSHOT_ENABLED:
+        try:
+            state["commit_sha"] = await GitRepoParser().resolve_commit(repo_url)
+        except Exception as e:
+            print(f"Could not resolve commit, indexing without snapshot: {e}")
+
+        start = time.perf_counter()
+        # Snapshot file I/O runs in a thread so a server loop stays responsive
+        snapshot = await asyncio.to_thread(load_snapshot, repo_url, state["commit_sha"])
+        if snapshot is not None:
+            state.update(snapshot)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            print(f"\nLoaded index snapshot for {state['commit_sha'][:12]} in {elapsed_ms:.0f} ms.\n")
+            return state
+
+        # An older snapshot can be brought forward with the commit diff
+        previous = await asyncio.to_thread(latest_snapshot, repo_url) if state["commit_sha"] else None
+        if previous is not None:
+            from src.utils.incremental_index import incremental_update
+
+            state["llm"] = state["llm"] or get_llm()
+            try:
+                updated = await incremental_update({**state, **previous}, state["commit_sha"])
+            except Exception as e:
+                print(f"Incremental update failed, re-indexing: {e}")
+                updated = None
+            if updated is not None:
+                state.update(updated)
+                await asyncio.to_thread(save_snapshot, state)
+                return state
+
     # print(f"\nStarting analysis for repo:\n{repo_url}\n")
 
-    async for step in index_app.astream(state):
-        # step is a dict: {"node_name": updated_state}
-        # print(step)
-        _, delta = list(step.items())[0]
-        # print(state)
-        # print(f"Indexing Node executed: {node_name}")
-        state.update(delta)
+    # "values" yields the whole state after each step, merged through the
+    # graph's reducers (messages, status)
+    state["llm"] = state["llm"] or get_llm()
+    async for values in get_index_app().astream(state, stream_mode="values"):
+        state = values
 
-        # Optionally print the node's output
-        # updated_state = step[node_name]
-        # if "messages" in updated_state:
-        #     last_msg = updated_state["messages"][-1]
-            # print(f"Message: {last_msg.content if hasattr(last_msg, 'content') else last_msg}")
+        # Optionally print the latest node status
+        # if state.get("status"):
+        #     print(f"Status: {state['status'][-1]}")
 
     print("\nFinished Indexing Repository.\n")
+    if SNAPSHOT_ENABLED:
+        await asyncio.to_thread(save_snapshot, state)
     return state
 
-async def qa(repo_state: Agent_State, question: str) -> Agent_State:
-    state: Agent_State = {
+async def qa(repo_state: "Agent_State", question: str, on_token=None) -> "Agent_State":
+    """
+    Runs qa_app for one question. With on_token, the summarize node's LLM
+    output is streamed through the graph and on_token is called with each
+    text chunk as it arrives; the resulting state is the same either way.
+
+    Only the new question is passed as messages; earlier turns reach the
+    graph through the bounded state["conversation"] memory, so the state
+    carried between turns does not grow with the session.
+
+    The run searches an overlay of repo_state's search index, so files it
+    parses are ranked for this question (and the turns after it in the
+    returned state) without touching an index other runs share.
+    """
+    from langchain_core.messages import AIMessageChunk, HumanMessage
+
+    qa_app = get_qa_app()
+    search_index = repo_state.get("search_index")
+    state: "Agent_State" = {
         **repo_state,
+        "llm": repo_state.get("llm") or get_llm(),
+        "search_index": search_index.overlay() if search_index is not None else None,
         "messages": [HumanMessage(content=question)],
         "intent": "",
         "keywords": [],
         "targets": {},
         "selected_files": [],
-        "unselected_files": [],
+        "symbol_hits": "",
+        "directory_context": "",
         "summary": "",
+        "context_files": [],
+        "context_dropped": [],
     }
 
-    async for step in qa_app.astream(state):
-        _, delta = list(step.items())[0]
-        # print(f"QA Node excuted: {node_name}")
-        state.update(delta)
+    start = time.perf_counter()
+    first_token = None
 
+    if on_token is None:
+        async for values in qa_app.astream(state, stream_mode="values"):
+            state = values
+    else:
+        async for mode, chunk in qa_app.astream(state, stream_mode=["values", "messages"]):
+            if mode == "values":
+                state = chunk
+                continue
+            # Only the LLM's token chunks; the node's final AIMessage is
+            # emitted on this stream too and would repeat the answer
+            message, metadata = chunk
+            if metadata.get("langgraph_node") != "summarize" or not isinstance(message, AIMessageChunk):
+                continue
+            if not message.text:  # tool-call / metadata-only chunks
+                continue
+            if first_token is None:
+                first_token = time.perf_counter()
+            on_token(message.text)
+
+    total_ms = (time.perf_counter() - start) * 1000
+    ttft = f"{(first_token - start) * 1000:.0f} ms" if first_token is not None else "n/a"
+    print(f"\n[qa] time to first token: {ttft}, total: {total_ms:.0f} ms")
+    if state.get("context_dropped"):
+        print(f"[qa] left out for length: {', '.join(state['context_dropped'])}")
     return state
 
-async def qa_loop(repo_state: Agent_State):
+def warm_up():
+    """
+    Compiles the QA graph and builds the chat model in a thread while the
+    first question is typed, so neither delays its answer.
+    """
+    try:
+        get_qa_app()
+        get_llm()
+    except Exception as e:
+        print(f"\nWarm-up failed (retried on the first question): {e}")
+
+async def qa_loop(repo_state: "Agent_State"):
+    # Someone is waiting on these answers
+    set_priority(INTERACTIVE)
     current_state = repo_state
 
     while True:
@@ -78,22 +200,44 @@ async def qa_loop(repo_state: Agent_State):
         if user_query.lower() in {"exit", "quit"}:
             print("\nGOODBYE...")
             break
+        if STREAM_ANSWERS:
+            streamed = []
+
+            def print_token(text):
+                if not streamed:
+                    print("\nAgent: \n")
+                streamed.append(text)
+                print(text, end="", flush=True)
+
+            current_state = await qa(current_state, user_query, on_token=print_token)
+            if not streamed:
+                print("\nAgent: \n")
+                print(current_state.get("summary") or "(No answer generated.)")
+            continue
+
         current_state = await qa(current_state, user_query)
         summary = current_state.get("summary") or "(No answer generated.)"
         print("\nAgent: \n")
         print(summary)
 
-async def main():
-    if len(sys.argv)<2:
-        print("Usage: python run_cli.py <github_repo_url>")
-        raise SystemExit(1)
-    repo_url = sys.argv[1]
-    repo_state = await load_repo(repo_url)
-    print("Repository indexed. You can now ask questions about the codebase.")
-    await qa_loop(repo_state)
+async def main(repo_url: str):
+    try:
+        repo_state = await load_repo(repo_url)
+        print("Repository indexed. You can now ask questions about the codebase.")
+        threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
+        await qa_loop(repo_state)
+    finally:
+        llm = get_llm(create=False)
+        if hasattr(llm, "stats"):
+            stats = llm.stats()
+            print(f"LLM cache: {stats['hits']} hits, {stats['misses']} misses.")
+        await close_session()
+        shutdown_pool()
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    parser = argparse.ArgumentParser(description="Index a GitHub repository and ask questions about its code.")
+    parser.add_argument("repo_url", help="https://github.com/<owner>/<repo>")
+    asyncio.run(main(parser.parse_args().repo_url))
 
 
 
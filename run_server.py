@@ -0,0 +1,167 @@
+# run_server.py
+#export PYTHONPATH=$PYTHONPATH:$(pwd)
+"""
+Local HTTP service on top of index_app / qa_app, for chat bots and IDE
+plugins. Indexed repos stay in memory (see src/utils/repo_registry.py).
+
+    python run_server.py [--host 127.0.0.1] [--port 8080]
+
+Endpoints (JSON in, JSON out):
+    POST /index   {"url": ..., "wait": true}       index (or reuse) a repo
+    POST /ask     {"url": ..., "question": ..., "session_id": ...}
+    GET  /status  registry contents, in-flight indexing, cache counters
+"""
+import argparse
+import asyncio
+import time
+import uuid
+
+from aiohttp import web
+
+from run_cli import load_repo, qa
+from src.config.settings import (
+    INSTRUMENT,
+    SERVICE_HOST,
+    SERVICE_PORT,
+    REGISTRY_MAX_REPOS,
+    REGISTRY_MAX_MB,
+    REGISTRY_MAX_SESSIONS,
+)
+from src.utils.file_catalog import get_catalog
+from src.utils.http_client import close_session
+from src.utils.instrumentation import metrics
+from src.utils.llm_provider import get_llm
+from src.utils.llm_scheduler import INTERACTIVE, set_priority
+from src.utils.parse_pool import shutdown_pool
+from src.utils.repo_registry import RepoRegistry
+
+REGISTRY = web.AppKey("registry", RepoRegistry)
+BACKGROUND = web.AppKey("background", set)
+
+
+async def _json_body(request: web.Request) -> dict:
+    try:
+        body = await request.json()
+    except ValueError:
+        raise web.HTTPBadRequest(text="request body must be JSON")
+    if not isinstance(body, dict) or not body.get("url"):
+        raise web.HTTPBadRequest(text='"url" is required')
+    return body
+
+
+async def _entry(registry: RepoRegistry, url: str):
+    try:
+        return await registry.ensure(url)
+    except Exception as e:
+        raise web.HTTPBadGateway(text=f"indexing {url} failed: {e}")
+
+
+def _repo_info(url: str, entry) -> dict:
+    catalog = get_catalog(entry.state)
+    return {
+        "url": url,
+        "status": "ready",
+        "commit_sha": entry.state.get("commit_sha"),
+        "files": len(catalog) if catalog is not None else 0,
+        "parsed_files": len(entry.state.get("parsed_files") or []),
+    }
+
+
+async def handle_index(request: web.Request) -> web.Response:
+    registry = request.app[REGISTRY]
+    body = await _json_body(request)
+    url = body["url"]
+
+    if not body.get("wait", True) and registry.get(url) is None:
+        # Start (or join) indexing in the background and return at once
+        background = request.app[BACKGROUND]
+        task = asyncio.create_task(_index_in_background(registry, url))
+        background.add(task)
+        task.add_done_callback(background.discard)
+        return web.json_response({"url": url, "status": "indexing"}, status=202)
+
+    entry = await _entry(registry, url)
+    return web.json_response(_repo_info(url, entry))
+
+
+async def _index_in_background(registry: RepoRegistry, url: str):
+    try:
+        await registry.ensure(url)
+    except Exception as e:
+        print(f"Background indexing of {url} failed: {e}")
+
+
+async def handle_ask(request: web.Request) -> web.Response:
+    registry = request.app[REGISTRY]
+    body = await _json_body(request)
+    question = (body.get("question") or "").strip()
+    if not question:
+        raise web.HTTPBadRequest(text='"question" is required')
+    session_id = body.get("session_id") or uuid.uuid4().hex
+
+    entry = await _entry(registry, body["url"])
+    # Set after _entry, so indexing started by this request stays background
+    set_priority(INTERACTIVE)
+    start = time.perf_counter()
+    state = await qa({**entry.state, "conversation": entry.conversation(session_id)}, question)
+    entry.remember(session_id, state)
+
+    usage = getattr(state["messages"][-1], "usage_metadata", None) if state.get("messages") else None
+    return web.json_response({
+        "url": body["url"],
+        "session_id": session_id,
+        "answer": state.get("summary") or "",
+        "intent": state.get("intent"),
+        "files_used": state.get("context_files") or [],
+        "files_dropped": state.get("context_dropped") or [],
+        "tokens": dict(usage or {}),
+        "seconds": round(time.perf_counter() - start, 3),
+    })
+
+
+async def handle_status(request: web.Request) -> web.Response:
+    status = request.app[REGISTRY].status()
+    llm = get_llm(create=False)
+    if hasattr(llm, "stats"):
+        status["llm_cache"] = llm.stats()
+    if hasattr(llm, "schedule_stats"):
+        status["llm_scheduler"] = llm.schedule_stats()
+    if INSTRUMENT:
+        status["nodes"] = metrics()["nodes"]
+    return web.json_response(status)
+
+
+async def _cleanup(app: web.Application):
+    for task in app[BACKGROUND]:
+        task.cancel()
+    await close_session()
+    shutdown_pool()
+
+
+def create_app() -> web.Application:
+    app = web.Application()
+    app[REGISTRY] = RepoRegistry(
+        load_repo,
+        max_repos=REGISTRY_MAX_REPOS,
+        max_bytes=REGISTRY_MAX_MB * 1024 * 1024,
+        max_sessions=REGISTRY_MAX_SESSIONS,
+    )
+    app[BACKGROUND] = set()
+    app.router.add_post("/index", handle_index)
+    app.router.add_post("/ask", handle_ask)
+    app.router.add_get("/status", handle_status)
+    app.on_cleanup.append(_cleanup)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve repository indexing and QA over HTTP.")
+    parser.add_argument("--host", default=SERVICE_HOST)
+    parser.add_argument("--port", type=int, default=SERVICE_PORT)
+    args = parser.parse_args()
+    # handler_cancellation: a disconnected client cancels its /ask, and with
+    # it the LLM calls only it was waiting for (indexing is shielded)
+    web.run_app(create_app(), host=args.host, port=args.port, handler_cancellation=True)
+
+if __name__ == "__main__":
+    main()
@@ -4,24 +4,136 @@ from dotenv import load_dotenv
 # Load .env ONCE
 load_dotenv()
 
-# LLM INITIALIZATION
-from langchain_google_genai import ChatGoogleGenerativeAI
-
-LLM = ChatGoogleGenerativeAI(
-    model="gemini-2.5-flash",
-    temperature=0.2,
-)
+# LLM: built on first use by src/utils/llm_provider.get_llm(), so importing
+# the settings never loads a provider SDK
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "google")  # "google" or "openai"
+LLM_MODEL = os.getenv("LLM_MODEL")  # defaults to the provider's model in llm_provider.py
+LLM_TEMPERATURE = 0.2
 
 # config values for the rest of the app
 GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-GITHUB_API_BASE = "https://api.github.com/repos/"
-GITHUB_API_RAW = "https://raw.githubusercontent.com/"
+# Overridable to point at a GitHub stand-in (see benchmarks/fake_github.py)
+GITHUB_API_BASE = os.getenv("GITHUB_API_BASE", "https://api.github.com/repos/")
+GITHUB_API_RAW = os.getenv("GITHUB_API_RAW", "https://raw.githubusercontent.com/")
 
 # constants
 MAX_SIZE_KB = 500
-MAX_CHUNKS = 8  # manageable for prompt length
+CONTEXT_TOKEN_BUDGET = 12000  # parsed-file tokens packed into each answer prompt
+STREAM_ANSWERS = os.getenv("STREAM_ANSWERS", "1") != "0"  # print answer tokens as they arrive
+
+# Conversation memory: recent turns verbatim, older ones folded into a digest
+CONVERSATION_WINDOW = 4
+CONVERSATION_TURN_CHARS = 2000  # answer text kept per remembered turn
+CONVERSATION_DIGEST_CHARS = 2000
+STATUS_MAX_LINES = 50  # node status lines kept in state["status"]
+
+# HTTP client
+HTTP_CONCURRENCY = int(os.getenv("HTTP_CONCURRENCY", 16))  # max in-flight requests
+HTTP_TIMEOUT = 30  # seconds per request
+# GitHub retries and rate limits (src/utils/github_http.py), one budget per process
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", 4))  # retries after the first attempt
+HTTP_BACKOFF_BASE = 0.5  # seconds, doubled per attempt (full jitter)
+HTTP_BACKOFF_MAX = 30.0
+RATE_LIMIT_PACE_RATIO = 0.2  # spread requests over the window once less than this share is left
+RATE_LIMIT_MAX_WAIT_SECONDS = float(os.getenv("RATE_LIMIT_MAX_WAIT_SECONDS", 900))
+
+# Ingestion backend: "http" fetches every file from raw.githubusercontent.com,
+# "archive" downloads one tarball (or reads ARCHIVE_PATH) and serves files from it
+INGEST_MODE = os.getenv("INGEST_MODE", "http")
+ARCHIVE_PATH = os.getenv("ARCHIVE_PATH")  # optional local .tar.gz
+
+# Parsing stage: CPU-bound parsers run in a process pool once a fetch
+# round carries more than PARSE_INLINE_MAX_BYTES of source (0 = always inline)
+PARSE_WORKERS = int(os.getenv("PARSE_WORKERS", max((os.cpu_count() or 2) - 1, 1)))
+PARSE_INLINE_MAX_BYTES = 256 * 1024
+PARSE_BATCH_BYTES = 128 * 1024  # small files are grouped up to this size per IPC round trip
+PARSE_TIMEOUT = 20  # seconds per batch / per file
+
+# File selection: BM25 top-k files per question, cap for directory questions
+SEARCH_TOP_K = 8
+DIRECTORY_MAX_FILES = 20
+
+# Bytes read per file before parsing, by extension (None = whole file).
+# These parsers only keep a preview, so reads stop once the budget is met.
+READ_BUDGET_BYTES = {
+    ".py": None,  # the AST needs the whole file
+    ".json": 64 * 1024,
+    ".yaml": 64 * 1024,
+    ".yml": 64 * 1024,
+    ".ipynb": 512 * 1024,
+    ".md": 256 * 1024,
+    ".txt": 256 * 1024,
+}
+READ_BUDGET_DEFAULT_BYTES = 16 * 1024  # files without a parser keep 5000 chars
+
+# Symbol index: max .py files fetched and indexed per repo
+SYMBOL_INDEX_MAX_FILES = 5000
+
+# Content-addressed on-disk caches (blobs + parser outputs, keyed by git SHA)
+CACHE_ENABLED = os.getenv("CACHE_ENABLED", "1") != "0"
+CACHE_DIR = os.getenv("CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "code-analyser"))
+BLOB_CACHE_MAX_MB = 1024
+PARSE_CACHE_MAX_MB = 256
+ETAG_CACHE_MAX_MB = 64  # API listings kept for conditional (If-None-Match) requests
+
+# LLM response cache (same store, keyed by model + temperature + messages)
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "1") != "0"
+LLM_CACHE_MAX_MB = 64
+LLM_CACHE_TTL_HOURS = float(os.getenv("LLM_CACHE_TTL_HOURS", 24 * 7))
+# Graph nodes whose LLM calls always go to the model. "summarize" prompts
+# carry the conversation memory and rarely repeat in interactive sessions,
+# so CLI / server deployments set LLM_CACHE_SKIP_NODES=summarize
+LLM_CACHE_SKIP_NODES = [n.strip() for n in os.getenv("LLM_CACHE_SKIP_NODES", "").split(",") if n.strip()]
+
+# LLM scheduler (src/utils/llm_scheduler.py) in front of the shared model:
+# concurrency cap, requests/min and tokens/min buckets (0 = unlimited),
+# interactive-before-background priority, coalescing of identical calls
+LLM_SCHEDULER_ENABLED = os.getenv("LLM_SCHEDULER_ENABLED", "1") != "0"
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", 8))
+LLM_REQUESTS_PER_MINUTE = float(os.getenv("LLM_REQUESTS_PER_MINUTE", 0))
+LLM_TOKENS_PER_MINUTE = float(os.getenv("LLM_TOKENS_PER_MINUTE", 0))
+LLM_OUTPUT_TOKENS_ESTIMATE = 1024  # charged per call until usage_metadata says otherwise
+
+# Hierarchical repo summary (src/utils/directory_digest.py): one short LLM
+# digest per directory, reduced bottom-up into global_context
+DIGEST_CONCURRENCY = int(os.getenv("DIGEST_CONCURRENCY", 8))
+DIGEST_MAX_DEPTH = 4  # deeper directories are folded into their ancestor's digest
+DIGEST_MAX_FILES = 40  # files listed by name in one digest prompt
+DIGEST_SNIPPET_FILES = 2  # key files per directory whose first lines are shown
+DIGEST_CACHE_MAX_MB = 32
+
+# Index snapshots (finished indexing state per repo + commit)
+SNAPSHOT_ENABLED = os.getenv("SNAPSHOT_ENABLED", "1") != "0"
+SNAPSHOT_DIR = os.path.join(CACHE_DIR, "snapshots")
+
+# HTTP service (run_server.py): indexed repos kept in memory, LRU-evicted
+SERVICE_HOST = os.getenv("SERVICE_HOST", "127.0.0.1")
+SERVICE_PORT = int(os.getenv("SERVICE_PORT", 8080))
+REGISTRY_MAX_REPOS = int(os.getenv("REGISTRY_MAX_REPOS", 8))
+REGISTRY_MAX_MB = int(os.getenv("REGISTRY_MAX_MB", 2048))  # estimated state size
+REGISTRY_MAX_SESSIONS = 256  # QA sessions (conversation memories) per repo
+
+# Per-node instrumentation (src/utils/instrumentation.py), off by default.
+# Writes a Chrome trace (chrome://tracing, Perfetto) at exit and refreshes an
+# aggregated metrics file every METRICS_FLUSH_SECONDS while running.
+INSTRUMENT = os.getenv("INSTRUMENT", "0") != "0"
+TRACE_PATH = os.getenv("TRACE_PATH", "trace.json")
+TRACE_MAX_SPANS = 20000  # most recent node runs kept for the trace
+METRICS_PATH = os.getenv("METRICS_PATH", "metrics.json")
+METRICS_FLUSH_SECONDS = float(os.getenv("METRICS_FLUSH_SECONDS", 10))
+# JSON size of each node's input state and update; serializes the whole state
+# twice per node run, so it is off unless asked for
+INSTRUMENT_STATE_SIZE = os.getenv("INSTRUMENT_STATE_SIZE", "0") != "0"
+# Sampling profiler for one node (needs INSTRUMENT), folded stacks for flamegraph tools
+PROFILE_NODE = os.getenv("PROFILE_NODE")
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", 5))
+PROFILE_PATH = os.getenv("PROFILE_PATH", "profile.folded")
+
+# Incremental re-indexing: regenerate global context only when the share of
+# added/removed/renamed files exceeds this ratio (or a top-level dir changes)
+GLOBAL_CONTEXT_REFRESH_RATIO = 0.1
 
 #lists of constants
 EXCLUDE_EXT = [
@@ -30,4 +142,4 @@ EXCLUDE_EXT = [
     ".docstr", ".docstr.yaml", ".github"
 ]
 IMPORTANT_EXT = [".py", ".ipynb", ".md", ".json", ".yaml", ".toml"]
-IMPORTANT_NAMES = ["readme", "setup", "main", "__init__", "app", "model", "config"]
\ No newline at end of file
+IMPORTANT_NAMES = ["readme", "setup", "main", "__init__", "app", "model", "config"]
@@ -2,24 +2,24 @@
 Script to parse Repository and store contents
 in textual form.
 """
+import asyncio
 import os
-import requests
-from src.config.settings import GITHUB_TOKEN, EXCLUDE_EXT
+from src.config.settings import EXCLUDE_EXT, GITHUB_API_BASE, GITHUB_API_RAW
+from src.utils.http_client import github_headers
+from src.utils.github_http import github_get
 
 
 class GitRepoParser:
     def __init__(self, github_token: bool = True):
-        self.s = requests.Session()
-        if github_token:
-            self.s.headers.update({"Authorization": f"Token {GITHUB_TOKEN}"})
+        self.headers = github_headers() if github_token else {}
 
         self.exclude_ext = EXCLUDE_EXT
         
         # Raw API (for fetching actual file contents)
-        self.raw_api = "https://raw.githubusercontent.com/"
+        self.raw_api = GITHUB_API_RAW
         
-        # GitHub contents API (for listing files)
-        self.contents_api = "https://api.github.com/repos/"
+        # GitHub REST API (for listing files)
+        self.contents_api = GITHUB_API_BASE
 
     def _is_excluded(self, name: str):
         return any(name.endswith(ext) for ext in self.exclude_ext)
@@ -37,69 +37,171 @@ class GitRepoParser:
         raise TypeError("Kindly provide a string as input.")
     
 
-    def _fetch_recursive(self, owner, repo, path="", branch="main"):
+    async def _get_json(self, url):
+        # Paced, retried, and revalidated with If-None-Match
+        response = await github_get(url, headers=self.headers, conditional=True)
+
+        if response.status != 200:
+            raise ValueError(f"Error {response.status}: {response.text}")
+
+        return response.json()
+
+    async def _fetch_tree(self, owner, repo, tree_ish="main", prefix=""):
         """
-        Recursively fetch GitHub directory tree using the Contents API.
-        Returns flat list of all file metadata.
+        Fetch the repository tree using the Git Trees API with recursive=1,
+        which lists a whole tree in a single request.
+        When GitHub truncates the response, the tree is listed one level
+        at a time and every subtree is fetched recursively on its own.
+        Returns flat list of all blob metadata (path, size, sha).
         """
-        url = f"{self.contents_api}{owner}/{repo}/contents/{path}?ref={branch}"
-        response = self.s.get(url)
-
-        if response.status_code != 200:
-            raise ValueError(f"Error {response.status_code}: {response.text}")
+        url = f"{self.contents_api}{owner}/{repo}/git/trees/{tree_ish}?recursive=1"
+        data = await self._get_json(url)
 
-        items = response.json()
+        if not data.get("truncated"):
+            return [
+                {**item, "path": prefix + item["path"]}
+                for item in data.get("tree", [])
+                if item["type"] == "blob"
+            ]
 
-        # GitHub returns either dict (file) or list (directory)
-        if isinstance(items, dict) and items.get("type") == "file":
-            return [items]
+        # Truncated listing: page through the subtrees one by one
+        url = f"{self.contents_api}{owner}/{repo}/git/trees/{tree_ish}"
+        data = await self._get_json(url)
 
         files = []
-        for item in items:
-            if item["type"] == "dir":
-                files.extend(self._fetch_recursive(owner, repo, item["path"], branch))
-            elif item["type"] == "file":
-                files.append(item)
+        subtrees = []
+        for item in data.get("tree", []):
+            path = prefix + item["path"]
+            if item["type"] == "tree":
+                subtrees.append(self._fetch_tree(owner, repo, item["sha"], path + "/"))
+            elif item["type"] == "blob":
+                files.append({**item, "path": path})
+
+        # Subtrees are independent, list them concurrently
+        for subtree_files in await asyncio.gather(*subtrees):
+            files.extend(subtree_files)
 
         return files
 
 
-    def get_dir_tree(self, repo_url, branch="main"):
+    def raw_prefix(self, repo_url, branch="main"):
+        """
+        Raw URL prefix under which every file of the repo is served.
+        """
+        owner, repo = self._get_repo_name(repo_url).split("/")
+        return f"{self.raw_api}{owner}/{repo}/{branch}/"
+
+    async def resolve_commit(self, repo_url, branch="main"):
+        """
+        Resolves a branch name to the commit SHA it currently points at.
+        """
+        owner, repo = self._get_repo_name(repo_url).split("/")
+        data = await self._get_json(f"{self.contents_api}{owner}/{repo}/commits/{branch}")
+        return data["sha"]
+
+    async def get_dir_tree(self, repo_url, branch="main", ref=None, all_files=None):
         """
-        Returns nested tree structure of repository using the Contents API.
+        Returns nested tree structure of repository using the Git Trees API.
+        ref pins the listing to a commit (defaults to the branch head);
+        all_files skips the API and builds the tree from an existing listing,
+        e.g. the members of a downloaded archive.
         """
         repo_name = self._get_repo_name(repo_url)
         owner, repo = repo_name.split("/")
 
         # print(f"Fetching directory tree for {repo_name}")
 
-        all_files = self._fetch_recursive(owner, repo, "", branch)
+        if all_files is None:
+            all_files = await self._fetch_tree(owner, repo, ref or branch)
         metadata = {}
 
         for f in all_files:
-            path = f["path"]
-            ext = self._get_extension(path)
-
-            if self._is_excluded(path):
+            if self._is_excluded(f["path"]):
                 continue
-
-            meta = {
-                "path": path,
-                "type": "file",
-                "ext": ext,
-                "size_kb": round(f.get("size", 0) / 1024, 2),
-                "url": f"{self.raw_api}{owner}/{repo}/{branch}/{path}"
-            }
-
-            # Build nested metadata tree
-            parts = path.split("/")
-            cursor = metadata
-            for folder in parts[:-1]:
-                folder_key = folder + "/"
-                cursor = cursor.setdefault(folder_key, {})
-            
-            cursor[parts[-1]] = meta
+            self.insert_file(metadata, self._file_meta(f, owner, repo, branch))
 
         print(f"\n\nRepository metadata tree created {len(all_files)} total items.")
         # print(metadata)
-        return metadata
\ No newline at end of file
+        return metadata
+
+    def _file_meta(self, f, owner, repo, branch="main"):
+        """
+        Metadata entry stored in the nested tree for one listed blob.
+        """
+        path = f["path"]
+        return {
+            "path": path,
+            "type": "file",
+            "ext": self._get_extension(path),
+            "size_kb": round(f.get("size", 0) / 1024, 2),
+            "sha": f.get("sha"),
+            "url": f"{self.raw_api}{owner}/{repo}/{branch}/{path}"
+        }
+
+    @staticmethod
+    def insert_file(tree, meta):
+        """
+        Inserts (or replaces) a file entry in the nested metadata tree.
+        """
+        parts = meta["path"].split("/")
+        cursor = tree
+        for folder in parts[:-1]:
+            folder_key = folder + "/"
+            cursor = cursor.setdefault(folder_key, {})
+
+        cursor[parts[-1]] = meta
+
+    @staticmethod
+    def remove_file(tree, path):
+        """
+        Removes a file entry from the nested metadata tree and prunes
+        folders left empty. Returns True when the file was present.
+        """
+        parts = path.split("/")
+        chain = [tree]
+        for folder in parts[:-1]:
+            node = chain[-1].get(folder + "/")
+            if not isinstance(node, dict):
+                return False
+            chain.append(node)
+
+        if chain[-1].pop(parts[-1], None) is None:
+            return False
+
+        for depth in range(len(parts) - 1, 0, -1):
+            if chain[depth]:
+                break
+            del chain[depth - 1][parts[depth - 1] + "/"]
+        return True
+
+    async def compare(self, repo_url, base, head):
+        """
+        Files changed between two commits (Compare API).
+        Returns None when GitHub caps the file list (300 files), or when
+        head does not descend from base (status "behind" / "diverged",
+        e.g. after a force-push): the three-dot diff starts at the merge
+        base, so patching base with it would keep changes only base has.
+        The caller should fall back to a full listing.
+        """
+        owner, repo = self._get_repo_name(repo_url).split("/")
+        data = await self._get_json(f"{self.contents_api}{owner}/{repo}/compare/{base}...{head}")
+        if data.get("status") not in ("ahead", "identical"):
+            return None
+        files = data.get("files", [])
+        if len(files) >= 300:
+            return None
+        return files
+
+    async def list_dir(self, repo_url, path, ref, branch="main"):
+        """
+        Metadata entries of the files directly inside one directory at ref
+        (Contents API), in the same shape as get_dir_tree entries.
+        """
+        owner, repo = self._get_repo_name(repo_url).split("/")
+        url = f"{self.contents_api}{owner}/{repo}/contents/{path}?ref={ref}"
+        items = await self._get_json(url)
+        return [
+            self._file_meta(item, owner, repo, branch)
+            for item in items
+            if item.get("type") == "file" and not self._is_excluded(item["path"])
+        ]
@@ -1,12 +1,12 @@
-import re
-from langchain_core.messages import SystemMessage, HumanMessage
+from langchain_core.messages import HumanMessage
 
-from src.utils.flatten_tree import flatten_tree
-from src.config.settings import IMPORTANT_EXT, IMPORTANT_NAMES
+from src.utils.directory_digest import find_directory, format_directory
+from src.utils.file_catalog import get_catalog
+from src.utils.search_index import build_search_index
+from src.utils.symbol_index import files_for, format_hits
+from src.config.settings import IMPORTANT_NAMES, SEARCH_TOP_K, DIRECTORY_MAX_FILES
 
-def matches_keywords(path, keywords):
-        path_lower = path.lower()
-        return any(kw.lower() in path_lower for kw in keywords)
+PIPELINE_MARKERS = ["train", "main", "pipeline", "runner", "engine"]
 
 def add_unique(meta, selected_list, selected_paths: set):
     p = meta["path"].lower()
@@ -19,9 +19,11 @@ async def analyze_tree_node(state: dict) -> dict:
     Query-aware Analyze Node.
     Decides which files to parse deeply based on:
       - repo metadata
-      - user query (latest HumanMessage)
+      - user query (latest HumanMessage), ranked with BM25 over
+        file paths and parsed content
+      - symbol index hits for function/variable questions
+      - directory digests for directory questions (no files fetched)
       - file importance (README, setup, main, config, etc.)
-      - file sizes and extensions
     """
 
     # print("Initializing Analyze Tree Node...")
@@ -34,88 +36,89 @@ async def analyze_tree_node(state: dict) -> dict:
     if not repo_tree:
         return {
                 "selected_files": [],
-                "unselected_files": [],
-                "messages": state.get("messages", []) + [
-                    SystemMessage(content="No repository tree available.")
-                ]}
+                "status": ["No repository tree available."]}
 
-    flattened = flatten_tree(repo_tree)
+    catalog = get_catalog(state)
 
-    user_query = ""
+    raw_query = ""
     for msg in reversed(state.get("messages", [])):
         if isinstance(msg, HumanMessage):
-            user_query = msg.content.lower()
+            raw_query = msg.content
             break
-
-    query_keywords = re.findall(r"[a-zA-Z_]+", user_query)
+    user_query = raw_query.lower()
 
     selected = state.get("selected_files")
     selected_paths = set()
-    unselected = state.get("unselected_files")
-
-    for meta in flattened:
-        path = meta["path"].lower()
-        ext = meta["ext"].lower()
-
-        selected_files = False
-
-        # 1) Always include important names
-        if any(name in path for name in IMPORTANT_NAMES):
-            selected_files = True
-
-        # 2) Match keywords from user query
-        elif any(k in path for k in query_keywords):
-            selected_files = True
-
-        # 3) Keep primary code/docs
-        elif ext in IMPORTANT_EXT:
-            selected_files = True
-
-        # 4) Intent-specific boosts
-        if intent == "function_usage":
-            fn = targets.get("function")
-            if fn and fn.lower() in path:
-                selected_files = True
-            elif matches_keywords(path, keywords):
-                selected_files = True
-
-        elif intent == "type_lookup":
-            var = targets.get("variable")
-            if var and var.lower() in path:
-                selected_files = True
-            elif matches_keywords(path, keywords):
-                selected_files = True
-
-        elif intent == "directory_question":
-            directory = targets.get("directory")
-            if directory and path.startswith(directory):
-                selected_files = True
-
-        elif intent == "pipeline_flow":
-            pipeline_markers = ["train", "main", "pipeline", "runner", "engine"]
-            if any(m in path for m in pipeline_markers):
-                selected_files = True
-
-        elif intent == "architecture_summary":
-            if path.count("/") <= 1 and path.endswith(".py"):
-                selected_files = True
-
-        elif intent == "high_level_summary":
-            if matches_keywords(path, keywords):
-                selected_files = True
-
-        # Final push to lists (no duplicates)
-        if selected_files:
+
+    # Symbol questions are resolved through the symbol index:
+    # only the defining and referencing files get selected
+    symbol_index = state.get("symbol_index")
+    if symbol_index and intent in ("function_usage", "type_lookup"):
+        name = targets.get("function" if intent == "function_usage" else "variable")
+        if not name:
+            name = next((k for k in keywords if k in symbol_index["defs"]), None)
+        paths = files_for(symbol_index, name) if name else []
+        if paths:
+            for p in paths:
+                if p in catalog:
+                    add_unique(catalog[p], selected, selected_paths)
+
+            print(f"\nSymbol index resolved '{name}' to {len(selected)} files.")
+            return {
+                "selected_files": selected,
+                        "symbol_hits": f"{name}:\n{format_hits(symbol_index, name)}",
+                "file_catalog": catalog,
+                "status": [f"Resolved '{name}' through the symbol index to {len(selected)} files."]
+            }
+
+    # Directory questions are answered from the directory digests built
+    # while indexing: nothing is selected, so nothing is fetched
+    digests = state.get("directory_digests")
+    if digests and intent == "directory_question" and targets.get("directory"):
+        directory = find_directory(digests, targets["directory"])
+        if directory:
+            print(f"\nAnswering from the digest of {directory}.")
+            return {
+                "selected_files": [],
+                        "directory_context": format_directory(digests, catalog, directory),
+                "file_catalog": catalog,
+                "status": [f"Using the directory digest of '{directory}'."]
+            }
+
+    # Path tokens of every file + parsed content so far, built once per repo
+    search_index = state.get("search_index")
+    if search_index is None:
+        search_index = build_search_index(catalog.files(), state.get("parsed_files", []), symbol_index)
+
+    if raw_query:
+        # 1) BM25 top-k over paths and parsed content
+        query = " ".join([raw_query, *keywords, *map(str, targets.values())])
+        if intent == "pipeline_flow":
+            query += " " + " ".join(PIPELINE_MARKERS)
+        for path, _ in search_index.search(query, SEARCH_TOP_K):
+            add_unique(catalog[path], selected, selected_paths)
+    else:
+        # 1) Indexing run, no question yet: start from the important files
+        for fid, path in enumerate(catalog):
+            if any(name in path.lower() for name in IMPORTANT_NAMES):
+                add_unique(catalog.meta(fid), selected, selected_paths)
+
+    # 2) Intent-specific additions
+    if intent == "directory_question" and targets.get("directory"):
+        under = catalog.filter(targets["directory"])
+        for meta in catalog.files(under[:DIRECTORY_MAX_FILES]):
+            add_unique(meta, selected, selected_paths)
+
+    elif intent == "architecture_summary":
+        # .py files at the root and one level below it
+        for meta in catalog.files(catalog.filter("", ext=".py", max_depth=1)):
             add_unique(meta, selected, selected_paths)
-        else:
-            unselected.append(meta)
 
-    print(f"\nSelected {len(selected)} files, unselected {len(unselected)}.")
+    print(f"\nSelected {len(selected)} files.")
 
     return {
         "selected_files": selected,
-        "unselected_files": unselected,
-        "messages": state.get("messages", []) + [
-            SystemMessage(content=f"Selected {len(selected)} files based on query: '{user_query}'.")
-        ]
+        "search_index": search_index,
+        "file_catalog": catalog,
+        "status": [f"Selected {len(selected)} files based on query: '{user_query}'."]
     }
@@ -1,27 +1,64 @@
-from langchain_core.messages import SystemMessage
-from src.tools.parse_python import parse_python
-from src.tools.parse_markdown import parse_markdown
-from src.tools.parse_notebook import parse_notebook
-from src.tools.parse_json_yaml import parse_json_yaml
+import asyncio
+import importlib
+import sys
 from src.utils.fetch_blob import fetch_blob_content
+from src.utils.disk_cache import blob_cache, parse_cache
+from src.utils.parse_pool import parse_many
+from src.utils.search_index import document_text
+from src.utils.batch_memo import current_memo
+from src.config.settings import READ_BUDGET_BYTES, READ_BUDGET_DEFAULT_BYTES
 
 
-
-# Tool registry
+# Tool registry: extension -> (module, function). A parser module (and
+# nbformat / yaml with it) is imported the first time its extension is seen.
 PARSERS = {
-    ".py": parse_python,
-    ".md": parse_markdown,
-    ".txt": parse_markdown,
-    ".json": parse_json_yaml,
-    ".yaml": parse_json_yaml,
-    ".yml": parse_json_yaml,
-    ".ipynb": parse_notebook,
+    ".py": ("src.tools.parse_python", "parse_python"),
+    ".md": ("src.tools.parse_markdown", "parse_markdown"),
+    ".txt": ("src.tools.parse_markdown", "parse_markdown"),
+    ".json": ("src.tools.parse_json_yaml", "parse_json_yaml"),
+    ".yaml": ("src.tools.parse_json_yaml", "parse_json_yaml"),
+    ".yml": ("src.tools.parse_json_yaml", "parse_json_yaml"),
+    ".ipynb": ("src.tools.parse_notebook", "parse_notebook"),
 }
+_loaded_parsers = {}
+
+
+def get_parser(ext: str):
+    """
+    Parser function registered for an extension, or None.
+    """
+    parser_fn = _loaded_parsers.get(ext)
+    if parser_fn is None and ext in PARSERS:
+        module, name = PARSERS[ext]
+        parser_fn = _loaded_parsers[ext] = getattr(importlib.import_module(module), name)
+    return parser_fn
+
+
+def _read_budget(ext: str):
+    return READ_BUDGET_BYTES.get(ext, READ_BUDGET_DEFAULT_BYTES)
+
+def _parse_cache_key(sha: str, parser_fn, ext: str) -> str:
+    """
+    Parser outputs are cached per (blob sha, parser name, parser version,
+    read budget): a file read under a larger budget is parsed again
+    instead of served from the parse of its truncated prefix.
+    """
+    version = getattr(sys.modules[parser_fn.__module__], "PARSER_VERSION", 0)
+    budget = _read_budget(ext)
+    return f"{sha}:{parser_fn.__name__}:{version}:{budget if budget is not None else 'all'}"
+
+def _cache_counts():
+    caches = [blob_cache(), parse_cache()]
+    return [(c.hits, c.misses) if c else (0, 0) for c in caches]
 
 async def fetch_and_parse_node(state: dict) -> dict:
     """
     Fetches file content for 'selected_files' and parses each file using
     the appropriate tool for its extension.
+
+    A file that could not be fetched is kept as a "failed" placeholder:
+    it is fetched again the next time it is selected and never saved in
+    a snapshot. RateLimitExceeded from fetch_blob_content propagates.
     """
 
     # print("Initializing Fetch & Parse Node...")
@@ -30,50 +67,118 @@ async def fetch_and_parse_node(state: dict) -> dict:
     
     if not selected_files:
         return {
-            "parsed_files": [],
-            "messages": state.get("messages", []) + [
-                SystemMessage(content="No files selected for parsing.")
-            ]
+            "parsed_files": state.get("parsed_files", []),
+            "status": ["No files selected for parsing."]
         }
     
     parsed_files = state.get("parsed_files")
-    parsed_paths = {pf["path"] for pf in parsed_files if "path" in pf}
+    parsed_paths = {pf["path"] for pf in parsed_files if "path" in pf and not pf.get("failed")}
     new_pf = []
-    
+
+    to_fetch = []
     for file_meta in selected_files:
         path = file_meta["path"]
-        ext = file_meta["ext"].lower()
         url = file_meta["url"]
 
-        print(f"Fetching file: {path}")
-
         if not path or not url:
             continue
         if path in parsed_paths:
             continue
 
-        print(f"Fetching File: {path}")
+        parsed_paths.add(path)
+        to_fetch.append(file_meta)
+
+    counts_before = _cache_counts()
+    p_cache = parse_cache()
+    memo = current_memo()
+
+    # Parser outputs already cached for this blob sha (or parsed earlier in
+    # the current batch) need no fetch at all
+    results = {}
+    lookups = {}  # index -> parse cache key
+    for i, file_meta in enumerate(to_fetch):
+        parser_fn = get_parser(file_meta["ext"].lower())
+        sha = file_meta.get("sha")
+        memo_key = ("parsed", file_meta["url"], sha)
+        if memo is not None and memo_key in memo.values:
+            results[i] = memo.values[memo_key]
+            continue
+        if p_cache is not None and parser_fn and sha:
+            lookups[i] = _parse_cache_key(sha, parser_fn, file_meta["ext"].lower())
+
+    if lookups:
+        # SQLite reads happen off the event loop, in one thread hop
+        cached = await asyncio.to_thread(lambda: [p_cache.get(key) for key in lookups.values()])
+        for i, value in zip(lookups, cached):
+            if value is not None:
+                results[i] = value.decode("utf-8")
+
+    misses = [i for i in range(len(to_fetch)) if i not in results]
+
+    # Fetch concurrently, each file capped at its extension's byte budget;
+    # gather keeps the selection order
+    print(f"Fetching {len(misses)} files ({len(results)} parses served from cache)")
+    contents = await asyncio.gather(
+        *(
+            fetch_blob_content(to_fetch[i]["url"], to_fetch[i].get("sha"), _read_budget(to_fetch[i]["ext"].lower()))
+            for i in misses
+        )
+    )
+
+    jobs = []  # (index, parser_fn, raw_content)
+    for i, raw_content in zip(misses, contents):
+        file_meta = to_fetch[i]
+        ext = file_meta["ext"].lower()
 
-        raw_content = fetch_blob_content(url)
         if not raw_content:
-            new_pf.append({
-                "path": path,
-                "parsed": f"<Failed to fetch content for {path}>"
-            })
+            results[i] = None
             continue
 
         # Select parser based on extension
-        parser_fn = PARSERS.get(ext, None)
+        parser_fn = get_parser(ext)
 
         if parser_fn:
-            try:
-                print("Checking Execution of parser tools")
-                parsed = parser_fn(raw_content)
-                print(f"{path} file parsed using {ext} parser utility function")
-            except Exception as e:
-                parsed = f"<Error parsing file {path}: {e}>"
+            jobs.append((i, parser_fn, raw_content))
+        else:
+            results[i] = raw_content[:5000]  # token-safe limit
+
+    # CPU-bound parsing runs in the process pool (inline for small rounds)
+    outputs = await parse_many([(parser_fn, raw) for _, parser_fn, raw in jobs])
+
+    to_store = []
+    for (i, parser_fn, _), (ok, parsed) in zip(jobs, outputs):
+        file_meta = to_fetch[i]
+        path = file_meta["path"]
+
+        if ok:
+            print(f"{path} file parsed using {file_meta['ext']} parser utility function")
+            if p_cache is not None and file_meta.get("sha"):
+                to_store.append((_parse_cache_key(file_meta["sha"], parser_fn, file_meta["ext"].lower()), parsed.encode("utf-8")))
         else:
-            parsed = raw_content[:5000]  # token-safe limit
+            parsed = f"<Error parsing file {path}: {parsed}>"
+
+        results[i] = parsed
+
+    if to_store:
+        await asyncio.to_thread(lambda: [p_cache.set(key, value) for key, value in to_store])
+
+    if memo is not None:
+        for i in misses:
+            if results[i] is not None:
+                memo.values[("parsed", to_fetch[i]["url"], to_fetch[i].get("sha"))] = results[i]
+
+    for i, file_meta in enumerate(to_fetch):
+        path = file_meta["path"]
+        ext = file_meta["ext"].lower()
+        parsed = results[i]
+
+        if parsed is None:
+            new_pf.append({
+                "path": path,
+                "parsed": f"<Failed to fetch content for {path}>",
+                "failed": True,
+            })
+            continue
 
         new_pf.append({
             "path": path,
@@ -81,12 +186,29 @@ async def fetch_and_parse_node(state: dict) -> dict:
             "parsed": parsed
         })
         
-    updated_pf = new_pf + parsed_files
-    print(f"Total parsed files: {len(updated_pf)} files.")
+    # Keep the BM25 index in step with newly parsed content
+    search_index = state.get("search_index")
+    if search_index is not None:
+        for pf in new_pf:
+            if "ext" in pf:
+                search_index.add(pf["path"], document_text(pf["path"], pf["parsed"], state.get("symbol_index")))
+
+    # Earlier failures of the files fetched again are replaced
+    fetched = {file_meta["path"] for file_meta in to_fetch}
+    parsed_files = [pf for pf in parsed_files if not (pf.get("failed") and pf.get("path") in fetched)]
+
+    print(f"Total parsed files: {len(parsed_files) + len(new_pf)} files.")
+
+    (blob_hits, blob_misses), (parse_hits, parse_misses) = [
+        (h - h0, m - m0) for (h, m), (h0, m0) in zip(_cache_counts(), counts_before)
+    ]
+    cache_report = (
+        f"blob cache {blob_hits} hits / {blob_misses} misses, "
+        f"parse cache {parse_hits} hits / {parse_misses} misses"
+    )
+    print(cache_report)
 
     return {
         "parsed_files": parsed_files + new_pf,
-        "messages": state.get("messages", []) + [
-            SystemMessage(content=f"Fetched & parsed {len(new_pf)} files.")
-        ]
+        "status": [f"Fetched & parsed {len(new_pf)} files ({cache_report})."]
     }
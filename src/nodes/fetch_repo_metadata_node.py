@@ -1,13 +1,36 @@
 # nodes/fetch_repo_metadata_node.py
-from langchain_core.messages import SystemMessage
+import asyncio
 from src.github_repo_parser import GitRepoParser
+from src.config.settings import INGEST_MODE, ARCHIVE_PATH
+from src.utils.archive_store import open_local_archive, download_archive, register_archive
+from src.utils.file_catalog import FileCatalog
+
+async def _load_from_archive(parser: GitRepoParser, repo_url: str, commit_sha=None):
+    """
+    Archive ingestion: opens ARCHIVE_PATH or downloads the tarball of the
+    resolved commit, registers it so fetch_blob_content serves files from it,
+    and builds the tree from the archive members (no listing requests).
+    """
+    if ARCHIVE_PATH:
+        store = await open_local_archive(ARCHIVE_PATH)
+        commit_sha = store.commit_sha
+    else:
+        commit_sha = commit_sha or await parser.resolve_commit(repo_url)
+        owner, repo = parser._get_repo_name(repo_url).split("/")
+        store = await download_archive(parser.contents_api, owner, repo, commit_sha, parser.headers)
+
+    register_archive(parser.raw_prefix(repo_url), store)
+    all_files = await asyncio.to_thread(store.list_files)
+    repo_tree = await parser.get_dir_tree(repo_url, all_files=all_files)
+    return repo_tree, commit_sha
 
 async def fetch_repo_metadata_node(state: dict) -> dict:
     """
     First node of the workflow:
     - Reads repository URL from state['url']
     - Calls GitRepoParser to get metadata tree
-    - Updates state with repo_tree
+      (or the repo archive when INGEST_MODE is "archive")
+    - Updates state with repo_tree, its file catalog and the resolved commit
     """
 
     # print("Initializing Fetch Repo Metadata Node...")
@@ -15,22 +38,24 @@ async def fetch_repo_metadata_node(state: dict) -> dict:
     repo_url = state.get("url", None)
     if not repo_url:
         return {
-            "messages": state["messages"] + [
-                SystemMessage(content="No repository URL provided.")
-            ]
+            "status": ["No repository URL provided."]
         }
 
     try:
         parser = GitRepoParser()
-        repo_tree = parser.get_dir_tree(repo_url)
+        if INGEST_MODE == "archive":
+            repo_tree, commit_sha = await _load_from_archive(parser, repo_url, state.get("commit_sha"))
+        else:
+            commit_sha = state.get("commit_sha") or await parser.resolve_commit(repo_url)
+            repo_tree = await parser.get_dir_tree(repo_url, ref=commit_sha)
 
         # print("Repo metadata tree fetched successfully!")
         # print(f"State Variable: {state}")
         return {
             "repo_tree": repo_tree,
-            "messages": state["messages"] + [
-                SystemMessage(content=f"Fetched metadata tree for: {repo_url}")
-            ]
+            "file_catalog": FileCatalog.from_tree(repo_tree),
+            "commit_sha": commit_sha,
+            "status": [f"Fetched metadata tree for: {repo_url} @ {commit_sha}"]
         }
 
     except Exception as e:
@@ -38,7 +63,5 @@ async def fetch_repo_metadata_node(state: dict) -> dict:
         print(err)
         return {
             "repo_tree": {},
-            "messages": state["messages"] + [
-                SystemMessage(content=err)
-            ]
+            "status": [err]
         }
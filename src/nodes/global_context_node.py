@@ -1,7 +1,13 @@
-import base64
-import requests
 from langchain_core.messages import SystemMessage, HumanMessage
-from src.utils.flatten_tree import flatten_tree
+from src.utils.file_catalog import get_catalog
+from src.utils.directory_digest import (
+    cached_digest,
+    directory_digests,
+    file_listing,
+    format_children,
+    key_file_snippets,
+    subtree_hashes,
+)
 
 async def global_context_node(state: dict)->dict: #AgentState)->AgentState
     """
@@ -9,6 +15,13 @@ async def global_context_node(state: dict)->dict: #AgentState)->AgentState
     on metadata tree fetched from GitRepoParser object. 
     Produces a brief summary of repo structure, key folders and 
     relationships.
+
+    Every directory is digested first (src/utils/directory_digest.py);
+    the overview is the root digest, written from the top-level files
+    and the digests of the top-level directories. Both are cached by
+    subtree hash, so unchanged parts of the repo cost no LLM calls.
+    Digests written from a failed directory's fallback are not cached,
+    and digests_degraded keeps the run out of the snapshot.
     """
 
     # print("-----Initializing Global Context Node-----")
@@ -19,35 +32,28 @@ async def global_context_node(state: dict)->dict: #AgentState)->AgentState
         print("No repo tree found in the state")
         return {"global_context": "No repo structure available"}
     
-    flattened = flatten_tree(repo_tree)
-    # print("flattened tree struture: ", flattened)
-    imp_file = [
-        f for f in flattened if any(
-            kw in f["path"].lower() for kw in [
-                "README", "setup", "main", "app", "requirements", "scripts", "configs"
-            ]
-        )
-    ][:5]
-    headers = []
+    catalog = get_catalog(state)
+    llm = state.get("llm")
 
-    for file_meta in imp_file:
-        try:
-            file_data = requests.get(file_meta["url"]).json()
-            content_b64 = file_data.get("content", "")
-            decoded = base64.b64decode(content_b64).decode("utf-8", errors="ignore")
-            snippet = "\n".join(decoded.splitlines()[:10])
-            headers.append(f"{file_meta['path']}:\n{snippet}\n")
-        except Exception as e:
-            headers.append(f"{file_meta['path']}: <Error in fetching snippet: {e}>")
-    
-    tree_summ = "\n".join([f"- {f['path']} ({f['ext']}, {f['size_kb']} KB)" for f in flattened[:60]])
+    hashes = subtree_hashes(catalog)
+    digests, degraded = await directory_digests(catalog, llm, hashes)
+    top_level = {d: digests[d] for d in sorted(digests) if d.count("/") == 1}
 
-    prompt = f"""
+    async def produce() -> str:
+        root_files = catalog.filter("", max_depth=0)
+        # Only the first 10 lines of each are used
+        headers = await key_file_snippets(
+            catalog, root_files, 5, names=["readme", "setup", "main", "app", "requirements", "pyproject"]
+        )
+        prompt = f"""
                 You are an expert software architect. 
                 Below is a summary of a GitHub repository structure and small snippets from key files.
 
-                ### File Structure (first 60 files):
-                {tree_summ}
+                ### Top-Level Files:
+                {file_listing(catalog, root_files, "")}
+
+                ### Top-Level Directories:
+                {format_children(top_level, "")}
 
                 ### Key File Headers:
                 {headers if headers else 'No key files found.'}
@@ -58,7 +64,7 @@ async def global_context_node(state: dict)->dict: #AgentState)->AgentState
                 3. How these modules might interact logically (e.g., data → model → evaluation).
                 4. Which parts appear to be core, supporting, or documentation.
                 """
-    system_msg = SystemMessage(
+        system_msg = SystemMessage(
                 content= """
                 You are an expert github repository summarizer 
                 and provide insights on what functions and modules
@@ -66,12 +72,12 @@ async def global_context_node(state: dict)->dict: #AgentState)->AgentState
                 to each other. Helping fellow user in understanding 
                 the repository basically in leymann terms if possible.
                             """)
-    human_msg = HumanMessage(content = prompt)
+        human_msg = HumanMessage(content = prompt)
 
-    llm = state.get("llm")
+        response = await llm.ainvoke([system_msg, human_msg])
+        return response.content.strip()
 
-    response = await llm.ainvoke([system_msg, human_msg])
-    global_summ = response.content.strip()
+    global_summ = await cached_digest("root", hashes[""], produce, store=not degraded)
 
     # print("||| Global Context Summary created successfully |||")
-    return {"global_context": global_summ}
\ No newline at end of file
+    return {"global_context": global_summ, "directory_digests": digests, "digests_degraded": bool(degraded)}
\ No newline at end of file
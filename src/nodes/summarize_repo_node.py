@@ -1,12 +1,17 @@
 # nodes/summarize_repo_node.py
 from langchain_core.messages import SystemMessage, HumanMessage, AIMessage
-from src.config.settings import MAX_CHUNKS, LLM
+from src.config.settings import CONTEXT_TOKEN_BUDGET
+from src.utils.context_packer import pack_context
+from src.utils.conversation_memory import format_conversation, remember_turn
 
 async def summarize_repo_node(state: dict) -> dict:
     """
     Final summarization node.
     Combines global context + parsed files + user query
     into a multi-chat answer.
+
+    The prompt includes the conversation memory, so its LLM cache entry
+    only matches at the same point of a conversation (see llm_cache.py).
     """
 
     # print("Initializing Summarize Repo Node...") 
@@ -18,12 +23,13 @@ async def summarize_repo_node(state: dict) -> dict:
     keywords = state.get("keywords", [])
     targets = state.get("targets", {})
     selected_files = state.get("selected_files", [])
+    symbol_hits = state.get("symbol_hits") or "None"
+    directory_context = state.get("directory_context") or "None"
+    conversation = state.get("conversation")
 
 
     if not llm:
-        return {"messages": state.get("messages", []) + [
-            SystemMessage(content="LLM not found in state, cannot summarize.")
-        ]}
+        return {"status": ["LLM not found in state, cannot summarize."]}
 
     user_query = ""
     for msg in reversed(state.get("messages", [])):
@@ -32,27 +38,33 @@ async def summarize_repo_node(state: dict) -> dict:
             # print(user_query)
             break
     
+    asked = bool(user_query)
     if not user_query:
         user_query = "Provide a summary of this repository."
 
-    # Reduce parsed files to a manageable token length
-    merged_chunks = []
-
     selected_paths = [f.get("path") for f in selected_files if isinstance(f, dict)]
     # selected_paths_preview = "\n".join(f"- {p}" for p in selected_paths[:20])
 
-    for f in parsed_files: #parsed_files[:MAX_CHUNKS]:
-        path = f.get("path", "<unknown>")
-        print(f"these are the files which are used by summarizer node: {path}")
-        parsed_text = f.get("parsed", "")
-        merged_chunks.append(f"\n### File: {path}\n{parsed_text}\n")
-
-    merged_text = "\n".join(merged_chunks[:8000])
+    # Pack the most relevant parsed files into a fixed token budget
+    packed = pack_context(
+        parsed_files,
+        CONTEXT_TOKEN_BUDGET,
+        query=user_query,
+        keywords=keywords,
+        targets=targets,
+        selected_paths=selected_paths,
+    )
+    merged_text = packed.text
+    print(
+        f"Context packed: {len(packed.included)} files ({len(packed.trimmed)} trimmed), "
+        f"{len(packed.dropped)} dropped, ~{packed.tokens} tokens."
+    )
 
     system_msg = SystemMessage(content="""
             "You are an expert software engineer and code analysis assistant. "
             "You receive:\n"
             "- A high-level repository context\n"
+            "- Digests of the asked-about directory, when there is one\n"
             "- A list of selected relevant files\n"
             "- Parsed content from those files\n"
             "- The user's question\n"
@@ -78,10 +90,19 @@ async def summarize_repo_node(state: dict) -> dict:
             Global Repository Context:
             {global_context}
 
+            Conversation So Far:
+            {format_conversation(conversation)}
+
             Selected Files (preview):
             {selected_paths}
 
-            Parsed File Content (truncated to {MAX_CHUNKS} files):
+            Symbol Index Matches (path:line):
+            {symbol_hits}
+
+            Directory Digests:
+            {directory_context}
+
+            Parsed File Content ({len(packed.included)} most relevant files, {len(packed.dropped)} omitted for length):
             {merged_text}
 
             Now, based on the above information, answer the user's question as clearly and concretely as possible.
@@ -94,13 +115,16 @@ async def summarize_repo_node(state: dict) -> dict:
 
             If something cannot be determined from the provided context, clearly state the limitation.
 """)
-    # llm = state.get("llm")
-    llm = LLM
     response = await llm.ainvoke([system_msg, human_msg])
     # print(f"Response Variable: {response}")
-    new_ai_msg = AIMessage(content=response.content)
+    new_ai_msg = AIMessage(content=response.content, usage_metadata=getattr(response, "usage_metadata", None))
 
-    return {
+    update = {
         "summary": response.content,
+        "context_files": packed.included,
+        "context_dropped": packed.dropped,
         "messages": [new_ai_msg],
     }
+    if asked:
+        update["conversation"] = remember_turn(conversation, user_query, response.content)
+    return update
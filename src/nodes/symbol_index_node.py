@@ -0,0 +1,24 @@
+# nodes/symbol_index_node.py
+from src.utils.file_catalog import get_catalog
+from src.utils.symbol_index import new_symbol_index, index_files
+
+async def symbol_index_node(state: dict) -> dict:
+    """
+    Indexing node that builds the repository-wide symbol index:
+    every .py file in repo_tree is fetched and its definitions, imports
+    and references are recorded with their line numbers.
+    """
+
+    repo_tree = state.get("repo_tree")
+    if not repo_tree:
+        return {"symbol_index": new_symbol_index()}
+
+    index = new_symbol_index()
+    catalog = get_catalog(state)
+    count = await index_files(index, catalog.files(catalog.by_ext(".py")))
+
+    print(f"Symbol index built from {count} Python files ({len(index['defs'])} defined names).")
+    return {
+        "symbol_index": index,
+        "status": [f"Indexed symbols of {count} Python files."]
+    }
@@ -2,10 +2,58 @@
 import json
 import yaml
 
+PARSER_VERSION = 2  # truncated input handling
+
+_CLOSERS = {"{": "}", "[": "]"}
+
+
+def close_partial_json(raw: str):
+    """
+    Best-effort parse of a JSON document cut off at an arbitrary byte
+    (a byte-capped read). The text is cut back to the last complete value
+    and every open object / array is closed. Returns the parsed data, or
+    None when nothing usable is left.
+    """
+    stack = []
+    in_string = escaped = False
+    cut = None  # end of the last complete value at a container boundary
+    for i, ch in enumerate(raw):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+            continue
+        if ch == '"':
+            in_string = True
+        elif ch in _CLOSERS:
+            stack.append(ch)
+        elif ch in "}]":
+            if stack:
+                stack.pop()
+            cut = (i + 1, tuple(stack))
+        elif ch == ",":
+            cut = (i, tuple(stack))
+
+    if cut is None:
+        return None
+    end, open_containers = cut
+    candidate = raw[:end].rstrip().rstrip(",")
+    candidate += "".join(_CLOSERS[c] for c in reversed(open_containers))
+    try:
+        return json.loads(candidate)
+    except ValueError:
+        return None
+
+
 def parse_json_yaml(raw: str) -> str:
     """
     Safely prettify JSON or YAML.
     Returns clean structure up to a safe token limit.
+    Input may be only the head of a large file; truncated JSON is closed
+    and truncated YAML is cut at its last complete line.
     """
 
     # Try JSON first
@@ -16,13 +64,19 @@ def parse_json_yaml(raw: str) -> str:
     except:
         pass
 
-    # Try YAML
-    try:
-        data = yaml.safe_load(raw)
-        pretty = yaml.dump(data, default_flow_style=False)
-        return pretty[:5000]
-    except:
-        pass
+    if raw.lstrip().startswith(("{", "[")):
+        data = close_partial_json(raw)
+        if data is not None:
+            return json.dumps(data, indent=2)[:5000]
+
+    # Try YAML, then YAML without a possibly cut-off last line
+    for text in (raw, raw[:raw.rfind("\n") + 1]):
+        try:
+            data = yaml.safe_load(text)
+            pretty = yaml.dump(data, default_flow_style=False)
+            return pretty[:5000]
+        except:
+            pass
 
     # Fallback = raw head
     return raw[:5000]
@@ -1,6 +1,8 @@
 # tools/parse_markdown.py
 import re
 
+PARSER_VERSION = 1
+
 def parse_markdown(raw: str) -> str:
     """
     Clean markdown / text files for LLM processing.
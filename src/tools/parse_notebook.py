@@ -1,6 +1,20 @@
 # tools/parse_notebook.py
 import nbformat
 
+from src.tools.parse_json_yaml import close_partial_json
+
+PARSER_VERSION = 2  # truncated input handling
+
+
+def _partial_cells(raw: str) -> list:
+    """
+    Cells of a notebook whose JSON was cut off by a byte-capped read:
+    the complete cells before the cut, as plain dicts.
+    """
+    data = close_partial_json(raw)
+    cells = data.get("cells") if isinstance(data, dict) else None
+    return [c for c in cells or [] if isinstance(c, dict) and "source" in c]
+
 def parse_notebook(raw: str) -> str:
     """
     Extracts markdown + code cells from a .ipynb file.
@@ -8,17 +22,22 @@ def parse_notebook(raw: str) -> str:
     """
 
     try:
-        nb = nbformat.reads(raw, as_version=4)
+        cells = nbformat.reads(raw, as_version=4).cells
     except Exception:
-        return raw[:5000]
+        cells = _partial_cells(raw)
+        if not cells:
+            return raw[:5000]
 
     out = []
 
-    for cell in nb.cells:
-        if cell.cell_type == "markdown":
-            out.append("## Markdown Cell:\n" + cell.source)
-        elif cell.cell_type == "code":
-            out.append("## Code Cell:\n" + cell.source)
+    for cell in cells:
+        source = cell.get("source", "")
+        if isinstance(source, list):  # raw nbformat JSON stores lines
+            source = "".join(source)
+        if cell.get("cell_type") == "markdown":
+            out.append("## Markdown Cell:\n" + source)
+        elif cell.get("cell_type") == "code":
+            out.append("## Code Cell:\n" + source)
     # print(f"Checking Execution of parse_notebook tool: {out}")
 
     return "\n\n".join(out)[:8000]
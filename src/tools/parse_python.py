@@ -1,5 +1,7 @@
 import ast
 
+PARSER_VERSION = 1  # bump when the summary format changes
+
 def parse_python(raw: str) -> str:
     """
     Extracts imports, classes, functions, and docstrings from a Python file.
@@ -70,3 +72,59 @@ def _clean_raw_python(raw: str):
             continue
         cleaned.append(line)
     return "\n".join(cleaned)
+
+
+def extract_symbols(raw: str) -> dict:
+    """
+    Collects symbol locations from a Python file for the symbol index:
+      - defs:    [name, line, kind, qualname] for functions, classes, methods
+                 and annotated module-level assignments
+      - imports: [alias, line, imported target]
+      - refs:    [name, line] for calls and attribute/name references
+    Returns empty lists when the file does not parse.
+    """
+    symbols = {"defs": [], "imports": [], "refs": []}
+    try:
+        tree = ast.parse(raw)
+    except Exception:
+        return symbols
+
+    def visit_body(body, scope):
+        for node in body:
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                kind = "method" if scope else "function"
+                symbols["defs"].append([node.name, node.lineno, kind, ".".join(scope + [node.name])])
+            elif isinstance(node, ast.ClassDef):
+                symbols["defs"].append([node.name, node.lineno, "class", ".".join(scope + [node.name])])
+                visit_body(node.body, scope + [node.name])
+            elif isinstance(node, ast.AnnAssign) and not scope and isinstance(node.target, ast.Name):
+                symbols["defs"].append([node.target.id, node.lineno, "variable", node.target.id])
+
+    visit_body(tree.body, [])
+
+    seen = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                name = alias.asname or alias.name.split(".")[0]
+                symbols["imports"].append([name, node.lineno, alias.name])
+            continue
+
+        if isinstance(node, ast.ImportFrom):
+            for alias in node.names:
+                target = f"{node.module}.{alias.name}" if node.module else alias.name
+                symbols["imports"].append([alias.asname or alias.name, node.lineno, target])
+            continue
+
+        if isinstance(node, ast.Attribute):
+            ref = (node.attr, node.lineno)
+        elif isinstance(node, ast.Name) and isinstance(node.ctx, ast.Load) and node.id not in ("self", "cls"):
+            ref = (node.id, node.lineno)
+        else:
+            continue
+
+        if ref not in seen:
+            seen.add(ref)
+            symbols["refs"].append(list(ref))
+
+    return symbols
@@ -0,0 +1,217 @@
+"""
+Archive ingestion backend.
+Downloads the repository tarball once for a resolved commit (or reads a
+local .tar.gz) and serves file contents straight from it.
+
+The gzip stream is inflated into a single temporary .tar file, members are
+indexed by their data offset and reads are served from a memory map, so no
+file is ever extracted to disk.
+
+Re-registering a repo retires the old store instead of closing it: it is
+closed once its last in-flight read finishes. Temporary .tar files we
+created are removed on close, and every store still open is closed at
+interpreter exit (close_archives).
+"""
+import asyncio
+import atexit
+import hashlib
+import mmap
+import os
+import tarfile
+import tempfile
+import threading
+import zlib
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+from src.utils.github_http import github_download
+
+
+# Every store not closed yet, so exit can remove the temp files we own
+_OPEN = set()
+
+
+class ArchiveStore:
+    def __init__(self, tar_path: str, owned: bool = False):
+        self.tar_path = tar_path
+        self.owned = owned  # temp file created by us, removed on close()
+        self.members: Dict[str, Tuple[int, int]] = {}  # path -> (offset, size)
+        self.commit_sha: Optional[str] = None
+
+        self._index()
+
+        self._fh = open(tar_path, "rb")
+        self._map = mmap.mmap(self._fh.fileno(), 0, access=mmap.ACCESS_READ) if os.path.getsize(tar_path) else None
+        self._lock = threading.Lock()
+        self._readers = 0
+        self._retired = False
+        self.closed = False
+        _OPEN.add(self)
+
+    def _index(self):
+        with tarfile.open(self.tar_path, "r:") as tar:
+            # GitHub stores the commit id in the pax global header
+            self.commit_sha = tar.pax_headers.get("comment")
+            members = [m for m in tar if m.isfile()]
+
+        # GitHub archives wrap everything into "<owner>-<repo>-<sha>/"
+        roots = {m.name.split("/", 1)[0] for m in members}
+        strip = len(roots) == 1 and all("/" in m.name for m in members)
+
+        for m in members:
+            path = m.name.split("/", 1)[1] if strip else m.name
+            self.members[path] = (m.offset_data, m.size)
+
+    @contextmanager
+    def _reading(self):
+        """
+        Marks an in-flight read; yields False when the store is already closed.
+        A retired store is closed when its last reader leaves.
+        """
+        with self._lock:
+            open_ = not self.closed
+            if open_:
+                self._readers += 1
+        if not open_:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            with self._lock:
+                self._readers -= 1
+                close = self._retired and self._readers == 0
+            if close:
+                self.close()
+
+    def read(self, path: str, max_bytes: Optional[int] = None) -> Optional[bytes]:
+        """
+        Returns the bytes of one member (at most max_bytes), or None when
+        absent or the store was closed.
+        """
+        entry = self.members.get(path)
+        if entry is None or self._map is None:
+            return None
+        offset, size = entry
+        if max_bytes is not None:
+            size = min(size, max_bytes)
+        with self._reading() as open_:
+            # Slicing copies, so the bytes outlive the memory map
+            return self._map[offset:offset + size] if open_ else None
+
+    def list_files(self) -> List[Dict]:
+        """
+        Flat list of file metadata in the shape of the Git Trees API
+        (path, size, git blob sha), so the repo tree can be built offline.
+        """
+        files = []
+        with self._reading() as open_:
+            if not open_:
+                raise ValueError(f"archive {self.tar_path} is closed")
+            for path, (offset, size) in self.members.items():
+                blob = hashlib.sha1(f"blob {size}\0".encode())
+                blob.update(self._map[offset:offset + size] if size else b"")
+                files.append({"path": path, "type": "blob", "size": size, "sha": blob.hexdigest()})
+        return files
+
+    def retire(self):
+        """
+        Closes the store once no read is in flight (at once when idle).
+        """
+        with self._lock:
+            self._retired = True
+            close = self._readers == 0
+        if close:
+            self.close()
+
+    def close(self):
+        with self._lock:
+            if self.closed:
+                return
+            self.closed = True
+        _OPEN.discard(self)
+        if self._map is not None:
+            self._map.close()
+        self._fh.close()
+        if self.owned and os.path.exists(self.tar_path):
+            os.remove(self.tar_path)
+
+
+def _inflate_file(src_path: str) -> str:
+    """
+    Inflates a local .tar.gz into a temporary .tar, chunk by chunk.
+    """
+    inflater = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    fd, tar_path = tempfile.mkstemp(suffix=".tar")
+    with os.fdopen(fd, "wb") as dst, open(src_path, "rb") as src:
+        for chunk in iter(lambda: src.read(1 << 20), b""):
+            dst.write(inflater.decompress(chunk))
+        dst.write(inflater.flush())
+    return tar_path
+
+
+async def open_local_archive(path: str) -> ArchiveStore:
+    """
+    Opens a local .tar.gz / .tgz / .tar archive.
+    """
+    if path.endswith((".tar.gz", ".tgz")):
+        tar_path = await asyncio.to_thread(_inflate_file, path)
+        return await asyncio.to_thread(ArchiveStore, tar_path, True)
+    return await asyncio.to_thread(ArchiveStore, path, False)
+
+
+async def download_archive(api_base: str, owner: str, repo: str, ref: str, headers=None) -> ArchiveStore:
+    """
+    Downloads the tarball of owner/repo at ref, inflating the gzip stream
+    into a temporary .tar while it downloads.
+    """
+    url = f"{api_base}{owner}/{repo}/tarball/{ref}"
+    inflater = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    fd, tar_path = tempfile.mkstemp(suffix=".tar")
+
+    try:
+        with os.fdopen(fd, "wb") as dst:
+            status = await github_download(url, lambda chunk: dst.write(inflater.decompress(chunk)), headers=headers)
+            dst.write(inflater.flush())
+        if status != 200:
+            raise ValueError(f"Error {status}: could not download archive for {owner}/{repo}@{ref}")
+        return await asyncio.to_thread(ArchiveStore, tar_path, True)
+    except Exception:
+        os.remove(tar_path)
+        raise
+
+
+# Registered archives, keyed by the raw URL prefix of the repo they serve
+_ARCHIVES: Dict[str, ArchiveStore] = {}
+
+
+def register_archive(raw_prefix: str, store: ArchiveStore):
+    old = _ARCHIVES.pop(raw_prefix, None)
+    _ARCHIVES[raw_prefix] = store
+    if old is not None and old is not store:
+        # Fetches may still be reading it; it closes after the last one
+        old.retire()
+
+
+def archive_for(url: str) -> Tuple[Optional[ArchiveStore], str]:
+    """
+    Finds the registered archive serving a raw file URL.
+    Returns (store, path inside the repo) or (None, "").
+    """
+    for prefix, store in _ARCHIVES.items():
+        if url.startswith(prefix):
+            return store, url[len(prefix):]
+    return None, ""
+
+
+def close_archives():
+    """
+    Closes every archive store still open and removes the temporary .tar
+    files they own. Registered at exit.
+    """
+    _ARCHIVES.clear()
+    for store in list(_OPEN):
+        store.close()
+
+
+atexit.register(close_archives)
@@ -0,0 +1,54 @@
+"""
+Per-batch memo for file fetches and parses.
+
+Inside a `with batch_memo():` block every blob is fetched at most once and
+every file parsed at most once, however many concurrent graph runs ask
+for it: the first caller starts the work, later callers await the same
+future. Outside such a block nothing is memoized.
+
+The memo lives in a ContextVar, so tasks created inside the block (the
+per-question tasks of a bulk QA run) share it and nothing leaks into
+unrelated runs.
+"""
+import asyncio
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Awaitable, Callable, Dict, Hashable, Optional
+
+
+class BatchMemo:
+    def __init__(self):
+        self.futures: Dict[Hashable, asyncio.Future] = {}
+        self.values: Dict[Hashable, object] = {}
+        self.started = 0
+        self.shared = 0
+
+    async def single_flight(self, key: Hashable, factory: Callable[[], Awaitable]):
+        future = self.futures.get(key)
+        if future is None:
+            self.started += 1
+            future = self.futures[key] = asyncio.ensure_future(factory())
+        else:
+            self.shared += 1
+        # shield: one cancelled waiter must not cancel the shared fetch
+        return await asyncio.shield(future)
+
+    def stats(self) -> dict:
+        return {"started": self.started, "shared": self.shared, "values": len(self.values)}
+
+
+_current: ContextVar[Optional[BatchMemo]] = ContextVar("batch_memo", default=None)
+
+
+@contextmanager
+def batch_memo():
+    memo = BatchMemo()
+    token = _current.set(memo)
+    try:
+        yield memo
+    finally:
+        _current.reset(token)
+
+
+def current_memo() -> Optional[BatchMemo]:
+    return _current.get()
@@ -0,0 +1,118 @@
+"""
+Token-budgeted context packing for summarize_repo_node.
+
+Parsed file chunks are ranked by relevance to the current question
+(query text, keywords, targets, files selected this turn) and packed
+greedily into a fixed token budget. A chunk that does not fit is trimmed
+at structural boundaries (markdown headings / blank lines) when enough
+budget is left, otherwise it is dropped. The prompt therefore stays the
+same size no matter how many files the session has parsed.
+"""
+import math
+from collections import Counter
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional
+
+from src.utils.search_index import tokenize
+
+MIN_TRIM_TOKENS = 200  # don't bother trimming a chunk into less than this
+
+
+class PackedContext(NamedTuple):
+    text: str
+    included: List[str]   # paths, in prompt order
+    trimmed: List[str]    # included paths that were cut down
+    dropped: List[str]    # paths that did not fit
+    tokens: int
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Cheap tokenizer stand-in: ~4 characters per token.
+    """
+    return (len(text) + 3) // 4
+
+
+def _chunk(path: str, text: str) -> str:
+    return f"\n### File: {path}\n{text}\n"
+
+
+def _score(path: str, text: str, query_terms: Counter, selected: set, targets: Dict) -> float:
+    if not query_terms:
+        return 1.0 if path in selected else 0.0
+    terms = Counter(tokenize(path.replace("/", " ") + " " + text[:20000]))
+    overlap = sum(min(terms[t], 5) for t in query_terms)
+    score = overlap / math.log(2 + sum(terms.values()))
+    if path in selected:
+        score += 1.0
+    if any(str(v).lower().strip("/") in path.lower() for v in targets.values() if v):
+        score += 2.0
+    return score
+
+
+def _trim(path: str, text: str, budget: int, tokenizer: Callable[[str], int]) -> Optional[str]:
+    """
+    Longest prefix of whole blocks (split at headings / blank lines) that
+    fits the budget, or None when not even the first block fits.
+    """
+    blocks, current = [], []
+    for line in text.splitlines(keepends=True):
+        if current and (line.startswith("#") or not line.strip()):
+            blocks.append("".join(current))
+            current = []
+        current.append(line)
+    if current:
+        blocks.append("".join(current))
+
+    # Token counts are treated as additive across blocks
+    marker = "\n<... truncated to fit the context budget>"
+    used = tokenizer(_chunk(path, marker))
+    kept = []
+    for block in blocks:
+        used += tokenizer(block)
+        if used > budget:
+            break
+        kept.append(block)
+    text = "".join(kept).rstrip()
+    return _chunk(path, text + marker) if text.strip() else None
+
+
+def pack_context(
+    parsed_files: Iterable[Dict],
+    budget_tokens: int,
+    query: str = "",
+    keywords: Iterable[str] = (),
+    targets: Optional[Dict] = None,
+    selected_paths: Iterable[str] = (),
+    tokenizer: Callable[[str], int] = estimate_tokens,
+) -> PackedContext:
+    """
+    Packs parsed file chunks into budget_tokens, most relevant first.
+    """
+    targets = targets or {}
+    selected = set(selected_paths)
+    query_terms = Counter(tokenize(" ".join([query, *keywords, *map(str, targets.values())])))
+
+    ranked = sorted(
+        (f for f in parsed_files if f.get("path")),
+        key=lambda f: _score(f["path"], f.get("parsed", ""), query_terms, selected, targets),
+        reverse=True,
+    )
+
+    chunks, included, trimmed, dropped = [], [], [], []
+    remaining = budget_tokens
+    for f in ranked:
+        path, text = f["path"], f.get("parsed", "")
+        chunk = _chunk(path, text)
+        cost = tokenizer(chunk)
+        if cost > remaining:
+            chunk = _trim(path, text, remaining, tokenizer) if remaining >= MIN_TRIM_TOKENS else None
+            if chunk is None:
+                dropped.append(path)
+                continue
+            cost = tokenizer(chunk)
+            trimmed.append(path)
+        chunks.append(chunk)
+        included.append(path)
+        remaining -= cost
+
+    return PackedContext("\n".join(chunks), included, trimmed, dropped, budget_tokens - remaining)
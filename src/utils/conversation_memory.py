@@ -0,0 +1,87 @@
+"""
+Bounded conversation memory for QA sessions.
+
+state["conversation"] holds the dialogue as plain JSON-serializable data:
+
+    {
+      "turns":  [[question, answer], ...],   # last CONVERSATION_WINDOW turns, verbatim
+      "digest": "Q: ... -> A: ...\\n...",     # older turns, one line each
+    }
+
+When a turn falls out of the window it is folded into the digest as a
+single line (question + the first sentence of the answer). The digest is
+capped in characters, dropping its oldest lines first, so memory and
+prompt size stay the same on turn 5 and turn 500. Folding is extractive:
+no LLM call is made.
+
+Node status lines live in state["status"] (see add_status), not in the
+dialogue.
+"""
+import re
+from typing import Dict, List, Optional
+
+from src.config.settings import (
+    CONVERSATION_WINDOW,
+    CONVERSATION_TURN_CHARS,
+    CONVERSATION_DIGEST_CHARS,
+    STATUS_MAX_LINES,
+)
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s")
+
+
+def add_status(left: Optional[List[str]], right: Optional[List[str]]) -> List[str]:
+    """
+    Reducer for state["status"]: appends node status lines and keeps the
+    most recent STATUS_MAX_LINES.
+    """
+    return ((left or []) + (right or []))[-STATUS_MAX_LINES:]
+
+
+def new_conversation() -> Dict:
+    return {"turns": [], "digest": ""}
+
+
+def _clip(text: str, limit: int) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[:limit - 3].rstrip() + "..."
+
+
+def _digest_line(question: str, answer: str) -> str:
+    first_sentence = _SENTENCE_END.split(" ".join(answer.split()), 1)[0]
+    return f"Q: {_clip(question, 120)} -> A: {_clip(first_sentence, 200)}"
+
+
+def remember_turn(conversation: Optional[Dict], question: str, answer: str) -> Dict:
+    """
+    New conversation memory with one more turn. Turns leaving the window
+    are folded into the digest; the input is not modified.
+    """
+    conversation = conversation or new_conversation()
+    turns = conversation["turns"] + [[question, answer[:CONVERSATION_TURN_CHARS]]]
+    digest_lines = conversation["digest"].splitlines()
+
+    while len(turns) > CONVERSATION_WINDOW:
+        old_question, old_answer = turns.pop(0)
+        digest_lines.append(_digest_line(old_question, old_answer))
+
+    digest = "\n".join(digest_lines)
+    while len(digest) > CONVERSATION_DIGEST_CHARS and digest_lines:
+        digest_lines.pop(0)
+        digest = "\n".join(digest_lines)
+
+    return {"turns": turns, "digest": digest}
+
+
+def format_conversation(conversation: Optional[Dict]) -> str:
+    """
+    Prompt section with the digest of earlier turns and the recent turns.
+    """
+    if not conversation or not (conversation["turns"] or conversation["digest"]):
+        return "None (first question)."
+    parts = []
+    if conversation["digest"]:
+        parts.append("Earlier turns (digest):\n" + conversation["digest"])
+    for question, answer in conversation["turns"]:
+        parts.append(f"User: {question}\nAssistant: {answer}")
+    return "\n\n".join(parts)
@@ -0,0 +1,225 @@
+"""
+Hierarchical (map-reduce) repository summaries.
+
+Every directory gets a short digest written by the LLM from its own
+files and the digests of its subdirectories, so the tree is summarized
+bottom-up: leaf directories first, all of them concurrently (at most
+DIGEST_CONCURRENCY calls at a time), then each parent once its children
+are done, up to the root. global_context_node turns the top level into
+the repository overview.
+
+Directories deeper than DIGEST_MAX_DEPTH are not digested on their own;
+their files are listed in the digest of the ancestor at that depth.
+
+Digests are kept in digest_cache() under a Merkle hash of the directory's
+subtree (names and blob SHAs of everything below it, like a git tree
+SHA), so a later run only re-summarizes the directories on the path from
+a changed file to the root.
+
+A directory whose LLM call fails (rate limit, provider error) falls back
+to its plain file listing, and one failure never aborts the whole index.
+That directory and every ancestor (whose digests are written from the
+fallback) are degraded: none of them is cached, so the next run tries
+again.
+"""
+import asyncio
+import hashlib
+from collections import Counter
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from src.config.settings import (
+    DIGEST_CONCURRENCY,
+    DIGEST_MAX_DEPTH,
+    DIGEST_MAX_FILES,
+    DIGEST_SNIPPET_FILES,
+    IMPORTANT_NAMES,
+)
+from src.utils.disk_cache import digest_cache
+from src.utils.fetch_blob import fetch_blob_content
+from src.utils.file_catalog import FileCatalog
+
+# Bump whenever the digest prompts change, so cached digests are rewritten
+DIGEST_VERSION = 1
+
+_SYSTEM = SystemMessage(content="""
+                You summarize one directory of a GitHub repository for other
+                engineers: what it is for and what its main files and
+                subdirectories do. Be concrete and brief.
+                """)
+
+
+def _depth(directory: str) -> int:
+    return directory.count("/")
+
+
+def _files(catalog: FileCatalog, directory: str) -> List[int]:
+    """File ids a directory's digest covers: its own, or its whole subtree at the depth limit."""
+    if _depth(directory) >= DIGEST_MAX_DEPTH:
+        return catalog.filter(directory)
+    return catalog.filter(directory, max_depth=0)
+
+
+def _subdirs(catalog: FileCatalog, directory: str) -> List[str]:
+    if _depth(directory) >= DIGEST_MAX_DEPTH:
+        return []
+    return sorted(catalog.subdirs(directory))
+
+
+def subtree_hashes(catalog: FileCatalog) -> Dict[str, str]:
+    """
+    Merkle hash of every digested directory ("" is the root, others end in
+    "/"), over the names, blob SHAs and sizes of the files below it.
+    """
+    hashes = {}
+
+    def visit(directory: str) -> str:
+        entries = []
+        for fid in _files(catalog, directory):
+            meta = catalog.meta(fid)
+            entries.append(f"f {meta['path'][len(directory):]} {meta['sha'] or '-'} {meta['size_kb']}")
+        for sub in _subdirs(catalog, directory):
+            entries.append(f"d {sub[len(directory):]} {visit(sub)}")
+        hashes[directory] = hashlib.sha256("\n".join(sorted(entries)).encode("utf-8")).hexdigest()
+        return hashes[directory]
+
+    visit("")
+    return hashes
+
+
+async def cached_digest(
+    kind: str, subtree_hash: str, produce: Callable[[], Awaitable[str]], store: bool = True
+) -> str:
+    """
+    The digest stored for kind + subtree_hash, produced (and stored, unless
+    store is False) when there is none yet. Errors from produce() propagate
+    and nothing is stored.
+    """
+    cache = digest_cache()
+    key = f"{kind}:{DIGEST_VERSION}:{subtree_hash}"
+    if cache is not None:
+        cached = await asyncio.to_thread(cache.get, key)
+        if cached is not None:
+            return cached.decode("utf-8")
+    digest = await produce()
+    if cache is not None and digest and store:
+        await asyncio.to_thread(cache.set, key, digest.encode("utf-8"))
+    return digest
+
+
+def file_listing(catalog: FileCatalog, ids: List[int], directory: str) -> str:
+    """Up to DIGEST_MAX_FILES files, then the rest counted per extension."""
+    files = catalog.files(ids)
+    lines = [f"- {f['path'][len(directory):]} ({f['ext'] or 'no ext'}, {f['size_kb']} KB)"
+             for f in files[:DIGEST_MAX_FILES]]
+    rest = files[DIGEST_MAX_FILES:]
+    if rest:
+        counts = Counter(f["ext"] or "no ext" for f in rest)
+        lines.append(f"- ... and {len(rest)} more: " + ", ".join(f"{n} {ext}" for ext, n in counts.most_common()))
+    return "\n".join(lines) if lines else "(no files of its own)"
+
+
+async def key_file_snippets(
+    catalog: FileCatalog, ids: List[int], limit: int, names: List[str] = IMPORTANT_NAMES
+) -> List[str]:
+    """First 10 lines of up to limit files whose names contain one of names (README, main, ...)."""
+    files = [
+        meta for meta in catalog.files(ids)
+        if any(name in meta["path"].rsplit("/", 1)[-1].lower() for name in names)
+    ][:limit]
+    contents = await asyncio.gather(
+        *(fetch_blob_content(meta["url"], meta.get("sha"), max_bytes=4096) for meta in files)
+    )
+    return [
+        f"{meta['path']}:\n" + "\n".join(text.splitlines()[:10])
+        for meta, text in zip(files, contents) if text
+    ]
+
+
+def format_children(children: Dict[str, str], directory: str) -> str:
+    if not children:
+        return "(none)"
+    return "\n".join(f"- {sub[len(directory):]}: {digest}" for sub, digest in children.items())
+
+
+async def directory_digests(
+    catalog: FileCatalog, llm, hashes: Dict[str, str]
+) -> Tuple[Dict[str, str], Set[str]]:
+    """
+    Digests of every directory below the root, keyed like "src/utils/",
+    and the degraded directories: those whose digest, or a descendant's,
+    is a file-listing fallback. Children are summarized before (and feed
+    into) their parent.
+    """
+    digests: Dict[str, str] = {}
+    degraded: Set[str] = set()
+    slots = asyncio.Semaphore(DIGEST_CONCURRENCY)
+
+    async def summarize(directory: str) -> bool:
+        """Digests directory (and its subtree); True when it is degraded."""
+        subdirs = _subdirs(catalog, directory)
+        children_degraded = any(await asyncio.gather(*(summarize(sub) for sub in subdirs)))
+        children = {sub: digests[sub] for sub in subdirs}
+
+        async def produce() -> str:
+            ids = _files(catalog, directory)
+            snippets = await key_file_snippets(catalog, ids, DIGEST_SNIPPET_FILES)
+            prompt = f"""
+                Directory: {directory}
+
+                ### Files:
+                {file_listing(catalog, ids, directory)}
+
+                ### Subdirectories:
+                {format_children(children, directory)}
+
+                ### Key File Headers:
+                {chr(10).join(snippets) if snippets else 'None.'}
+
+                In 2-3 sentences, describe what this directory is for and
+                the role of its main files and subdirectories.
+                """
+            response = await llm.ainvoke([_SYSTEM, HumanMessage(content=prompt)])
+            return response.content.strip()
+
+        # Children are awaited outside the slot, so a parent never holds one
+        # while it waits for them
+        async with slots:
+            try:
+                digests[directory] = await cached_digest(
+                    "dir", hashes[directory], produce, store=not children_degraded
+                )
+            except Exception as e:
+                print(f"Digest of {directory} failed, using its file listing: {e}")
+                digests[directory] = file_listing(catalog, _files(catalog, directory), directory)
+                degraded.add(directory)
+        if children_degraded:
+            degraded.add(directory)
+        return directory in degraded
+
+    await asyncio.gather(*(summarize(sub) for sub in _subdirs(catalog, "")))
+    return digests, degraded
+
+
+def find_directory(digests: Dict[str, str], directory: str) -> Optional[str]:
+    """
+    The digested directory a question names: an exact (case-insensitive)
+    path, else the shortest one ending in that name ("utils" -> "src/utils/").
+    """
+    wanted = directory.strip().strip("/").lower()
+    if not wanted:
+        return None
+    wanted += "/"
+    matches = [d for d in digests if d.lower() == wanted or d.lower().endswith("/" + wanted)]
+    return min(matches, key=len) if matches else None
+
+
+def format_directory(digests: Dict[str, str], catalog: FileCatalog, directory: str) -> str:
+    """A directory's digest, its files and the digests of its subdirectories."""
+    subdirs = {d: digests[d] for d in sorted(digests) if d.startswith(directory) and d.count("/") == _depth(directory) + 1}
+    return (
+        f"{directory}: {digests[directory]}\n\n"
+        f"Files:\n{file_listing(catalog, catalog.filter(directory, max_depth=0), directory)}\n\n"
+        f"Subdirectories:\n{format_children(subdirs, directory)}"
+    )
@@ -0,0 +1,162 @@
+"""
+Persistent content-addressed caches.
+
+Each cache is a SQLite database (WAL mode, so several processes can read
+and write it at once) holding zstd-compressed values. The total stored
+size is capped; the least recently used entries are evicted first.
+
+Two tiers are used by the indexing pipeline:
+- blob_cache():  raw file bytes keyed by git blob SHA
+- parse_cache(): parser outputs keyed by (blob SHA, parser name, parser version)
+
+etag_cache() holds GitHub API responses with their ETag (see src/utils/github_http.py).
+
+llm_cache() holds chat model responses (see src/utils/llm_cache.py).
+"""
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+import zstandard
+
+from src.utils.instrumentation import record_cache
+from src.config.settings import CACHE_ENABLED, CACHE_DIR, BLOB_CACHE_MAX_MB, PARSE_CACHE_MAX_MB, LLM_CACHE_MAX_MB, ETAG_CACHE_MAX_MB, DIGEST_CACHE_MAX_MB
+
+
+class DiskCache:
+    def __init__(self, path: str, max_bytes: int, level: int = 3):
+        self.path = path
+        self.name = os.path.splitext(os.path.basename(path))[0]
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+        self.level = level
+        # zstd contexts are not thread-safe and get/set run in worker threads
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY, value BLOB NOT NULL,"
+            " size INTEGER NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries(accessed)")
+        self._db.execute("CREATE TABLE IF NOT EXISTS meta (id INTEGER PRIMARY KEY CHECK (id = 0), total INTEGER NOT NULL)")
+        self._db.execute("INSERT OR IGNORE INTO meta (id, total) VALUES (0, 0)")
+
+    def _zstd(self):
+        local = self._local
+        if not hasattr(local, "compressor"):
+            local.compressor = zstandard.ZstdCompressor(level=self.level)
+            local.decompressor = zstandard.ZstdDecompressor()
+        return local
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            row = self._db.execute("SELECT value FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                record_cache(self.name, False)
+                return None
+            self._db.execute("UPDATE entries SET accessed = ? WHERE key = ?", (time.time(), key))
+            self.hits += 1
+        record_cache(self.name, True)
+        return self._zstd().decompressor.decompress(row[0])
+
+    def set(self, key: str, value: bytes):
+        blob = self._zstd().compressor.compress(value)
+        with self._lock:
+            db = self._db
+            # IMMEDIATE takes the write lock up front so concurrent
+            # processes serialize their size bookkeeping
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                old = db.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+                db.execute(
+                    "INSERT OR REPLACE INTO entries (key, value, size, accessed) VALUES (?, ?, ?, ?)",
+                    (key, blob, len(blob), time.time()),
+                )
+                delta = len(blob) - (old[0] if old else 0)
+                total = db.execute("UPDATE meta SET total = total + ? WHERE id = 0 RETURNING total", (delta,)).fetchone()[0]
+                if total > self.max_bytes:
+                    self._evict(total)
+                db.execute("COMMIT")
+            except Exception:
+                db.execute("ROLLBACK")
+                raise
+
+    def delete(self, key: str):
+        with self._lock:
+            db = self._db
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                row = db.execute("DELETE FROM entries WHERE key = ? RETURNING size", (key,)).fetchone()
+                if row:
+                    db.execute("UPDATE meta SET total = total - ? WHERE id = 0", (row[0],))
+                db.execute("COMMIT")
+            except Exception:
+                db.execute("ROLLBACK")
+                raise
+
+    def _evict(self, total: int):
+        """
+        Drops least recently used entries until the cache is back under
+        90% of its cap. Runs inside the caller's write transaction.
+        """
+        target = int(self.max_bytes * 0.9)
+        freed = 0
+        rows = self._db.execute("SELECT key, size FROM entries ORDER BY accessed ASC")
+        victims = []
+        for key, size in rows:
+            if total - freed <= target:
+                break
+            victims.append((key,))
+            freed += size
+        self._db.executemany("DELETE FROM entries WHERE key = ?", victims)
+        self._db.execute("UPDATE meta SET total = total - ? WHERE id = 0", (freed,))
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses}
+
+
+_caches = {}
+
+
+def _get_cache(name: str, max_mb: int) -> Optional[DiskCache]:
+    if not CACHE_ENABLED:
+        return None
+    if name not in _caches:
+        _caches[name] = DiskCache(os.path.join(CACHE_DIR, f"{name}.sqlite3"), max_mb * 1024 * 1024)
+    return _caches[name]
+
+
+def blob_cache() -> Optional[DiskCache]:
+    """Raw blob bytes keyed by git blob SHA (None when caching is disabled)."""
+    return _get_cache("blobs", BLOB_CACHE_MAX_MB)
+
+
+def parse_cache() -> Optional[DiskCache]:
+    """Parser outputs keyed by "<sha>:<parser>:<version>" (None when caching is disabled)."""
+    return _get_cache("parsed", PARSE_CACHE_MAX_MB)
+
+
+def llm_cache() -> Optional[DiskCache]:
+    """Chat model responses keyed by a hash of model + messages (None when caching is disabled)."""
+    return _get_cache("llm", LLM_CACHE_MAX_MB)
+
+
+def etag_cache() -> Optional[DiskCache]:
+    """GitHub API response bodies with their ETag, keyed by URL (None when caching is disabled)."""
+    return _get_cache("etags", ETAG_CACHE_MAX_MB)
+
+
+def digest_cache() -> Optional[DiskCache]:
+    """Directory digests keyed by the hash of their subtree (None when caching is disabled)."""
+    return _get_cache("digests", DIGEST_CACHE_MAX_MB)
@@ -1,22 +1,61 @@
-import requests
+import asyncio
+from typing import Optional
 
-def fetch_blob_content(blob_url: str) -> str:
+from src.utils.github_http import RateLimitExceeded, github_get
+from src.utils.archive_store import archive_for
+from src.utils.disk_cache import blob_cache
+from src.utils.batch_memo import current_memo
+
+async def fetch_blob_content(blob_url: str, sha: Optional[str] = None, max_bytes: Optional[int] = None) -> str:
     """
-    Fetches the content of a GitHub blob (base64 encoded).
-    Safely decodes it into UTF-8 text.
+    Fetches the raw content of a GitHub file and decodes it into UTF-8 text.
+    When the blob sha is known the on-disk blob cache is checked first.
+    Otherwise served from the registered repo archive when one exists,
+    or through the shared async HTTP client.
+
+    With max_bytes at most that many bytes are read (Range request / early
+    close over HTTP); a multi-byte character cut at the end is dropped.
+    Only complete bodies are stored in the blob cache. Transient HTTP
+    failures are retried (see src/utils/github_http.py) before giving up.
+    Inside a batch_memo() block each (url, max_bytes) is fetched once.
     
     Returns:
         Decoded text (str), or an empty string on failure.
+
+    Raises:
+        RateLimitExceeded: the GitHub quota is gone for longer than
+        RATE_LIMIT_MAX_WAIT_SECONDS, so every other fetch would fail too.
     """
+    memo = current_memo()
+    if memo is None:
+        return await _fetch_blob_content(blob_url, sha, max_bytes)
+    return await memo.single_flight(
+        ("blob", blob_url, max_bytes), lambda: _fetch_blob_content(blob_url, sha, max_bytes)
+    )
+
+async def _fetch_blob_content(blob_url: str, sha: Optional[str], max_bytes: Optional[int]) -> str:
+    cache = blob_cache() if sha else None
+    if cache is not None:
+        data = await asyncio.to_thread(cache.get, sha)
+        if data is not None:
+            return data[:max_bytes].decode("utf-8", errors="ignore")
+
+    store, path = archive_for(blob_url)
+    if store is not None:
+        data = store.read(path, max_bytes)
+        if data is not None:
+            return data.decode("utf-8", errors="ignore")
 
     try:
-        # GitHub blob API returns JSON containing base64 content
-        response = requests.get(blob_url)
-        response.raise_for_status()
-        # data = response.json()
-        data = response.text
-        return data
-    
+        response = await github_get(blob_url, max_bytes=max_bytes)
+        if response.status not in (200, 206):
+            raise ValueError(f"HTTP {response.status}")
+        if cache is not None and not response.truncated:
+            await asyncio.to_thread(cache.set, sha, response.body)
+        return response.text
+
+    except RateLimitExceeded:
+        raise
     except Exception as e:
         print(f"Error fetching blob content from {blob_url}: {e}")
         return ""
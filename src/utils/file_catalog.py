@@ -0,0 +1,254 @@
+"""
+Compact columnar catalog of the files in a repo tree.
+
+Built once per index from repo_tree and kept in state["file_catalog"]:
+- path segments and extensions are interned (stored once, referenced by id)
+- per-file size / extension id / sha live in parallel arrays
+- raw URLs are derived on demand from one shared prefix
+- directories form a path-prefix trie, so directory lookups and
+  extension / size filters do not scan every file
+- a (directory node, name) -> file id dict makes path lookups O(1), even
+  in large flat directories
+
+The catalog is also a read-only Mapping of path -> metadata dict (the same
+shape flatten_tree returns), so existing node code can keep using dicts.
+"""
+import bisect
+from array import array
+from collections.abc import Mapping
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from src.utils.flatten_tree import flatten_tree
+
+_NO_SHA = bytes(20)
+
+
+class FileCatalog(Mapping):
+    def __init__(self, raw_prefix: str = ""):
+        self.raw_prefix = raw_prefix
+
+        # Interned strings
+        self._segments: List[str] = []
+        self._segment_ids: Dict[str, int] = {}
+        self._exts: List[str] = []
+        self._ext_ids: Dict[str, int] = {}
+
+        # Per-file columns, indexed by file id
+        self._dir = array("I")        # trie node of the parent directory
+        self._name = array("I")       # segment id of the file name
+        self._ext = array("H")        # extension id
+        self._size = array("f")       # size in KB
+        self._sha = bytearray()       # 20 bytes per file, zeros when unknown
+        self._by_ext: Dict[int, array] = {}
+        self._by_size: Optional[array] = None  # file ids sorted by size, built lazily
+        self._sorted_sizes = array("f")
+        self._fid_of: Dict[Tuple[int, int], int] = {}  # (dir node, name id) -> file id
+
+        # Directory trie, indexed by node id (node 0 is the repo root)
+        self._node_parent = array("i", [-1])
+        self._node_name = array("I", [0])
+        self._node_children: List[Dict[int, int]] = [{}]
+        self._node_files: List[array] = [array("I")]
+
+    def _intern(self, value: str) -> int:
+        sid = self._segment_ids.get(value)
+        if sid is None:
+            sid = self._segment_ids[value] = len(self._segments)
+            self._segments.append(value)
+        return sid
+
+    def _ext_id(self, ext: str) -> int:
+        eid = self._ext_ids.get(ext)
+        if eid is None:
+            eid = self._ext_ids[ext] = len(self._exts)
+            self._exts.append(ext)
+        return eid
+
+    def _dir_node(self, folders: List[str], create: bool = True) -> Optional[int]:
+        node = 0
+        for folder in folders:
+            sid = self._intern(folder) if create else self._segment_ids.get(folder)
+            child = self._node_children[node].get(sid) if sid is not None else None
+            if child is None:
+                if not create:
+                    return None
+                child = len(self._node_children)
+                self._node_children[node][sid] = child
+                self._node_parent.append(node)
+                self._node_name.append(sid)
+                self._node_children.append({})
+                self._node_files.append(array("I"))
+            node = child
+        return node
+
+    def add(self, meta: Dict):
+        """
+        Adds one file entry (a repo_tree metadata dict).
+        """
+        parts = meta["path"].split("/")
+        node = self._dir_node(parts[:-1])
+        fid = len(self._name)
+        eid = self._ext_id(meta.get("ext", ""))
+        sid = self._intern(parts[-1])
+
+        self._dir.append(node)
+        self._name.append(sid)
+        self._fid_of.setdefault((node, sid), fid)
+        self._ext.append(eid)
+        self._size.append(meta.get("size_kb", 0) or 0)
+        sha = meta.get("sha")
+        self._sha += bytes.fromhex(sha) if sha else _NO_SHA
+        self._node_files[node].append(fid)
+        self._by_ext.setdefault(eid, array("I")).append(fid)
+        self._by_size = None
+
+    @classmethod
+    def from_tree(cls, repo_tree: Dict) -> "FileCatalog":
+        files = flatten_tree(repo_tree)
+        raw_prefix = ""
+        if files and files[0].get("url"):
+            url, path = files[0]["url"], files[0]["path"]
+            raw_prefix = url[:-len(path)] if url.endswith(path) else ""
+
+        catalog = cls(raw_prefix)
+        for meta in files:
+            catalog.add(meta)
+        return catalog
+
+    def _dir_path(self, node: int) -> str:
+        parts = []
+        while node > 0:
+            parts.append(self._segments[self._node_name[node]])
+            node = self._node_parent[node]
+        return "".join(p + "/" for p in reversed(parts))
+
+    def path(self, fid: int) -> str:
+        return self._dir_path(self._dir[fid]) + self._segments[self._name[fid]]
+
+    def sha(self, fid: int) -> Optional[str]:
+        raw = self._sha[fid * 20:(fid + 1) * 20]
+        return raw.hex() if raw != _NO_SHA else None
+
+    def meta(self, fid: int) -> Dict:
+        """
+        Metadata dict of one file, in the shape flatten_tree returns.
+        """
+        folder = self._dir_path(self._dir[fid])
+        path = folder + self._segments[self._name[fid]]
+        return {
+            "path": path,
+            "type": "file",
+            "ext": self._exts[self._ext[fid]],
+            "size_kb": round(self._size[fid], 2),
+            "sha": self.sha(fid),
+            "url": self.raw_prefix + path,
+            "folder": folder,
+        }
+
+    def find(self, path: str) -> Optional[int]:
+        parts = path.split("/")
+        node = self._dir_node(parts[:-1], create=False)
+        sid = self._segment_ids.get(parts[-1])
+        if node is None or sid is None:
+            return None
+        return self._fid_of.get((node, sid))
+
+    def __getitem__(self, path: str) -> Dict:
+        fid = self.find(path)
+        if fid is None:
+            raise KeyError(path)
+        return self.meta(fid)
+
+    def __iter__(self) -> Iterator[str]:
+        return (self.path(fid) for fid in range(len(self._name)))
+
+    def __len__(self) -> int:
+        return len(self._name)
+
+    def files(self, ids=None) -> List[Dict]:
+        """
+        Metadata dicts for the given file ids (all files by default).
+        """
+        ids = range(len(self._name)) if ids is None else ids
+        return [self.meta(fid) for fid in ids]
+
+    def dir_node(self, directory: str) -> Optional[int]:
+        """
+        Trie node of a directory ("src/core/", "/models", ...), matched
+        case-insensitively. None when it does not exist.
+        """
+        node = 0
+        for folder in (p for p in directory.strip("/").split("/") if p):
+            children = self._node_children[node]
+            sid = self._segment_ids.get(folder)
+            child = children.get(sid) if sid is not None else None
+            if child is None:
+                lowered = folder.lower()
+                child = next((c for s, c in children.items() if self._segments[s].lower() == lowered), None)
+            if child is None:
+                return None
+            node = child
+        return node
+
+    def subdirs(self, directory: str = "") -> List[str]:
+        node = self.dir_node(directory)
+        if node is None:
+            return []
+        return [self._dir_path(child) for child in self._node_children[node].values()]
+
+    def filter(self, prefix: str = "", ext: Optional[str] = None,
+               max_size_kb: Optional[float] = None, max_depth: Optional[int] = None) -> List[int]:
+        """
+        File ids under a directory prefix, optionally restricted by
+        extension, maximum size and depth below the prefix (0 = direct files).
+        Only the matching trie subtree is visited.
+        """
+        start = self.dir_node(prefix)
+        if start is None:
+            return []
+
+        eid = None
+        if ext is not None:
+            eid = self._ext_ids.get(ext)
+            if eid is None:
+                return []
+
+        result = []
+        stack = [(start, 0)]
+        while stack:
+            node, depth = stack.pop()
+            for fid in self._node_files[node]:
+                if eid is not None and self._ext[fid] != eid:
+                    continue
+                if max_size_kb is not None and self._size[fid] > max_size_kb:
+                    continue
+                result.append(fid)
+            if max_depth is None or depth < max_depth:
+                stack.extend((child, depth + 1) for child in self._node_children[node].values())
+        result.sort()
+        return result
+
+    def by_ext(self, ext: str) -> List[int]:
+        eid = self._ext_ids.get(ext)
+        return list(self._by_ext.get(eid, [])) if eid is not None else []
+
+    def smaller_than(self, max_size_kb: float) -> List[int]:
+        """
+        File ids with size_kb <= max_size_kb, via a sorted size index.
+        """
+        if self._by_size is None:
+            self._by_size = array("I", sorted(range(len(self._size)), key=self._size.__getitem__))
+            self._sorted_sizes = array("f", (self._size[fid] for fid in self._by_size))
+        cut = bisect.bisect_right(self._sorted_sizes, max_size_kb)
+        return sorted(self._by_size[:cut])
+
+
+def get_catalog(state: dict) -> Optional[FileCatalog]:
+    """
+    The catalog of the state's repo, built from repo_tree when missing
+    (e.g. after a snapshot restore). None when there is no tree.
+    """
+    catalog = state.get("file_catalog")
+    if catalog is None and state.get("repo_tree"):
+        catalog = FileCatalog.from_tree(state["repo_tree"])
+    return catalog
@@ -0,0 +1,258 @@
+"""
+Rate-limit-aware access to GitHub on top of the shared HTTP client.
+
+- One RateBudget per process follows the X-RateLimit-* headers of every
+  response (per X-RateLimit-Resource, raw files on their own) and paces
+  requests before the quota runs out: once less than
+  RATE_LIMIT_PACE_RATIO of it is left, the remaining requests are spread
+  evenly until the reset. A Retry-After, or a 403/429 rate-limit
+  response, pauses every caller in the process, not only the one that
+  hit it, so concurrent repo indexing runs share one quota.
+- Transient failures (connection errors, timeouts, 5xx) are retried up to
+  HTTP_RETRIES times with full-jitter exponential backoff. Rate-limited
+  responses (403/429) are retried after the pause or reset instead.
+- With conditional=True (API listings) the last response is kept in
+  etag_cache() with its ETag and sent back as If-None-Match; a 304 is
+  answered from the cache and does not count against the quota.
+"""
+import asyncio
+import random
+import time
+from typing import Awaitable, Callable, Dict, Optional
+
+import aiohttp
+
+from src.config.settings import (
+    GITHUB_API_RAW,
+    HTTP_RETRIES,
+    HTTP_BACKOFF_BASE,
+    HTTP_BACKOFF_MAX,
+    RATE_LIMIT_PACE_RATIO,
+    RATE_LIMIT_MAX_WAIT_SECONDS,
+)
+from src.utils.disk_cache import etag_cache
+from src.utils.http_client import HttpResponse, http_download, http_get
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# GitHub asks to wait at least a minute after a secondary limit without Retry-After
+SECONDARY_LIMIT_PAUSE = 60.0
+RATE_LIMIT_RETRIES = 10  # rate-limited responses waited out per request
+
+
+class RateLimitExceeded(ValueError):
+    """The quota resets later than RATE_LIMIT_MAX_WAIT_SECONDS from now."""
+
+
+class _Quota:
+    def __init__(self):
+        self.limit: Optional[int] = None
+        self.remaining: Optional[int] = None
+        self.reset = 0.0      # epoch seconds
+        self.next_slot = 0.0  # earliest start of the next paced request (monotonic)
+
+
+class RateBudget:
+    def __init__(self):
+        self.quotas: Dict[str, _Quota] = {}
+        self.paused_until = 0.0  # monotonic; Retry-After / secondary limit
+        self.waits = 0
+        self.waited_s = 0.0
+
+    def _delay(self, resource: str) -> float:
+        """
+        Seconds the next request for resource has to wait. Reserves one
+        request of the quota, so concurrent callers are spread out too.
+        """
+        now = time.monotonic()
+        delay = max(0.0, self.paused_until - now)
+        quota = self.quotas.get(resource)
+        if quota is None or quota.remaining is None:
+            return delay
+
+        until_reset = quota.reset - time.time()
+        if until_reset <= 0:
+            # Window over; the next response brings the new numbers
+            quota.remaining = None
+            return delay
+        if quota.remaining <= 0:
+            return max(delay, until_reset + 1)
+
+        if quota.limit and quota.remaining < quota.limit * RATE_LIMIT_PACE_RATIO:
+            slot = max(now, quota.next_slot)
+            quota.next_slot = slot + until_reset / quota.remaining
+            delay = max(delay, slot - now)
+        quota.remaining -= 1
+        return delay
+
+    async def acquire(self, resource: str):
+        delay = self._delay(resource)
+        if delay <= 0:
+            return
+        if delay > RATE_LIMIT_MAX_WAIT_SECONDS:
+            raise RateLimitExceeded(f"GitHub {resource} rate limit exhausted, resets in {delay:.0f}s")
+        if delay > 5:
+            print(f"GitHub {resource} rate limit: waiting {delay:.0f}s")
+        self.waits += 1
+        self.waited_s += delay
+        await asyncio.sleep(delay)
+
+    def update(self, resource: str, response: HttpResponse):
+        headers = response.headers
+        limit = headers.get("X-RateLimit-Limit")
+        remaining = headers.get("X-RateLimit-Remaining")
+        reset = headers.get("X-RateLimit-Reset")
+        if limit and remaining and reset:
+            quota = self.quotas.setdefault(resource, _Quota())
+            reset = float(reset)
+            if reset != quota.reset or quota.remaining is None:
+                quota.limit, quota.remaining, quota.reset = int(limit), int(remaining), reset
+            else:
+                # Responses of one window can arrive out of order
+                quota.remaining = min(quota.remaining, int(remaining))
+
+        pause = _retry_after(response)
+        if pause:
+            self.paused_until = max(self.paused_until, time.monotonic() + pause)
+
+    def stats(self) -> dict:
+        return {
+            "waits": self.waits,
+            "waited_s": round(self.waited_s, 3),
+            "quotas": {
+                name: {"limit": q.limit, "remaining": q.remaining, "reset": q.reset}
+                for name, q in self.quotas.items()
+            },
+        }
+
+
+BUDGET = RateBudget()
+
+
+def _is_rate_limited(response: HttpResponse) -> bool:
+    if response.status == 429:
+        return True
+    if response.status != 403:
+        return False
+    return (
+        "Retry-After" in response.headers
+        or response.headers.get("X-RateLimit-Remaining") == "0"
+        or "rate limit" in response.text.lower()
+    )
+
+
+def _retry_after(response: HttpResponse) -> Optional[float]:
+    """Seconds GitHub asks us to wait, when the response says so."""
+    value = response.headers.get("Retry-After")
+    if value and value.isdigit():
+        return float(value)
+    if _is_rate_limited(response) and response.headers.get("X-RateLimit-Remaining") == "0":
+        reset = response.headers.get("X-RateLimit-Reset")
+        if reset:
+            return max(0.0, float(reset) - time.time()) + 1
+    if _is_rate_limited(response):
+        return SECONDARY_LIMIT_PAUSE
+    return None
+
+
+def _backoff(attempt: int) -> float:
+    return random.uniform(0, min(HTTP_BACKOFF_MAX, HTTP_BACKOFF_BASE * 2 ** attempt))
+
+
+def _resource(url: str, response: Optional[HttpResponse] = None) -> str:
+    if response is not None and response.headers.get("X-RateLimit-Resource"):
+        return response.headers["X-RateLimit-Resource"]
+    return "raw" if url.startswith(GITHUB_API_RAW) else "core"
+
+
+def _split_cached(raw: bytes):
+    etag, _, body = raw.partition(b"\n")
+    return etag.decode("utf-8", errors="ignore"), body
+
+
+async def _send(
+    url: str,
+    request: Callable[[], Awaitable[HttpResponse]],
+    retryable: Callable[[], bool] = lambda: True,
+) -> HttpResponse:
+    """
+    Sends request() under BUDGET: paced, rate-limited responses waited
+    out, connection errors (while retryable()) and RETRY_STATUSES retried
+    with backoff. Returns the last response when every retry failed;
+    raises the last connection error when no response arrived at all.
+    """
+    resource = _resource(url)
+    attempt = limited = 0
+    while True:
+        await BUDGET.acquire(resource)
+        try:
+            response = await request()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            if attempt == HTTP_RETRIES or not retryable():
+                raise
+            print(f"GET {url} failed ({type(e).__name__}), retrying")
+            await asyncio.sleep(_backoff(attempt))
+            attempt += 1
+            continue
+
+        resource = _resource(url, response)
+        BUDGET.update(resource, response)
+
+        if _is_rate_limited(response):
+            # Waiting out the limit is not a failure: BUDGET.acquire holds
+            # the next attempt until the pause or reset has passed
+            limited += 1
+            if limited > RATE_LIMIT_RETRIES:
+                return response
+            continue
+        if response.status in RETRY_STATUSES:
+            if attempt == HTTP_RETRIES:
+                return response
+            await asyncio.sleep(_backoff(attempt))
+            attempt += 1
+            continue
+        return response
+
+
+async def github_get(
+    url: str,
+    headers: Optional[Dict[str, str]] = None,
+    max_bytes: Optional[int] = None,
+    conditional: bool = False,
+) -> HttpResponse:
+    """
+    http_get with rate-limit pacing, retries and (conditional=True)
+    ETag revalidation. Returns the last response when every retry failed;
+    raises the last connection error when no response arrived at all.
+    """
+    cache = etag_cache() if conditional and max_bytes is None else None
+    cached = await asyncio.to_thread(cache.get, url) if cache is not None else None
+    if cached is not None:
+        etag, cached_body = _split_cached(cached)
+        headers = {**(headers or {}), "If-None-Match": etag}
+
+    response = await _send(url, lambda: http_get(url, headers=headers, max_bytes=max_bytes))
+
+    if response.status == 304 and cached is not None:
+        return HttpResponse(200, response.headers, cached_body)
+    if cache is not None and response.status == 200 and response.headers.get("ETag"):
+        value = response.headers["ETag"].encode() + b"\n" + response.body
+        await asyncio.to_thread(cache.set, url, value)
+    return response
+
+
+async def github_download(url: str, fileobj, headers: Optional[Dict[str, str]] = None) -> int:
+    """
+    http_download with the same pacing, rate-limit handling and retries
+    as github_get. A connection error is only retried before any byte
+    was written to fileobj; returns the final status.
+    """
+    write = fileobj if callable(fileobj) else fileobj.write
+    written = 0
+
+    def counted(chunk: bytes):
+        nonlocal written
+        written += len(chunk)
+        write(chunk)
+
+    response = await _send(url, lambda: http_download(url, counted, headers=headers), lambda: written == 0)
+    return response.status
@@ -0,0 +1,154 @@
+"""
+Shared asyncio HTTP client used for every GitHub request.
+Keeps one pooled keep-alive connection set per event loop and caps
+the number of in-flight requests with a semaphore.
+"""
+import asyncio
+import json
+from typing import Dict, NamedTuple, Optional
+
+import aiohttp
+
+from src.config.settings import GITHUB_TOKEN, HTTP_CONCURRENCY, HTTP_TIMEOUT
+from src.utils.instrumentation import record_http
+
+
+class HttpResponse(NamedTuple):
+    status: int
+    headers: Dict[str, str]
+    body: bytes
+    truncated: bool = False  # body cut at max_bytes
+
+    @property
+    def text(self) -> str:
+        return self.body.decode("utf-8", errors="ignore")
+
+    def json(self):
+        return json.loads(self.body)
+
+
+_session: Optional[aiohttp.ClientSession] = None
+_semaphore: Optional[asyncio.Semaphore] = None
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_limit = HTTP_CONCURRENCY
+
+
+def github_headers() -> Dict[str, str]:
+    """
+    Authorization headers for the GitHub API, empty when no token is set.
+    """
+    if GITHUB_TOKEN:
+        return {"Authorization": f"Token {GITHUB_TOKEN}"}
+    return {}
+
+
+def set_concurrency(limit: int):
+    """
+    Overrides HTTP_CONCURRENCY for the process. Takes effect when the next
+    session is created, so call it before the first request.
+    """
+    global _limit
+    _limit = limit
+
+
+def get_session() -> aiohttp.ClientSession:
+    """
+    Returns the pooled session of the running event loop, creating it on first use.
+    """
+    global _session, _semaphore, _loop
+
+    loop = asyncio.get_running_loop()
+    if _session is None or _session.closed or _loop is not loop:
+        connector = aiohttp.TCPConnector(
+            limit=_limit,
+            keepalive_timeout=30,
+            ttl_dns_cache=300,
+        )
+        _session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=HTTP_TIMEOUT),
+        )
+        _semaphore = asyncio.Semaphore(_limit)
+        _loop = loop
+    return _session
+
+
+def _range_total(content_range: Optional[str]) -> Optional[int]:
+    # "bytes 0-65535/1048576" -> 1048576
+    if not content_range or "/" not in content_range:
+        return None
+    total = content_range.rsplit("/", 1)[1]
+    return int(total) if total.isdigit() else None
+
+
+async def http_get(url: str, headers: Optional[Dict[str, str]] = None, max_bytes: Optional[int] = None) -> HttpResponse:
+    """
+    GET a URL through the shared session.
+    Waits for a free slot when HTTP_CONCURRENCY requests are already in flight.
+
+    With max_bytes only the first max_bytes of the body are transferred:
+    a Range request is sent, and when the server ignores it the stream is
+    closed as soon as enough bytes have arrived.
+    """
+    session = get_session()
+    if max_bytes is not None:
+        headers = {**(headers or {}), "Range": f"bytes=0-{max_bytes - 1}"}
+
+    async with _semaphore:
+        async with session.get(url, headers=headers) as response:
+            if max_bytes is None:
+                body = await response.read()
+                record_http(url, len(body))
+                return HttpResponse(response.status, dict(response.headers), body)
+
+            chunks, received = [], 0
+            async for chunk in response.content.iter_chunked(1 << 16):
+                chunks.append(chunk)
+                received += len(chunk)
+                if received >= max_bytes:
+                    break
+            body = b"".join(chunks)[:max_bytes]
+
+            if response.status == 206:
+                total = _range_total(response.headers.get("Content-Range"))
+                truncated = total > len(body) if total is not None else received >= max_bytes
+            else:
+                truncated = received > max_bytes or not response.content.at_eof()
+                if not response.content.at_eof():
+                    # Unread body: drop the connection instead of draining it
+                    response.close()
+            record_http(url, received)
+            return HttpResponse(response.status, dict(response.headers), body, truncated)
+
+
+async def close_session():
+    """
+    Closes the shared session. Call once before the event loop shuts down.
+    """
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+
+
+async def http_download(url: str, fileobj, headers: Optional[Dict[str, str]] = None, chunk_size: int = 1 << 16):
+    """
+    Streams a (possibly large) response body into a writable callable or file
+    object chunk by chunk, without holding the whole body in memory.
+    Returns the response without its body; an error response (not 200)
+    keeps its body and is not written to fileobj.
+    """
+    write = fileobj if callable(fileobj) else fileobj.write
+    session = get_session()
+    async with _semaphore:
+        async with session.get(url, headers=headers, timeout=aiohttp.ClientTimeout(total=None)) as response:
+            if response.status != 200:
+                body = await response.read()
+                record_http(url, len(body))
+                return HttpResponse(response.status, dict(response.headers), body)
+            received = 0
+            async for chunk in response.content.iter_chunked(chunk_size):
+                write(chunk)
+                received += len(chunk)
+            record_http(url, received)
+            return HttpResponse(response.status, dict(response.headers), b"")
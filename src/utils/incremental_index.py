@@ -0,0 +1,134 @@
+"""
+Incremental re-indexing.
+
+Brings an indexed state from its commit to a newer one using the
+commit-to-commit diff instead of rebuilding everything:
+- patches the nested repo_tree in place for added/modified/removed/renamed paths
+- re-fetches and re-parses only changed files that were already parsed
+- drops stale parsed_files entries
+- re-indexes the symbols of changed .py files
+- re-digests only the directories above changed files, and regenerates
+  global_context only for large structural changes
+
+Cost grows with the size of the diff, not the size of the repo.
+"""
+import asyncio
+import posixpath
+from typing import Optional
+
+from src.config.settings import GLOBAL_CONTEXT_REFRESH_RATIO
+from src.github_repo_parser import GitRepoParser
+from src.nodes.fetch_and_parse_node import fetch_and_parse_node
+from src.nodes.global_context_node import global_context_node
+from src.utils.directory_digest import directory_digests, subtree_hashes
+from src.utils.file_catalog import FileCatalog
+from src.utils.flatten_tree import flatten_tree
+from src.utils.symbol_index import index_files, new_symbol_index, remove_file as remove_symbols
+
+
+def _top_level(path: str) -> Optional[str]:
+    return path.split("/", 1)[0] if "/" in path else None
+
+
+async def incremental_update(state: dict, head_sha: str) -> Optional[dict]:
+    """
+    Updates an indexed state (repo_tree, parsed_files, directory_digests,
+    global_context, commit_sha) to head_sha. Returns the updated state, or
+    None when a full re-index is needed: the diff is too large for the
+    Compare API, or head_sha does not descend from the indexed commit.
+    """
+    parser = GitRepoParser()
+    repo_url = state["url"]
+    base_sha = state["commit_sha"]
+
+    changes = await parser.compare(repo_url, base_sha, head_sha)
+    if changes is None:
+        return None
+
+    removed = set()
+    upserted = set()
+    structural = 0
+    for change in changes:
+        status = change["status"]
+        if status == "removed":
+            removed.add(change["filename"])
+            structural += 1
+        elif status == "renamed":
+            removed.add(change["previous_filename"])
+            upserted.add(change["filename"])
+            structural += 1
+        elif status == "added":
+            upserted.add(change["filename"])
+            structural += 1
+        elif status != "unchanged":
+            upserted.add(change["filename"])
+
+    repo_tree = state["repo_tree"]
+    top_levels_before = {_top_level(f["path"]) for f in flatten_tree(repo_tree)}
+
+    # One directory listing per changed directory gives size + sha
+    directories = sorted({posixpath.dirname(p) for p in upserted})
+    listings = await asyncio.gather(
+        *(parser.list_dir(repo_url, d, head_sha) for d in directories)
+    )
+    fresh = {meta["path"]: meta for listing in listings for meta in listing if meta["path"] in upserted}
+
+    for path in removed | upserted:
+        parser.remove_file(repo_tree, path)
+    for meta in fresh.values():
+        parser.insert_file(repo_tree, meta)
+
+    # Renamed files inherit the "was parsed" status of their old path
+    parsed_paths = {pf.get("path") for pf in state["parsed_files"]}
+    parsed_paths |= {
+        c["filename"] for c in changes
+        if c["status"] == "renamed" and c["previous_filename"] in parsed_paths
+    }
+    reparse = [fresh[path] for path in sorted(upserted) if path in fresh and path in parsed_paths]
+
+    stale = removed | upserted
+    kept = [pf for pf in state["parsed_files"] if pf.get("path") not in stale]
+    dropped = len(state["parsed_files"]) - len(kept)
+
+    symbol_index = state.get("symbol_index") or new_symbol_index()
+    for path in stale:
+        remove_symbols(symbol_index, path)
+    await index_files(symbol_index, list(fresh.values()))
+
+    state = {
+        **state,
+        "repo_tree": repo_tree,
+        "commit_sha": head_sha,
+        "parsed_files": kept,
+        "symbol_index": symbol_index,
+        # Rebuilt from the patched tree on first use
+        "file_catalog": None,
+        "search_index": None,
+    }
+    if reparse:
+        update = await fetch_and_parse_node({**state, "selected_files": reparse})
+        state["parsed_files"] = update["parsed_files"]
+
+    flattened = flatten_tree(repo_tree)
+    top_levels_after = {_top_level(f["path"]) for f in flattened}
+    ratio = structural / max(len(flattened), 1)
+    if ratio > GLOBAL_CONTEXT_REFRESH_RATIO or top_levels_before != top_levels_after:
+        update = await global_context_node(state)
+        state["global_context"] = update["global_context"]
+        state["directory_digests"] = update["directory_digests"]
+        state["digests_degraded"] = update["digests_degraded"]
+        refreshed = "regenerated"
+    else:
+        # Unchanged subtrees hit the digest cache; only changed paths cost calls
+        catalog = FileCatalog.from_tree(repo_tree)
+        state["file_catalog"] = catalog
+        digests, degraded = await directory_digests(catalog, state["llm"], subtree_hashes(catalog))
+        state["directory_digests"] = digests
+        state["digests_degraded"] = bool(degraded) or state.get("digests_degraded", False)
+        refreshed = "kept"
+
+    print(
+        f"Incremental update {base_sha[:12]} -> {head_sha[:12]}: {len(changes)} changed paths, "
+        f"re-parsed {len(reparse)}, dropped {dropped} stale parses, global context {refreshed}."
+    )
+    return state
@@ -0,0 +1,460 @@
+"""
+Per-node instrumentation for index_app and qa_app.
+
+langgraph_app.py registers every node through instrument_node(). With
+INSTRUMENT off that returns the node function itself, so the only cost
+left is a ContextVar lookup in the HTTP client and the disk caches.
+
+With INSTRUMENT on, every node run records:
+- wall time, and process CPU time while it ran (nodes that overlap in the
+  parallel index graph share the CPU they use)
+- HTTP requests and bytes per GitHub endpoint (raw, trees, contents, ...)
+- disk cache hits and misses per tier (blobs, parsed, llm)
+- LLM calls: input / output tokens, latency, time to first token
+- with INSTRUMENT_STATE_SIZE, JSON size of the state it received and of
+  the update it returned (serializing the state is O(state) per run, so
+  it is off by default)
+
+Results go to TRACE_PATH (Chrome trace-event JSON, written at exit) and to
+METRICS_PATH (per-node aggregates, rewritten every METRICS_FLUSH_SECONDS).
+PROFILE_NODE additionally samples the event loop thread's stack while
+that node runs and writes folded stacks to PROFILE_PATH.
+"""
+import atexit
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, deque
+from contextvars import ContextVar
+from functools import wraps
+from typing import Dict, Optional
+
+from src.config.settings import (
+    GITHUB_API_BASE,
+    GITHUB_API_RAW,
+    INSTRUMENT,
+    INSTRUMENT_STATE_SIZE,
+    TRACE_PATH,
+    TRACE_MAX_SPANS,
+    METRICS_PATH,
+    METRICS_FLUSH_SECONDS,
+    PROFILE_NODE,
+    PROFILE_INTERVAL_MS,
+    PROFILE_PATH,
+)
+
+_ORIGIN = time.perf_counter()
+_lock = threading.Lock()
+
+
+class NodeSpan:
+    """Counters of one node run."""
+
+    def __init__(self, graph: str, node: str):
+        self.graph = graph
+        self.node = node
+        self.start = time.perf_counter()
+        self.cpu_start = time.process_time()
+        self.wall_s = 0.0
+        self.cpu_s = 0.0
+        self.http: Dict[str, list] = {}   # endpoint -> [requests, bytes]
+        self.cache: Dict[str, list] = {}  # tier -> [hits, misses]
+        self.llm = []                     # one dict per call
+        self.state_in = 0
+        self.state_out = 0
+        self.error = None
+
+    def finish(self):
+        self.wall_s = time.perf_counter() - self.start
+        self.cpu_s = time.process_time() - self.cpu_start
+
+    def summary(self) -> dict:
+        return {
+            "wall_s": round(self.wall_s, 6),
+            "cpu_s": round(self.cpu_s, 6),
+            "http": {k: {"requests": n, "bytes": b} for k, (n, b) in self.http.items()},
+            "cache": {k: {"hits": h, "misses": m} for k, (h, m) in self.cache.items()},
+            "llm_calls": len(self.llm),
+            "input_tokens": sum(c["input_tokens"] for c in self.llm),
+            "output_tokens": sum(c["output_tokens"] for c in self.llm),
+            **({"state_bytes_in": self.state_in, "state_bytes_out": self.state_out} if INSTRUMENT_STATE_SIZE else {}),
+            **({"error": self.error} if self.error else {}),
+        }
+
+
+_span: ContextVar[Optional[NodeSpan]] = ContextVar("instrumentation_span", default=None)
+
+
+def current_span() -> Optional[NodeSpan]:
+    return _span.get()
+
+
+# --- recording hooks (called from the HTTP client, disk caches, LLM callbacks) ---
+
+def _endpoint(url: str) -> str:
+    if url.startswith(GITHUB_API_RAW):
+        return "raw"
+    if url.startswith(GITHUB_API_BASE):
+        # owner/repo/<endpoint>/..., git/trees -> trees
+        parts = url[len(GITHUB_API_BASE):].split("?", 1)[0].split("/")
+        if len(parts) > 3 and parts[2] == "git":
+            return parts[3]
+        if len(parts) > 2:
+            return parts[2]
+    return "other"
+
+
+def record_http(url: str, nbytes: int):
+    span = _span.get()
+    if span is None:
+        return
+    endpoint = _endpoint(url)
+    with _lock:
+        counts = span.http.setdefault(endpoint, [0, 0])
+        counts[0] += 1
+        counts[1] += nbytes
+
+
+def record_cache(tier: str, hit: bool):
+    span = _span.get()
+    if span is None:
+        return
+    with _lock:
+        counts = span.cache.setdefault(tier, [0, 0])
+        counts[0 if hit else 1] += 1
+
+
+_llm_recorder: ContextVar[Optional[object]] = ContextVar("instrumentation_llm", default=None)
+
+
+def _make_llm_recorder():
+    """
+    Builds the LLM callback handler and registers its configure hook.
+    Only called with INSTRUMENT on, so LangChain is not imported otherwise.
+    """
+    from langchain_core.callbacks import BaseCallbackHandler
+    from langchain_core.tracers.context import register_configure_hook
+
+    class _LLMRecorder(BaseCallbackHandler):
+        """
+        Times chat model calls made inside an instrumented node. Injected
+        into the nodes' callback managers through a configure hook, so the
+        nodes and the LLM wrappers stay unchanged.
+        """
+        run_inline = True
+        ignore_chain = True
+        ignore_retriever = True
+        ignore_agent = True
+
+        def __init__(self):
+            self.running = {}
+
+        def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+            self.running[run_id] = [time.perf_counter(), None]
+
+        def on_llm_new_token(self, token, *, run_id, **kwargs):
+            timing = self.running.get(run_id)
+            if timing is not None and timing[1] is None:
+                timing[1] = time.perf_counter()
+
+        def on_llm_end(self, response, *, run_id, **kwargs):
+            timing = self.running.pop(run_id, None)
+            span = _span.get()
+            if timing is None or span is None:
+                return
+            start, first_token = timing
+            usage = {}
+            if response.generations and response.generations[0]:
+                message = getattr(response.generations[0][0], "message", None)
+                usage = getattr(message, "usage_metadata", None) or {}
+            call = {
+                "start": start,
+                "latency_s": time.perf_counter() - start,
+                "ttft_s": first_token - start if first_token is not None else None,
+                "input_tokens": usage.get("input_tokens", 0),
+                "output_tokens": usage.get("output_tokens", 0),
+            }
+            with _lock:
+                span.llm.append(call)
+
+        def on_llm_error(self, error, *, run_id, **kwargs):
+            self.running.pop(run_id, None)
+
+    register_configure_hook(_llm_recorder, inheritable=True)
+    return _LLMRecorder()
+
+
+_recorder = _make_llm_recorder() if INSTRUMENT else None
+
+
+# --- sampling profiler ---
+
+class StackSampler:
+    """
+    Samples one thread's Python stack every interval while started and
+    counts folded stacks ("outer;inner;leaf"). start()/stop() nest, so
+    overlapping runs of the profiled node share one sampler.
+    """
+
+    def __init__(self, interval_s: float):
+        self.interval_s = interval_s
+        self.stacks = Counter()
+        self._labels = {}  # code object -> "name (file:line)"
+        self._active = 0
+        self._stop = None
+
+    def start(self, thread_id: int):
+        with _lock:
+            self._active += 1
+            if self._active > 1:
+                return
+            # A fresh event per sampling thread: a stopping thread never
+            # sees the next start()
+            self._stop = threading.Event()
+            threading.Thread(target=self._run, args=(thread_id, self._stop), daemon=True).start()
+
+    def stop(self):
+        with _lock:
+            self._active -= 1
+            if self._active:
+                return
+            self._stop.set()
+
+    def _run(self, thread_id: int, stop: threading.Event):
+        while not stop.wait(self.interval_s):
+            frame = sys._current_frames().get(thread_id)
+            frames = []
+            while frame is not None:
+                code = frame.f_code
+                label = self._labels.get(code)
+                if label is None:
+                    label = self._labels[code] = f"{code.co_name} ({os.path.relpath(code.co_filename)}:{code.co_firstlineno})"
+                frames.append(label)
+                frame = frame.f_back
+            self.stacks[";".join(reversed(frames))] += 1
+
+    def folded(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+_sampler = StackSampler(PROFILE_INTERVAL_MS / 1000) if INSTRUMENT and PROFILE_NODE else None
+
+
+# --- node wrapper ---
+
+def _json_size(value) -> int:
+    try:
+        return len(json.dumps(value, default=lambda o: f"<{type(o).__name__}>"))
+    except (TypeError, ValueError):
+        return 0
+
+
+def _state_size(state) -> int:
+    if not isinstance(state, dict):
+        return _json_size(state)
+    return _json_size({key: value for key, value in state.items() if key != "llm"})
+
+
+_spans = deque(maxlen=TRACE_MAX_SPANS)
+_aggregates: Dict[str, dict] = {}
+_flusher: Optional[threading.Thread] = None
+
+
+def instrument_node(graph: str, name: str, fn):
+    """
+    Wraps an async node so each run is recorded as a NodeSpan.
+    Returns fn unchanged when INSTRUMENT is off.
+    """
+    if not INSTRUMENT:
+        return fn
+    profile = _sampler is not None and name == PROFILE_NODE
+
+    @wraps(fn)
+    async def node(state):
+        _start_flusher()
+        span = NodeSpan(graph, name)
+        if INSTRUMENT_STATE_SIZE:
+            span.state_in = _state_size(state)
+        span_token = _span.set(span)
+        llm_token = _llm_recorder.set(_recorder)
+        if profile:
+            _sampler.start(threading.get_ident())
+        try:
+            update = await fn(state)
+            if INSTRUMENT_STATE_SIZE:
+                span.state_out = _state_size(update)
+            return update
+        except BaseException as e:
+            span.error = type(e).__name__
+            raise
+        finally:
+            if profile:
+                _sampler.stop()
+            span.finish()
+            _llm_recorder.reset(llm_token)
+            _span.reset(span_token)
+            _add_span(span)
+
+    return node
+
+
+def _add_span(span: NodeSpan):
+    with _lock:
+        _spans.append(span)
+        key = f"{span.graph}.{span.node}"
+        agg = _aggregates.get(key)
+        if agg is None:
+            agg = _aggregates[key] = {
+                "runs": 0, "errors": 0, "wall": deque(maxlen=1000), "wall_total": 0.0, "cpu_total": 0.0,
+                "http": {}, "cache": {}, "llm_calls": 0, "input_tokens": 0, "output_tokens": 0,
+                "llm_latency": deque(maxlen=1000), "ttft": deque(maxlen=1000),
+                "state_in_total": 0, "state_out_total": 0,
+            }
+        agg["runs"] += 1
+        agg["errors"] += span.error is not None
+        agg["wall"].append(span.wall_s)
+        agg["wall_total"] += span.wall_s
+        agg["cpu_total"] += span.cpu_s
+        for endpoint, (n, b) in span.http.items():
+            counts = agg["http"].setdefault(endpoint, [0, 0])
+            counts[0] += n
+            counts[1] += b
+        for tier, (h, m) in span.cache.items():
+            counts = agg["cache"].setdefault(tier, [0, 0])
+            counts[0] += h
+            counts[1] += m
+        for call in span.llm:
+            agg["llm_calls"] += 1
+            agg["input_tokens"] += call["input_tokens"]
+            agg["output_tokens"] += call["output_tokens"]
+            agg["llm_latency"].append(call["latency_s"])
+            if call["ttft_s"] is not None:
+                agg["ttft"].append(call["ttft_s"])
+        agg["state_in_total"] += span.state_in
+        agg["state_out_total"] += span.state_out
+
+
+# --- export ---
+
+def _quantiles(samples) -> dict:
+    samples = sorted(samples)
+    if not samples:
+        return {}
+    pick = lambda q: round(samples[min(int(q * len(samples)), len(samples) - 1)], 6)
+    return {"p50": pick(0.5), "p95": pick(0.95), "max": round(samples[-1], 6),
+            "mean": round(statistics.fmean(samples), 6)}
+
+
+def metrics() -> dict:
+    """Per-node aggregates since the process started."""
+    with _lock:
+        nodes = {}
+        for key, agg in sorted(_aggregates.items()):
+            runs = agg["runs"]
+            nodes[key] = {
+                "runs": runs,
+                "errors": agg["errors"],
+                "wall_s": {"total": round(agg["wall_total"], 6), **_quantiles(agg["wall"])},
+                "cpu_s": round(agg["cpu_total"], 6),
+                "http": {k: {"requests": n, "bytes": b} for k, (n, b) in agg["http"].items()},
+                "cache": {k: {"hits": h, "misses": m} for k, (h, m) in agg["cache"].items()},
+                "llm": {
+                    "calls": agg["llm_calls"],
+                    "input_tokens": agg["input_tokens"],
+                    "output_tokens": agg["output_tokens"],
+                    "latency_s": _quantiles(agg["llm_latency"]),
+                    "ttft_s": _quantiles(agg["ttft"]),
+                },
+            }
+            if INSTRUMENT_STATE_SIZE:
+                nodes[key]["state_bytes_in_avg"] = agg["state_in_total"] // runs
+                nodes[key]["state_bytes_out_avg"] = agg["state_out_total"] // runs
+    return {"pid": os.getpid(), "updated": time.time(), "nodes": nodes}
+
+
+def trace_events() -> list:
+    """
+    Chrome trace events: one complete ("X") event per node run with its
+    counters as args, and one per LLM call nested under it. Overlapping
+    node runs are spread over separate rows.
+    """
+    with _lock:
+        spans = sorted(_spans, key=lambda s: s.start)
+    pid = os.getpid()
+    us = lambda seconds: round(seconds * 1e6, 1)
+    lanes = []  # end time of the last span on each row
+    events = [{"ph": "M", "name": "process_name", "pid": pid, "args": {"name": "code-analyser"}}]
+    for span in spans:
+        lane = next((i for i, end in enumerate(lanes) if end <= span.start), None)
+        if lane is None:
+            lane = len(lanes)
+            lanes.append(0.0)
+            events.append({"ph": "M", "name": "thread_name", "pid": pid, "tid": lane + 1,
+                           "args": {"name": f"nodes {lane + 1}"}})
+        lanes[lane] = span.start + span.wall_s
+        events.append({
+            "name": span.node, "cat": span.graph, "ph": "X", "pid": pid, "tid": lane + 1,
+            "ts": us(span.start - _ORIGIN), "dur": us(span.wall_s), "args": span.summary(),
+        })
+        for call in span.llm:
+            events.append({
+                "name": "llm", "cat": "llm", "ph": "X", "pid": pid, "tid": lane + 1,
+                "ts": us(call["start"] - _ORIGIN), "dur": us(call["latency_s"]),
+                "args": {k: v for k, v in call.items() if k != "start"},
+            })
+    return events
+
+
+def _write_json(path: str, data):
+    # Atomic replace: readers never see a half-written file
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+def write_metrics(path: str = METRICS_PATH):
+    _write_json(path, metrics())
+
+
+def write_trace(path: str = TRACE_PATH):
+    _write_json(path, {"traceEvents": trace_events(), "displayTimeUnit": "ms"})
+
+
+def _flush_periodically():
+    while True:
+        time.sleep(METRICS_FLUSH_SECONDS)
+        try:
+            write_metrics()
+        except OSError as e:
+            print(f"Could not write metrics to {METRICS_PATH}: {e}")
+
+
+def _start_flusher():
+    global _flusher
+    if _flusher is None:
+        with _lock:
+            if _flusher is None:
+                _flusher = threading.Thread(target=_flush_periodically, name="metrics-flush", daemon=True)
+                _flusher.start()
+
+
+def _write_at_exit():
+    if not _spans:
+        return
+    write_metrics()
+    write_trace()
+    print(f"Instrumentation: trace written to {TRACE_PATH}, metrics to {METRICS_PATH}.")
+    if _sampler is not None and _sampler.stacks:
+        with open(PROFILE_PATH, "w", encoding="utf-8") as f:
+            f.write(_sampler.folded())
+        print(f"Profile of node {PROFILE_NODE} written to {PROFILE_PATH}.")
+
+
+if INSTRUMENT:
+    atexit.register(_write_at_exit)
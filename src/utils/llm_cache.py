@@ -0,0 +1,96 @@
+"""
+Persistent LLM response cache.
+
+CachedLLM wraps a chat model and stores its responses in llm_cache() (the
+same SQLite/zstd DiskCache the blob and parse tiers use). The key is a
+hash of the model name, temperature, call kwargs and the normalized
+messages, so re-indexing a repo at the same commit or repeating a
+question over the same files does not call the model again.
+
+- entries older than the TTL count as misses and are deleted
+- the cache's size cap evicts least recently used entries
+- calls made from a graph node listed in skip_nodes bypass the cache
+
+The summarize prompt includes the session's conversation memory, so a
+question only hits the cache when it is asked at the same point of a
+conversation (e.g. as the first question, or in a repeated bulk QA run).
+The conversation stays in the key on purpose: a follow-up like "and
+where is it called?" must not be answered from a cached standalone
+answer. Interactive deployments that gain nothing from those hits can
+set LLM_CACHE_SKIP_NODES=summarize.
+"""
+import asyncio
+import hashlib
+import json
+import time
+from typing import Iterable, Optional, Sequence
+
+from langchain_core.messages import BaseMessage, message_to_dict, messages_from_dict
+from langchain_core.runnables.config import ensure_config
+
+from src.utils.disk_cache import llm_cache
+
+
+def _normalize(message: BaseMessage) -> list:
+    content = message.content
+    if isinstance(content, str):
+        # Prompts are f-strings with indentation; whitespace changes don't matter
+        content = " ".join(content.split())
+    else:
+        content = json.dumps(content, sort_keys=True, default=str)
+    return [message.type, content]
+
+
+class CachedLLM:
+    def __init__(self, llm, ttl_seconds: float, skip_nodes: Iterable[str] = ()):
+        self.llm = llm
+        self.ttl_seconds = ttl_seconds
+        self.skip_nodes = set(skip_nodes)
+        self.hits = 0
+        self.misses = 0
+
+    def __getattr__(self, name):
+        # model, temperature, invoke, astream, ... come from the wrapped model
+        return getattr(self.llm, name)
+
+    def cache_key(self, messages: Sequence[BaseMessage], **kwargs) -> str:
+        model = getattr(self.llm, "model", None) or getattr(self.llm, "model_name", None) or type(self.llm).__name__
+        payload = {
+            "model": str(model),
+            "temperature": getattr(self.llm, "temperature", None),
+            "kwargs": kwargs,
+            "messages": [_normalize(m) for m in messages],
+        }
+        encoded = json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+        return "llm:" + hashlib.sha256(encoded).hexdigest()
+
+    def _lookup(self, cache, key: str) -> Optional[BaseMessage]:
+        raw = cache.get(key)
+        if raw is None:
+            return None
+        entry = json.loads(raw)
+        if time.time() - entry["created"] > self.ttl_seconds:
+            cache.delete(key)
+            return None
+        return messages_from_dict([entry["message"]])[0]
+
+    async def ainvoke(self, messages: Sequence[BaseMessage], config=None, **kwargs) -> BaseMessage:
+        cache = llm_cache()
+        node = ensure_config(config).get("metadata", {}).get("langgraph_node")
+        if cache is None or node in self.skip_nodes:
+            return await self.llm.ainvoke(messages, config, **kwargs)
+
+        key = self.cache_key(messages, **kwargs)
+        cached = await asyncio.to_thread(self._lookup, cache, key)
+        if cached is not None:
+            self.hits += 1
+            return cached
+
+        self.misses += 1
+        response = await self.llm.ainvoke(messages, config, **kwargs)
+        entry = {"created": time.time(), "message": message_to_dict(response)}
+        await asyncio.to_thread(cache.set, key, json.dumps(entry).encode("utf-8"))
+        return response
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses}
@@ -0,0 +1,25 @@
+"""
+Process-wide cap on concurrent LLM calls.
+
+LimitedLLM wraps a chat model (or CachedLLM) the same way CachedLLM does:
+nodes keep calling state["llm"].ainvoke and every call waits for one of
+max_concurrency slots, no matter how many repos or questions are in flight.
+"""
+import asyncio
+from typing import Sequence
+
+from langchain_core.messages import BaseMessage
+
+
+class LimitedLLM:
+    def __init__(self, llm, max_concurrency: int):
+        self.llm = llm
+        self.max_concurrency = max_concurrency
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    def __getattr__(self, name):
+        return getattr(self.llm, name)
+
+    async def ainvoke(self, messages: Sequence[BaseMessage], config=None, **kwargs) -> BaseMessage:
+        async with self._semaphore:
+            return await self.llm.ainvoke(messages, config, **kwargs)
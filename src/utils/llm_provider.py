@@ -0,0 +1,83 @@
+"""
+Chat model factory.
+
+get_llm() builds the process-wide model for LLM_PROVIDER on its first
+call and returns the same instance afterwards, behind CachedLLM
+(LLM_CACHE_ENABLED) and the ScheduledLLM scheduler
+(LLM_SCHEDULER_ENABLED), cache outermost: cache hits never wait for the
+scheduler. The provider SDK (and with it most of LangChain) is imported
+only then, so commands that never call the model, like
+`run_cli.py --help` or a session restored from a snapshot before its
+first question, do not pay for it.
+"""
+import threading
+from typing import Optional
+
+from src.config.settings import (
+    LLM_PROVIDER,
+    LLM_MODEL,
+    LLM_TEMPERATURE,
+    LLM_CACHE_ENABLED,
+    LLM_CACHE_TTL_HOURS,
+    LLM_CACHE_SKIP_NODES,
+    LLM_SCHEDULER_ENABLED,
+    LLM_MAX_CONCURRENCY,
+    LLM_REQUESTS_PER_MINUTE,
+    LLM_TOKENS_PER_MINUTE,
+    LLM_OUTPUT_TOKENS_ESTIMATE,
+)
+
+
+def _google(model: Optional[str], temperature: float):
+    from langchain_google_genai import ChatGoogleGenerativeAI
+
+    return ChatGoogleGenerativeAI(model=model or "gemini-2.5-flash", temperature=temperature)
+
+
+def _openai(model: Optional[str], temperature: float):
+    try:
+        from langchain_openai import ChatOpenAI
+    except ImportError as e:
+        raise ImportError("LLM_PROVIDER=openai needs the langchain-openai package") from e
+
+    return ChatOpenAI(model=model or "gpt-4o-mini", temperature=temperature)
+
+
+# Provider registry: LLM_PROVIDER -> factory(model, temperature)
+PROVIDERS = {
+    "google": _google,
+    "openai": _openai,
+}
+
+_llm = None
+_lock = threading.Lock()
+
+
+def get_llm(create: bool = True):
+    """
+    The shared chat model, built on first use. With create=False returns
+    None instead of building it (e.g. to report cache stats at exit).
+    """
+    global _llm
+    if _llm is None and create:
+        with _lock:
+            if _llm is None:
+                if LLM_PROVIDER not in PROVIDERS:
+                    raise ValueError(f"Unknown LLM_PROVIDER {LLM_PROVIDER!r}, expected one of {sorted(PROVIDERS)}")
+                llm = PROVIDERS[LLM_PROVIDER](LLM_MODEL, LLM_TEMPERATURE)
+                if LLM_SCHEDULER_ENABLED:
+                    from src.utils.llm_scheduler import ScheduledLLM
+
+                    llm = ScheduledLLM(
+                        llm,
+                        max_concurrency=LLM_MAX_CONCURRENCY,
+                        requests_per_minute=LLM_REQUESTS_PER_MINUTE,
+                        tokens_per_minute=LLM_TOKENS_PER_MINUTE,
+                        output_tokens=LLM_OUTPUT_TOKENS_ESTIMATE,
+                    )
+                if LLM_CACHE_ENABLED:
+                    from src.utils.llm_cache import CachedLLM
+
+                    llm = CachedLLM(llm, ttl_seconds=LLM_CACHE_TTL_HOURS * 3600, skip_nodes=LLM_CACHE_SKIP_NODES)
+                _llm = llm
+    return _llm
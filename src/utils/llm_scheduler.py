@@ -0,0 +1,262 @@
+"""
+Process-wide LLM request scheduler.
+
+ScheduledLLM wraps a chat model the same way CachedLLM and LimitedLLM do,
+so nodes keep calling state["llm"].ainvoke. Every call that reaches it
+(cache hits never do, see llm_provider.get_llm) is:
+
+- coalesced: an identical call (same messages and kwargs) already in
+  flight is joined instead of being sent a second time. A call runs at
+  the most urgent priority of its callers: an INTERACTIVE caller joining
+  a queued BACKGROUND call moves it up the queue
+- queued by priority class: INTERACTIVE calls (questions being waited
+  on) are started before BACKGROUND ones (indexing), FIFO within a class
+- admitted under max_concurrency and two token buckets, requests/min and
+  tokens/min. Tokens are estimated from the prompt plus output_tokens
+  and corrected with the response's usage_metadata afterwards
+- cancelled when nobody waits for it any more: a caller that is cancelled
+  (e.g. its HTTP client disconnected) leaves the queue, and a call in
+  flight is cancelled once its last waiter is gone
+
+The priority of a call comes from the context it runs in, see
+set_priority(); LangGraph runs nodes in tasks that inherit it.
+"""
+import asyncio
+import hashlib
+import heapq
+import itertools
+import json
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Sequence
+
+INTERACTIVE = 0
+BACKGROUND = 1
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BACKGROUND: "background"}
+
+_priority: ContextVar[int] = ContextVar("llm_priority", default=BACKGROUND)
+
+
+def set_priority(priority: int):
+    """
+    Sets the priority class of LLM calls made from the current context
+    (and tasks started from it). Returns the ContextVar token.
+    """
+    return _priority.set(priority)
+
+
+class TokenBucket:
+    """
+    rate units per minute, bursting up to one minute's worth. take() may
+    drive the level negative (a correction after the fact); callers wait
+    until it is refilled. A negative amount (a refund) never lifts the
+    level above the capacity.
+    """
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.capacity / 60)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until amount (capped at the capacity) is available."""
+        self._refill()
+        missing = min(amount, self.capacity) - self.level
+        return max(0.0, missing * 60 / self.capacity)
+
+    def take(self, amount: float):
+        self._refill()
+        self.level = min(self.capacity, self.level - amount)
+
+
+def _estimate_tokens(messages: Sequence, output_tokens: int) -> int:
+    chars = sum(len(m.content) if isinstance(m.content, str) else len(json.dumps(m.content, default=str))
+                for m in messages)
+    return chars // 4 + output_tokens
+
+
+def _flight_key(messages: Sequence, kwargs: dict) -> str:
+    payload = {
+        "kwargs": kwargs,
+        "messages": [[m.type, m.content] for m in messages],
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class _Flight:
+    """One call to the model, shared by every caller asking the same thing."""
+
+    def __init__(self, priority: int):
+        self.task: Optional[asyncio.Task] = None
+        self.waiters = 0
+        self.priority = priority
+        self.admission: Optional[asyncio.Future] = None  # while queued
+
+
+class ScheduledLLM:
+    def __init__(
+        self,
+        llm,
+        max_concurrency: int,
+        requests_per_minute: float = 0,
+        tokens_per_minute: float = 0,
+        output_tokens: int = 1024,
+    ):
+        self.llm = llm
+        self.max_concurrency = max_concurrency
+        self.output_tokens = output_tokens
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+
+        self._queue: List[tuple] = []  # heap of (priority, seq, estimate, future)
+        self._seq = itertools.count()
+        self._running = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._flights: Dict[str, _Flight] = {}
+
+        self.calls = 0
+        self.coalesced = 0
+        self.cancelled = 0
+        self.queued_s = {name: 0.0 for name in PRIORITY_NAMES.values()}
+
+    def __getattr__(self, name):
+        return getattr(self.llm, name)
+
+    # --- admission ---
+
+    def _wait_time(self, estimate: int) -> float:
+        wait = 0.0
+        if self.requests is not None:
+            wait = self.requests.wait_time(1)
+        if self.tokens is not None:
+            wait = max(wait, self.tokens.wait_time(estimate))
+        return wait
+
+    def _pump(self):
+        """Starts queued calls, highest priority first, while capacity allows."""
+        self._timer = None
+        while self._queue and self._running < self.max_concurrency:
+            _, _, estimate, future = self._queue[0]
+            if future.done():  # the waiter was cancelled
+                heapq.heappop(self._queue)
+                continue
+            wait = self._wait_time(estimate)
+            if wait > 0:
+                self._timer = asyncio.get_running_loop().call_later(wait, self._pump)
+                return
+            heapq.heappop(self._queue)
+            self._start(estimate)
+            future.set_result(None)
+
+    def _start(self, estimate: int):
+        self._running += 1
+        if self.requests is not None:
+            self.requests.take(1)
+        if self.tokens is not None:
+            self.tokens.take(estimate)
+
+    def _finish(self, estimate: int, response=None):
+        self._running -= 1
+        usage = getattr(response, "usage_metadata", None) if response is not None else None
+        if self.tokens is not None and usage and usage.get("total_tokens"):
+            self.tokens.take(usage["total_tokens"] - estimate)
+        if self._timer is not None:
+            self._timer.cancel()
+        self._pump()
+
+    async def _admit(self, flight: _Flight, estimate: int):
+        if not self._queue and self._running < self.max_concurrency and self._wait_time(estimate) <= 0:
+            self._start(estimate)
+            return
+        future = flight.admission = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, (flight.priority, next(self._seq), estimate, future))
+        start = time.monotonic()
+        if self._timer is None:
+            self._pump()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Admitted just before the cancellation: give the slot back
+                self._finish(estimate)
+            raise
+        finally:
+            flight.admission = None
+            self.queued_s[PRIORITY_NAMES[flight.priority]] += time.monotonic() - start
+
+    def _raise_priority(self, flight: _Flight, priority: int):
+        """Requeues a flight still waiting for admission at a more urgent priority."""
+        flight.priority = priority
+        future = flight.admission
+        if future is None or future.done():
+            return
+        for i, (_, _, estimate, queued) in enumerate(self._queue):
+            if queued is future:
+                self._queue[i] = (priority, next(self._seq), estimate, future)
+                heapq.heapify(self._queue)
+                break
+        # The head of the queue may have changed
+        if self._timer is not None:
+            self._timer.cancel()
+        self._pump()
+
+    async def _call(self, flight: _Flight, messages: Sequence, config, kwargs: dict):
+        estimate = _estimate_tokens(messages, self.output_tokens)
+        await self._admit(flight, estimate)
+        self.calls += 1
+        response = None
+        try:
+            response = await self.llm.ainvoke(messages, config, **kwargs)
+            return response
+        finally:
+            self._finish(estimate, response)
+
+    def _landed(self, key: str, task: asyncio.Task):
+        if self._flights.get(key) is not None and self._flights[key].task is task:
+            del self._flights[key]
+        if not task.cancelled():
+            task.exception()  # retrieved, even when every waiter has gone
+
+    # --- calls ---
+
+    async def ainvoke(self, messages: Sequence, config=None, **kwargs):
+        priority = _priority.get()
+        key = _flight_key(messages, kwargs)
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = self._flights[key] = _Flight(priority)
+            flight.task = asyncio.create_task(self._call(flight, messages, config, kwargs))
+            flight.task.add_done_callback(lambda task: self._landed(key, task))
+        else:
+            self.coalesced += 1
+            if priority < flight.priority:
+                self._raise_priority(flight, priority)
+
+        flight.waiters += 1
+        try:
+            # shield: one caller going away must not cancel the call for the others
+            return await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            if flight.waiters == 1 and not flight.task.done():
+                # Nobody else wants the answer; later callers start afresh
+                self._flights.pop(key, None)
+                flight.task.cancel()
+                self.cancelled += 1
+            raise
+        finally:
+            flight.waiters -= 1
+
+    def schedule_stats(self) -> dict:
+        return {
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "cancelled": self.cancelled,
+            "running": self._running,
+            "queued": sum(1 for *_, future in self._queue if not future.done()),
+            "queued_s": {name: round(seconds, 3) for name, seconds in self.queued_s.items()},
+        }
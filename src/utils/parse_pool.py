@@ -0,0 +1,176 @@
+"""
+Parsing stage for fetch_and_parse_node.
+
+Parser jobs are sent to a process pool so ast.parse / nbformat work does
+not block the event loop and can use every core. Small files are batched
+together to amortize IPC. At most PARSE_WORKERS batches are in flight,
+so a batch's timeout covers its parsing, not its wait for a worker.
+
+A batch that times out is retried file by file so only the pathological
+file fails. A worker crash breaks every batch in the pool, so a broken
+batch is first rerun alone, and only split up if it breaks again. The
+batches killed along with a hung or crashed one are retried as they are. Below PARSE_INLINE_MAX_BYTES everything is
+parsed inline, since a pool round trip would cost more than the parse.
+A single worker is still used: it keeps parsing off the event loop even
+on a two-core host. PARSE_WORKERS=0 parses everything inline.
+"""
+import asyncio
+from contextlib import asynccontextmanager
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, List, Tuple
+
+from src.config.settings import PARSE_WORKERS, PARSE_INLINE_MAX_BYTES, PARSE_BATCH_BYTES, PARSE_TIMEOUT
+
+# (parser function, raw text) -> (ok, parsed text or error message)
+ParseJob = Tuple[Callable[[str], str], str]
+ParseResult = Tuple[bool, str]
+
+_pool = None
+_generation = 0
+_slots = None  # (event loop, one semaphore slot per worker, lock for taking them all)
+
+
+def _parse_batch(jobs: List[ParseJob]) -> List[ParseResult]:
+    """
+    Runs inside a worker process.
+    """
+    results = []
+    for parser_fn, raw in jobs:
+        try:
+            results.append((True, parser_fn(raw)))
+        except Exception as e:
+            results.append((False, str(e)))
+    return results
+
+
+def _get_pool():
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=PARSE_WORKERS)
+    return _pool, _generation
+
+
+def _get_slots() -> Tuple[asyncio.Semaphore, asyncio.Lock]:
+    global _slots
+    loop = asyncio.get_running_loop()
+    if _slots is None or _slots[0] is not loop:
+        _slots = (loop, asyncio.Semaphore(PARSE_WORKERS), asyncio.Lock())
+    return _slots[1], _slots[2]
+
+
+@asynccontextmanager
+async def _slot(alone: bool):
+    """A worker slot, or with alone every slot, so nothing else runs meanwhile."""
+    slots, lock = _get_slots()
+    acquired = 0
+    try:
+        # One caller at a time gathers slots, so two of them never deadlock
+        async with lock:
+            while acquired < (PARSE_WORKERS if alone else 1):
+                await slots.acquire()
+                acquired += 1
+        yield
+    finally:
+        for _ in range(acquired):
+            slots.release()
+
+
+def _reset_pool(generation: int):
+    """
+    Kills the workers of a hung or broken pool so the next batch gets a
+    fresh one. A pool that was already replaced is left alone.
+    """
+    global _pool, _generation
+    if _pool is None or generation != _generation:
+        return
+    # ProcessPoolExecutor cannot cancel running work, so stop the workers
+    # directly; its other futures then fail with BrokenProcessPool. They are
+    # not cancelled: the pool's manager thread would still try to fail them
+    for process in list((getattr(_pool, "_processes", None) or {}).values()):
+        process.kill()
+    _pool.shutdown(wait=False)
+    _pool = None
+    _generation += 1
+
+
+def shutdown_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def _batches(jobs: List[ParseJob]) -> List[List[int]]:
+    """
+    Groups job indexes into batches of up to PARSE_BATCH_BYTES of source.
+    """
+    batches, current, size = [], [], 0
+    for i, (_, raw) in enumerate(jobs):
+        if current and size + len(raw) > PARSE_BATCH_BYTES:
+            batches.append(current)
+            current, size = [], 0
+        current.append(i)
+        size += len(raw)
+    if current:
+        batches.append(current)
+    return batches
+
+
+def _failed(future: asyncio.Future) -> bool:
+    """The worker running future was lost (killed, crashed) before it finished."""
+    return future.cancelled() or isinstance(future.exception(), BrokenProcessPool)
+
+
+async def _run_batch(batch: List[ParseJob], alone: bool = False) -> List[ParseResult]:
+    loop = asyncio.get_running_loop()
+    while True:
+        async with _slot(alone):
+            pool, generation = _get_pool()
+            future = loop.run_in_executor(pool, _parse_batch, batch)
+            # wait() rather than wait_for(): neither a timeout nor the
+            # executor future being cancelled raises here
+            done, _ = await asyncio.wait({future}, timeout=PARSE_TIMEOUT)
+            if done and not _failed(future):
+                return future.result()
+            if generation != _generation:
+                # Another batch reset the pool under this one
+                continue
+            timed_out = not done
+            if timed_out:
+                # Fails with BrokenProcessPool once its worker is killed
+                future.add_done_callback(lambda f: f.cancelled() or f.exception())
+            _reset_pool(generation)
+            break
+
+    if not timed_out and not alone:
+        # Any batch in the pool may have crashed it: find out whether this one did
+        return await _run_batch(batch, alone=True)
+    if len(batch) == 1:
+        reason = "timed out" if timed_out else "crashed its worker process"
+        return [(False, f"parser {reason}")]
+    # Retry one by one to isolate the file that hung or crashed the worker
+    results = []
+    for job in batch:
+        results.extend(await _run_batch([job]))
+    return results
+
+
+async def parse_many(jobs: List[ParseJob]) -> List[ParseResult]:
+    """
+    Parses every job and returns the results in job order.
+    """
+    total_bytes = sum(len(raw) for _, raw in jobs)
+    if PARSE_WORKERS < 1 or total_bytes <= PARSE_INLINE_MAX_BYTES:
+        return _parse_batch(jobs)
+
+    batches = _batches(jobs)
+    batch_results = await asyncio.gather(
+        *(_run_batch([jobs[i] for i in batch]) for batch in batches)
+    )
+
+    results = [None] * len(jobs)
+    for batch, outputs in zip(batches, batch_results):
+        for i, output in zip(batch, outputs):
+            results[i] = output
+    return results
@@ -0,0 +1,159 @@
+"""
+In-memory registry of indexed repositories for the HTTP service.
+
+- one indexed Agent_State per repo URL, evicted least recently used first
+  when there are more than max_repos or their estimated size exceeds max_bytes
+- concurrent index requests for the same repo share one indexing task
+- per-repo QA sessions: each session_id keeps its own conversation memory,
+  the indexed state itself is shared by every session
+
+Files parsed while answering are merged back into the shared state, so
+later questions from any session reuse them. The file catalog and the
+BM25 search index are built once per entry, off the event loop, and kept
+in its state; fetch_and_parse adds newly parsed files to that index.
+"""
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional
+
+from src.utils.conversation_memory import new_conversation
+from src.utils.file_catalog import get_catalog
+from src.utils.search_index import build_search_index
+from src.utils.snapshot import SNAPSHOT_KEYS
+
+
+def estimate_state_bytes(state: dict) -> int:
+    """
+    Rough in-memory size of an indexed state: the JSON size of its
+    snapshot fields (tree, global context, parsed files, symbol index).
+    """
+    return len(json.dumps({key: state.get(key) for key in SNAPSHOT_KEYS}, default=str))
+
+
+def with_lookup_indexes(state: dict) -> dict:
+    """
+    state with its file_catalog and search_index built (if missing), so
+    questions do not rebuild them from the whole repo tree. CPU-bound;
+    run it in a thread.
+    """
+    catalog = get_catalog(state)
+    search_index = state.get("search_index")
+    if search_index is None and catalog is not None:
+        search_index = build_search_index(catalog.files(), state.get("parsed_files") or [], state.get("symbol_index"))
+    return {**state, "file_catalog": catalog, "search_index": search_index}
+
+
+class RepoEntry:
+    def __init__(self, state: dict, size_bytes: int, max_sessions: int):
+        self.state = state
+        self.size_bytes = size_bytes
+        self.indexed_at = time.time()
+        self.last_used = self.indexed_at
+        self.questions = 0
+        self.max_sessions = max_sessions
+        self.sessions: "OrderedDict[str, dict]" = OrderedDict()
+
+    def conversation(self, session_id: str) -> dict:
+        conversation = self.sessions.pop(session_id, None) or new_conversation()
+        self.sessions[session_id] = conversation
+        while len(self.sessions) > self.max_sessions:
+            self.sessions.popitem(last=False)
+        return conversation
+
+    def remember(self, session_id: str, answered_state: dict):
+        """
+        Stores a session's new conversation memory and merges the files
+        parsed for its question into the shared state.
+        """
+        self.sessions[session_id] = answered_state.get("conversation") or new_conversation()
+        self.questions += 1
+        known = {pf.get("path") for pf in self.state["parsed_files"]}
+        new = [pf for pf in answered_state.get("parsed_files") or [] if pf.get("path") not in known]
+        if new:
+            self.state = {**self.state, "parsed_files": self.state["parsed_files"] + new}
+            self.size_bytes += sum(len(pf.get("parsed", "")) for pf in new)
+
+
+class RepoRegistry:
+    def __init__(self, loader: Callable[[str], Awaitable[dict]], max_repos: int, max_bytes: int, max_sessions: int):
+        self.loader = loader
+        self.max_repos = max_repos
+        self.max_bytes = max_bytes
+        self.max_sessions = max_sessions
+        self.entries: "OrderedDict[str, RepoEntry]" = OrderedDict()
+        self.pending: Dict[str, asyncio.Task] = {}
+        self.evicted = 0
+
+    def get(self, url: str) -> Optional[RepoEntry]:
+        entry = self.entries.get(url)
+        if entry is not None:
+            self.entries.move_to_end(url)
+            entry.last_used = time.time()
+        return entry
+
+    async def ensure(self, url: str) -> RepoEntry:
+        """
+        Returns the indexed entry for url, indexing it first when needed.
+        Callers asking for a repo that is already being indexed wait for
+        the same task.
+        """
+        entry = self.get(url)
+        if entry is not None:
+            return entry
+        task = self.pending.get(url)
+        if task is None:
+            task = self.pending[url] = asyncio.create_task(self._index(url))
+        # shield: a client disconnecting must not cancel indexing for the others
+        return await asyncio.shield(task)
+
+    async def _index(self, url: str) -> RepoEntry:
+        try:
+            state = await self.loader(url)
+            if not state.get("repo_tree"):
+                raise ValueError((state.get("status") or ["empty repository tree"])[-1])
+            state = await asyncio.to_thread(with_lookup_indexes, state)
+            size = await asyncio.to_thread(estimate_state_bytes, state)
+            entry = RepoEntry(state, size, self.max_sessions)
+            self.entries[url] = entry
+            self._evict(keep=url)
+            return entry
+        finally:
+            self.pending.pop(url, None)
+
+    def total_bytes(self) -> int:
+        return sum(entry.size_bytes for entry in self.entries.values())
+
+    def _evict(self, keep: str):
+        while len(self.entries) > 1 and (
+            len(self.entries) > self.max_repos or self.total_bytes() > self.max_bytes
+        ):
+            url = next(iter(self.entries))
+            if url == keep:
+                break
+            del self.entries[url]
+            self.evicted += 1
+            print(f"Registry evicted {url}")
+
+    def status(self) -> dict:
+        return {
+            "repos": [
+                {
+                    "url": url,
+                    "commit_sha": entry.state.get("commit_sha"),
+                    "size_mb": round(entry.size_bytes / 1e6, 2),
+                    "parsed_files": len(entry.state.get("parsed_files") or []),
+                    "sessions": len(entry.sessions),
+                    "questions": entry.questions,
+                    "indexed_at": entry.indexed_at,
+                    "last_used": entry.last_used,
+                }
+                for url, entry in reversed(self.entries.items())
+            ],
+            "indexing": sorted(self.pending),
+            "total_mb": round(self.total_bytes() / 1e6, 2),
+            "max_mb": round(self.max_bytes / 1e6, 2),
+            "max_repos": self.max_repos,
+            "evicted": self.evicted,
+        }
@@ -0,0 +1,253 @@
+"""
+In-memory inverted index with BM25 ranking, used to select files for a query.
+
+Every file in the repo tree is a document. Its path tokens and the names
+from the symbol index are indexed up front, and its parsed content is
+added as soon as fetch_and_parse_node parses it. Identifiers are split on snake_case and camelCase boundaries
+("loadModelConfig" -> load, model, config, loadmodelconfig).
+
+Postings are compact parallel arrays (doc ids, term frequencies), scored
+through zero-copy numpy views. Updating a document appends a new doc id
+and tombstones the old one. The index is compacted once tombstones
+outnumber live documents.
+
+The index built for a repo is shared by every question asked about it
+(bulk QA, server sessions). Each qa() run searches an overlay() of it
+instead: what the run parses is indexed into the overlay only, so one
+question's fetches never change another question's ranking.
+"""
+import math
+import re
+from array import array
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+_WORD_RE = re.compile(r"[A-Za-z0-9]+(?:_[A-Za-z0-9]+)*")
+_CAMEL_RE = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|[0-9]+")
+
+STOPWORDS = {
+    "the", "a", "an", "to", "in", "and", "or", "of", "is", "are", "what", "where",
+    "how", "does", "do", "this", "that", "for", "on", "it", "be", "with", "which",
+}
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lowercased tokens of a text: every identifier plus its snake_case and
+    camelCase parts.
+    """
+    tokens = []
+    for word in _WORD_RE.findall(text):
+        parts = [p for piece in word.split("_") for p in _CAMEL_RE.findall(piece)]
+        lowered = word.lower()
+        if lowered not in STOPWORDS:
+            tokens.append(lowered)
+        if len(parts) > 1:
+            tokens.extend(p.lower() for p in parts if len(p) > 1 and p.lower() not in STOPWORDS)
+    return tokens
+
+
+class SearchIndex:
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.paths: List[str] = []                # doc id -> path
+        self.doc_len = array("I")                 # doc id -> token count
+        self.live = bytearray()                   # doc id -> 1 live / 0 deleted
+        self.doc_of: Dict[str, int] = {}          # path -> live doc id
+        self.postings: Dict[str, Tuple[array, array]] = {}  # term -> (doc ids, tfs)
+        self.total_len = 0
+
+    def __len__(self):
+        return len(self.doc_of)
+
+    def __contains__(self, path: str):
+        return path in self.doc_of
+
+    def add(self, path: str, text: str = ""):
+        """
+        Indexes (or re-indexes) a file from its path and optional content.
+        """
+        self.remove(path)
+
+        counts = Counter(tokenize(path.replace("/", " ").replace(".", " ")))
+        if text:
+            counts.update(tokenize(text))
+
+        doc_id = len(self.paths)
+        length = sum(counts.values())
+        self.paths.append(path)
+        self.doc_len.append(length)
+        self.live.append(1)
+        self.doc_of[path] = doc_id
+        self.total_len += length
+
+        for term, tf in counts.items():
+            postings = self.postings.get(term)
+            if postings is None:
+                postings = self.postings[term] = (array("I"), array("I"))
+            postings[0].append(doc_id)
+            postings[1].append(tf)
+
+    def remove(self, path: str):
+        doc_id = self.doc_of.pop(path, None)
+        if doc_id is None:
+            return
+        self.live[doc_id] = 0
+        self.total_len -= self.doc_len[doc_id]
+        if len(self.paths) > 2 * len(self.doc_of) + 1024:
+            self._compact()
+
+    def _compact(self):
+        """
+        Drops tombstoned documents and renumbers doc ids.
+        """
+        remap = {}
+        paths, doc_len, live = [], array("I"), bytearray()
+        for doc_id, path in enumerate(self.paths):
+            if self.live[doc_id]:
+                remap[doc_id] = len(paths)
+                paths.append(path)
+                doc_len.append(self.doc_len[doc_id])
+                live.append(1)
+
+        postings = {}
+        for term, (ids, tfs) in self.postings.items():
+            new_ids, new_tfs = array("I"), array("I")
+            for doc_id, tf in zip(ids, tfs):
+                if doc_id in remap:
+                    new_ids.append(remap[doc_id])
+                    new_tfs.append(tf)
+            if new_ids:
+                postings[term] = (new_ids, new_tfs)
+
+        self.paths, self.doc_len, self.live, self.postings = paths, doc_len, live, postings
+        self.doc_of = {path: doc_id for doc_id, path in enumerate(paths)}
+
+    def copy(self) -> "SearchIndex":
+        index = SearchIndex(self.k1, self.b)
+        index.paths = list(self.paths)
+        index.doc_len = array("I", self.doc_len)
+        index.live = bytearray(self.live)
+        index.doc_of = dict(self.doc_of)
+        index.postings = {term: (array("I", ids), array("I", tfs)) for term, (ids, tfs) in self.postings.items()}
+        index.total_len = self.total_len
+        return index
+
+    def overlay(self) -> "SearchOverlay":
+        """A private, writable view of this index; see SearchOverlay."""
+        return SearchOverlay(self)
+
+    def search(self, query: str, k: int = 10) -> List[Tuple[str, float]]:
+        """
+        BM25 top-k (path, score) pairs for a free-text query.
+        Scoring is vectorized over the postings arrays with numpy.
+        """
+        live = np.frombuffer(self.live, dtype=np.uint8)
+        return _bm25([(self, live)], len(self.doc_of), self.total_len, query, k, self.k1, self.b)
+
+
+class SearchOverlay:
+    """
+    A shared SearchIndex plus a layer of documents of its own. add() goes
+    to the layer, where it shadows the base's document for that path;
+    search() ranks over both as if they were one index. The base is never
+    modified.
+    """
+
+    def __init__(self, base: SearchIndex, layer: Optional[SearchIndex] = None):
+        self.base = base
+        self.layer = layer if layer is not None else SearchIndex(base.k1, base.b)
+
+    def __len__(self):
+        return len(self.base) + sum(1 for path in self.layer.doc_of if path not in self.base)
+
+    def __contains__(self, path: str):
+        return path in self.layer or path in self.base
+
+    def add(self, path: str, text: str = ""):
+        self.layer.add(path, text)
+
+    def overlay(self) -> "SearchOverlay":
+        """An overlay of the same base starting from a copy of this layer."""
+        return SearchOverlay(self.base, self.layer.copy())
+
+    def search(self, query: str, k: int = 10) -> List[Tuple[str, float]]:
+        base, layer = self.base, self.layer
+        base_live = np.frombuffer(base.live, dtype=np.uint8)
+        total_len = base.total_len + layer.total_len
+        shadowed = [base.doc_of[path] for path in layer.doc_of if path in base.doc_of]
+        if shadowed:
+            base_live = base_live.copy()
+            base_live[shadowed] = 0
+            total_len -= sum(base.doc_len[doc_id] for doc_id in shadowed)
+        segments = [(base, base_live), (layer, np.frombuffer(layer.live, dtype=np.uint8))]
+        return _bm25(segments, len(self), total_len, query, k, base.k1, base.b)
+
+
+def _bm25(segments: List[Tuple[SearchIndex, np.ndarray]], n_docs: int, total_len: int,
+          query: str, k: int, k1: float, b: float) -> List[Tuple[str, float]]:
+    """
+    BM25 top-k over indexes holding disjoint live documents, each given
+    with its live mask; document frequencies are summed across them.
+    """
+    if not n_docs:
+        return []
+    avg_len = total_len / n_docs
+    terms = set(tokenize(query))
+
+    matched = []  # per segment: term -> (live doc ids, tfs)
+    for index, live in segments:
+        found = {}
+        for term in terms:
+            postings = index.postings.get(term)
+            if postings is None:
+                continue
+            ids = np.frombuffer(postings[0], dtype=np.uint32)
+            tfs = np.frombuffer(postings[1], dtype=np.uint32).astype(np.float64)
+            alive = live[ids].astype(bool)
+            if alive.any():
+                found[term] = (ids[alive], tfs[alive])
+        matched.append(found)
+
+    hits = []  # (score, segment, doc id)
+    for s, (index, _) in enumerate(segments):
+        doc_len = np.frombuffer(index.doc_len, dtype=np.uint32)
+        scores = np.zeros(len(index.paths))
+        for term, (ids, tfs) in matched[s].items():
+            df = sum(len(found[term][0]) for found in matched if term in found)
+            idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+            norm = k1 * (1 - b + b * doc_len[ids] / avg_len)
+            scores[ids] += idf * tfs * (k1 + 1) / (tfs + norm)
+
+        top = np.flatnonzero(scores)
+        if len(top) > k:
+            top = top[np.argpartition(scores[top], -k)[-k:]]
+        hits.extend((float(scores[doc_id]), s, int(doc_id)) for doc_id in top)
+
+    # Ties keep index order (earlier segment, then lower doc id)
+    hits.sort(key=lambda hit: (-hit[0], hit[1], hit[2]))
+    return [(segments[s][0].paths[doc_id], score) for score, s, doc_id in hits[:k]]
+
+
+def document_text(path: str, parsed: str, symbol_index: Optional[Dict]) -> str:
+    """
+    Indexed text of a file: its parsed content plus the identifiers the
+    symbol index recorded for it, so unparsed .py files are still findable.
+    """
+    names = (symbol_index or {}).get("files", {}).get(path, [])
+    return f"{parsed} {' '.join(names)}" if names else parsed
+
+
+def build_search_index(files: Iterable[Dict], parsed_files: Iterable[Dict], symbol_index: Optional[Dict] = None) -> SearchIndex:
+    """
+    Index over every file path in the repo plus the content already parsed.
+    """
+    index = SearchIndex()
+    parsed = {pf["path"]: pf.get("parsed", "") for pf in parsed_files if pf.get("path") and not pf.get("failed")}
+    for meta in files:
+        path = meta["path"]
+        index.add(path, document_text(path, parsed.get(path, ""), symbol_index))
+    return index
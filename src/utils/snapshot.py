@@ -0,0 +1,109 @@
+"""
+On-disk snapshots of a finished indexing run.
+
+A snapshot stores the serializable part of Agent_State for one repo at one
+resolved commit, so a later run against the same commit can skip the whole
+index graph. Snapshots are zstd-compressed JSON files:
+
+    SNAPSHOT_DIR/<owner>__<repo>/<commit_sha>.json.zst
+"""
+import json
+import os
+import tempfile
+import time
+from typing import Optional
+
+import zstandard
+
+from src.config.settings import SNAPSHOT_DIR
+
+# Bump whenever the snapshot layout or any stored field changes shape
+SNAPSHOT_VERSION = 3
+
+# State keys persisted in a snapshot (llm and per-question fields are left out)
+SNAPSHOT_KEYS = ["url", "commit_sha", "repo_tree", "global_context", "directory_digests", "parsed_files", "symbol_index"]
+
+
+def _repo_dir(repo_url: str) -> str:
+    owner_repo = repo_url.split("https://github.com/")[-1].split("/")[:2]
+    return os.path.join(SNAPSHOT_DIR, "__".join(owner_repo))
+
+
+def snapshot_path(repo_url: str, commit_sha: str) -> str:
+    return os.path.join(_repo_dir(repo_url), f"{commit_sha}.json.zst")
+
+
+def save_snapshot(state: dict) -> Optional[str]:
+    """
+    Writes the snapshot for state["url"] @ state["commit_sha"].
+    The file is written to a temp name and renamed, so readers never see
+    a partial snapshot. Returns the path, or None when there is no commit
+    or some directory digest is a fallback (the next run retries it).
+    """
+    if not state.get("url") or not state.get("commit_sha"):
+        return None
+    if state.get("digests_degraded"):
+        print("Some directory digests failed; not saving a snapshot.")
+        return None
+
+    payload = {key: state.get(key) for key in SNAPSHOT_KEYS}
+    # Files that failed to fetch are fetched again by the next run
+    payload["parsed_files"] = [pf for pf in payload["parsed_files"] or [] if not pf.get("failed")]
+    payload["version"] = SNAPSHOT_VERSION
+    payload["saved_at"] = time.time()
+    data = zstandard.ZstdCompressor(level=3).compress(json.dumps(payload).encode("utf-8"))
+
+    path = snapshot_path(state["url"], state["commit_sha"])
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    return path
+
+
+def _read(path: str) -> Optional[dict]:
+    try:
+        with open(path, "rb") as f:
+            payload = json.loads(zstandard.ZstdDecompressor().decompress(f.read()))
+    except (OSError, ValueError, zstandard.ZstdError):
+        return None
+    if payload.get("version") != SNAPSHOT_VERSION:
+        return None
+    return payload
+
+
+def load_snapshot(repo_url: str, commit_sha: str) -> Optional[dict]:
+    """
+    Returns the snapshot fields for repo_url @ commit_sha, or None when
+    there is no snapshot or it was written by another snapshot version.
+    """
+    if not commit_sha:
+        return None
+    payload = _read(snapshot_path(repo_url, commit_sha))
+    if payload is None:
+        return None
+    return {key: payload.get(key) for key in SNAPSHOT_KEYS}
+
+
+def latest_snapshot(repo_url: str) -> Optional[dict]:
+    """
+    Most recently saved snapshot of repo_url at any commit, or None.
+    Used as the base for incremental re-indexing.
+    """
+    repo_dir = _repo_dir(repo_url)
+    try:
+        names = [n for n in os.listdir(repo_dir) if n.endswith(".json.zst")]
+    except OSError:
+        return None
+
+    paths = sorted(
+        (os.path.join(repo_dir, n) for n in names),
+        key=os.path.getmtime,
+        reverse=True,
+    )
+    for path in paths:
+        payload = _read(path)
+        if payload is not None:
+            return {key: payload.get(key) for key in SNAPSHOT_KEYS}
+    return None
@@ -0,0 +1,157 @@
+"""
+Repository-wide symbol index.
+
+Maps symbol names to their (path, line) locations so function_usage and
+type_lookup questions can be answered by a dict lookup instead of
+fetching every .py file. The index is plain JSON-serializable data and
+lives in state["symbol_index"]:
+
+    {
+      "defs":    {name: [[path, line, kind, qualname], ...]},
+      "imports": {name: [[path, line, target, alias], ...]},
+      "refs":    {name: [[path, line], ...]},
+      "files":   {path: [names contributed by this file]},
+    }
+"""
+import asyncio
+import json
+import sys
+from typing import Dict, List
+
+from src.tools.parse_python import extract_symbols
+from src.utils.disk_cache import parse_cache
+from src.utils.fetch_blob import fetch_blob_content
+from src.utils.parse_pool import parse_many
+from src.config.settings import SYMBOL_INDEX_MAX_FILES
+
+
+def new_symbol_index() -> Dict:
+    return {"defs": {}, "imports": {}, "refs": {}, "files": {}}
+
+
+def remove_file(index: Dict, path: str):
+    """
+    Drops every entry a file contributed to the index.
+    """
+    for name in index["files"].pop(path, []):
+        for table in ("defs", "imports", "refs"):
+            entries = index[table].get(name)
+            if not entries:
+                continue
+            kept = [e for e in entries if e[0] != path]
+            if kept:
+                index[table][name] = kept
+            else:
+                del index[table][name]
+
+
+def add_file(index: Dict, path: str, symbols: Dict):
+    """
+    Adds the output of extract_symbols for one file (replacing older entries).
+    """
+    remove_file(index, path)
+    names = set()
+    for name, line, kind, qualname in symbols.get("defs", []):
+        index["defs"].setdefault(name, []).append([path, line, kind, qualname])
+        names.add(name)
+    for alias, line, target in symbols.get("imports", []):
+        # Found under the local alias and under the imported name itself
+        for name in {alias, target.split(".")[-1]}:
+            index["imports"].setdefault(name, []).append([path, line, target, alias])
+            names.add(name)
+    for name, line in symbols.get("refs", []):
+        index["refs"].setdefault(name, []).append([path, line])
+        names.add(name)
+    index["files"][path] = sorted(names)
+
+
+def lookup(index: Dict, name: str) -> Dict[str, List]:
+    """
+    Definitions, imports and references of a name. Dotted names
+    ("module.func", "Class.method") are resolved on their last segment.
+    References through an import alias ("import x as y") are included.
+    """
+    name = name.split(".")[-1]
+    imports = index["imports"].get(name, [])
+    refs = list(index["refs"].get(name, []))
+
+    for path, _, _, alias in imports:
+        if alias != name:
+            refs.extend(ref for ref in index["refs"].get(alias, []) if ref[0] == path)
+
+    return {
+        "defs": index["defs"].get(name, []),
+        "imports": imports,
+        "refs": refs,
+    }
+
+
+def files_for(index: Dict, name: str, limit: int = 20) -> List[str]:
+    """
+    Paths defining a name first, then the paths referencing it.
+    """
+    hits = lookup(index, name)
+    paths = []
+    for table in ("defs", "imports", "refs"):
+        for entry in hits[table]:
+            if entry[0] not in paths:
+                paths.append(entry[0])
+    return paths[:limit]
+
+
+def format_hits(index: Dict, name: str, limit: int = 30) -> str:
+    """
+    Human/LLM readable list of locations for a name.
+    """
+    hits = lookup(index, name)
+    lines = [f"- defined: {p}:{line} ({kind} {qualname})" for p, line, kind, qualname in hits["defs"]]
+    lines += [f"- imported: {p}:{line} {target} as {alias}" for p, line, target, alias in hits["imports"]]
+    lines += [f"- used: {p}:{line}" for p, line in hits["refs"]]
+    return "\n".join(lines[:limit])
+
+
+def _cache_key(sha: str) -> str:
+    version = getattr(sys.modules[extract_symbols.__module__], "PARSER_VERSION", 0)
+    return f"{sha}:{extract_symbols.__name__}:{version}"
+
+
+async def index_files(index: Dict, file_metas: List[Dict]) -> int:
+    """
+    Fetches the given .py files (blob cache / archive / HTTP) and adds their
+    symbols to the index. Extraction results are cached per blob sha.
+    Returns the number of files indexed.
+    """
+    file_metas = [m for m in file_metas if m["ext"].lower() == ".py"][:SYMBOL_INDEX_MAX_FILES]
+    cache = parse_cache()
+
+    def lookup_all():
+        # Runs in a thread: thousands of SQLite reads would stall the event loop
+        return [
+            cache.get(_cache_key(meta["sha"])) if cache is not None and meta.get("sha") else None
+            for meta in file_metas
+        ]
+
+    pending = []
+    for meta, cached in zip(file_metas, await asyncio.to_thread(lookup_all)):
+        if cached is not None:
+            add_file(index, meta["path"], json.loads(cached))
+        else:
+            pending.append(meta)
+
+    contents = await asyncio.gather(
+        *(fetch_blob_content(meta["url"], meta.get("sha")) for meta in pending)
+    )
+    fetched = [(meta, raw) for meta, raw in zip(pending, contents) if raw]
+    outputs = await parse_many([(extract_symbols, raw) for _, raw in fetched])
+
+    to_store = []
+    for (meta, _), (ok, symbols) in zip(fetched, outputs):
+        if not ok:
+            continue
+        add_file(index, meta["path"], symbols)
+        if cache is not None and meta.get("sha"):
+            to_store.append((_cache_key(meta["sha"]), json.dumps(symbols).encode("utf-8")))
+    if to_store:
+        await asyncio.to_thread(lambda: [cache.set(key, value) for key, value in to_store])
+
+    return len(file_metas) - len(pending) + len(fetched)
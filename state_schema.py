@@ -3,7 +3,7 @@
 from typing import Annotated, Sequence, TypedDict, Union, Dict, List
 from langgraph.graph.message import add_messages
 from langchain_core.messages import BaseMessage
-from src.config.settings import LLM
+from src.utils.conversation_memory import add_status
 
 
 class Agent_State(TypedDict):
@@ -12,15 +12,63 @@ class Agent_State(TypedDict):
     
     This is the central shared memory between all nodes.
     """
-    messages: Annotated[Sequence[BaseMessage], add_messages]
+    messages: Annotated[Sequence[BaseMessage], add_messages]  # current turn only
+    conversation: Dict[str, any]  # bounded memory of earlier turns
+    status: Annotated[List[str], add_status]  # node status lines, kept apart from the dialogue
     url: Union[str, None]
+    commit_sha: Union[str, None]
     repo_tree: Dict[str, any]
     global_context: Union[str, None]
+    directory_digests: Dict[str, str]  # "src/utils/" -> LLM digest, see directory_digest.py
+    digests_degraded: bool  # some digest is a failed directory's fallback: not snapshotted
+    directory_context: str  # digests answering a directory_question
     selected_files: List[Dict[str, any]]
-    unselected_files: List[str]
     parsed_files: List[Dict[str, str]]
+    symbol_index: Dict[str, any]
+    symbol_hits: str
+    search_index: any
+    file_catalog: any
     intent: str
     keywords: List[str]
     targets: Dict[str, any]
     summary: str #Annotated[Sequence[BaseMessage], add_messages]
-    llm: LLM
+    context_files: List[str]
+    context_dropped: List[str]  # parsed files left out of the summarize prompt for length
+    llm: any  # chat model, see src/utils/llm_provider.py
+
+
+class Selection_Input(TypedDict):
+    """
+    What the selection subgraph (symbol_index -> query_analyser ->
+    analyze_tree -> fetch_and_parse) reads from the index graph. status is
+    left out so the subgraph reports only its own status lines.
+    """
+    messages: Annotated[Sequence[BaseMessage], add_messages]
+    url: Union[str, None]
+    commit_sha: Union[str, None]
+    repo_tree: Dict[str, any]
+    selected_files: List[Dict[str, any]]
+    parsed_files: List[Dict[str, str]]
+    symbol_index: Dict[str, any]
+    search_index: any
+    file_catalog: any
+    directory_digests: Dict[str, str]
+
+
+class Selection_Output(TypedDict):
+    """
+    What the selection subgraph hands back. global_context and
+    directory_digests are left out: global_context_node writes them in
+    the same step.
+    """
+    status: Annotated[List[str], add_status]
+    selected_files: List[Dict[str, any]]
+    parsed_files: List[Dict[str, str]]
+    symbol_index: Dict[str, any]
+    symbol_hits: str
+    search_index: any
+    file_catalog: any
+    intent: str
+    keywords: List[str]
+    targets: Dict[str, any]
+    directory_context: str